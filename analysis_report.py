@@ -0,0 +1,179 @@
+"""
+The web app's AnalysisReport (types/analysis.ts), built from the agents' text.
+
+The coach answers in a fixed markdown layout (see coach.PROMPT_TEMPLATE), so
+its plan maps field by field onto a TrainingPlan. The analyst writes freer
+prose around three numbered patterns; each becomes a Weakness — the heading is
+the title, "Game N (url)" references become citations, and the paragraph
+introduced by a "tip" label becomes the actionable tip. Text that does not fit
+a field is kept in the description rather than dropped.
+
+    report = build_report(job_id, user_id, "lichess", "magnus", "rapid",
+                          ratings, 20, analysis_text, plan_text, "complete")
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+STATUSES = ("pending", "processing", "complete", "failed")
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+
+# "## 1. Title", "### Pattern 2: Title", "**3. Title**", "1. **Title**"
+_PATTERN_HEADING = re.compile(
+    r"^(?:#{1,4}[ \t]*)?(?:\*\*)?[ \t]*(?:(?:Pattern|Weakness)[ \t]*)?([1-9])[.):][ \t]*(.+?)[ \t]*$",
+    re.I | re.M,
+)
+_CITATION = re.compile(r"Game[ \t]+(\d+)[ \t]*\(?[ \t]*<?(https?://[^\s)>]+)")
+_TIP_LABEL = re.compile(
+    r"^[ \t]*(?:[-*][ \t]*)?(?:\*\*)?[ \t]*(?:\d\.[ \t]*)?"
+    r"(?:actionable[ \t]+)?(?:improvement[ \t]+)?(?:tip|fix|how to (?:fix|improve)(?: it)?)"
+    r"[ \t]*(?:\*\*)?[ \t]*:[ \t]*(?:\*\*)?",
+    re.I | re.M,
+)
+_EVIDENCE_LABEL = re.compile(
+    r"^[ \t]*(?:[-*][ \t]*)?(?:\*\*)?[ \t]*(?:\d\.[ \t]*)?(?:evidence|description|pattern)"
+    r"[ \t]*(?:\*\*)?[ \t]*:[ \t]*(?:\*\*)?",
+    re.I | re.M,
+)
+
+_PLAN_SECTION = re.compile(r"^##[ \t]+(.+?)[ \t]*$", re.M)
+_PUZZLE_LINE = re.compile(
+    r"^[-*][ \t]*\*\*(?P<day>\w+):?\*\*:?[ \t]*"
+    r"\[(?P<name>[^\]]+)\]\((?P<url>https?://lichess\.org/training/(?P<slug>[\w-]+))\)"
+    r"[ \t]*[—–-]+[ \t]*(?P<note>.+)$",
+    re.M,
+)
+_TOPIC   = re.compile(r"\*\*Topic:?\*\*:?[ \t]*(.+)")
+_YOUTUBE = re.compile(r"\*\*YouTube search:?\*\*:?[ \t]*(.+)", re.I)
+
+
+def timestamp(moment: Optional[datetime] = None) -> str:
+    """UTC ISO-8601 with a Z suffix, as the web app stores created_at/updated_at."""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _clean(text: str) -> str:
+    """Collapse a markdown fragment to plain paragraphs (bold markers and blank runs removed)."""
+    text = text.replace("**", "").strip().strip("-").strip()
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+# ── Analyst → weaknesses ──────────────────────────────────────────────────────
+
+def parse_weaknesses(analysis: str) -> list[dict]:
+    """The analyst's numbered patterns as Weakness dicts, ranked in the order written."""
+    headings = [m for m in _PATTERN_HEADING.finditer(analysis) if _is_heading(m)]
+    weaknesses = []
+    for i, heading in enumerate(headings):
+        end  = headings[i + 1].start() if i + 1 < len(headings) else len(analysis)
+        body = analysis[heading.end():end]
+
+        tip = ""
+        label = _TIP_LABEL.search(body)
+        if label is not None:
+            tip  = _clean(body[label.end():])
+            body = body[:label.start()]
+
+        citations, seen = [], set()
+        for number, url in _CITATION.findall(heading.group(0) + body + tip):
+            if int(number) not in seen:
+                seen.add(int(number))
+                citations.append({"game_number": int(number), "url": url.rstrip(".,;")})
+
+        weaknesses.append({
+            "rank":           len(weaknesses) + 1,
+            "title":          _clean(heading.group(2)).rstrip(":").strip(),
+            "description":    _clean(_EVIDENCE_LABEL.sub("", body)),
+            "game_citations": citations,
+            "actionable_tip": tip,
+        })
+    return weaknesses
+
+
+def _is_heading(match: re.Match) -> bool:
+    """A pattern heading is a markdown heading or a bold line, not a numbered list item."""
+    line = match.group(0).lstrip()
+    return line.startswith("#") or line.startswith("**") or line.rstrip().endswith("**")
+
+
+# ── Coach → training plan ─────────────────────────────────────────────────────
+
+def parse_training_plan(plan: str) -> dict:
+    """The coach's plan as a TrainingPlan dict; missing sections are left empty."""
+    sections = {}
+    matches  = list(_PLAN_SECTION.finditer(plan))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(plan)
+        sections[match.group(1).strip().lower()] = plan[match.end():end].strip()
+
+    def section(*names: str) -> str:
+        for key, text in sections.items():
+            if any(name in key for name in names):
+                return text
+        return ""
+
+    puzzles = [
+        {
+            "day":           m["day"],
+            "theme_name":    m["name"].strip(),
+            "theme_slug":    m["slug"],
+            "theme_url":     m["url"],
+            "coaching_note": m["note"].strip(),
+        }
+        for m in _PUZZLE_LINE.finditer(section("puzzle"))
+        if m["day"] in WEEKDAYS
+    ]
+    concept = section("concept")
+    topic   = _TOPIC.search(concept)
+    search  = _YOUTUBE.search(concept)
+    return {
+        "primary_focus":          _clean(section("focus")),
+        "daily_puzzles":          puzzles,
+        "concept_topic":          _clean(topic.group(1)) if topic else _clean(concept),
+        "concept_youtube_search": search.group(1).strip().strip("\"'“”") if search else "",
+        "opening_adjustment":     _clean(section("opening")),
+        "weekly_goal":            _clean(section("goal")),
+    }
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def build_report(
+    report_id: str,
+    user_id: str,
+    platform: str,
+    username: str,
+    time_control: Optional[str],
+    ratings: dict,
+    games_analyzed: int,
+    analysis: str,
+    plan: str,
+    status: str,
+    created_at: Optional[str] = None,
+    updated_at: Optional[str] = None,
+) -> dict:
+    """
+    An AnalysisReport dict. `analysis` and `plan` may be empty (a pending,
+    processing or failed report): the weaknesses and plan are then empty too.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"unknown report status '{status}'")
+    now = timestamp()
+    report = {
+        "id":             report_id,
+        "user_id":        user_id,
+        "platform":       platform,
+        "username":       username,
+        "ratings":        ratings,
+        "games_analyzed": games_analyzed,
+        "weaknesses":     parse_weaknesses(analysis),
+        "training_plan":  parse_training_plan(plan),
+        "status":         status,
+        "created_at":     created_at or now,
+        "updated_at":     updated_at or now,
+    }
+    if time_control:
+        report["time_control"] = time_control.lower()
+    return report
@@ -10,17 +10,33 @@ Usage:
 
 import sys
 import io
+import json
 import argparse
-from typing import Optional
-import requests
-import chess.pgn
-import anthropic
+from functools import partial
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Iterator, Mapping, Optional, Sequence
+
 from dotenv import load_dotenv
 
-load_dotenv()
+import fast_pgn
+import game_annotations
+import http_client
+import llm
+import parallel_parse
+import timing
+from pgn_index import PgnIndex
+from ratings_cache import RatingsCache
+from game_format import format_for_claude   # re-exported for main.py and batch.py
+from game_record import GameRecord, GameTable
+from game_store import GameStore, sync_scope
+from single_flight import SingleFlight
+
+if TYPE_CHECKING:   # only the replay path needs python-chess's PGN reader
+    import chess.pgn
 
 LICHESS_API = "https://lichess.org/api"
-USER_AGENT  = "chess-coach/1.0 (https://github.com/ar0000n/chess-coach)"
+
+_fetches = SingleFlight()   # game downloads in flight, by request
 
 SYSTEM_PROMPT = """\
 You are an expert chess coach with decades of experience analysing games at all levels. \
@@ -49,24 +65,14 @@ Write in a direct but encouraging coaching voice. Be specific; avoid vague gener
 
 PERF_TYPES = ["bullet", "blitz", "rapid", "classical"]
 
+RATINGS_BATCH = 300   # usernames per POST /api/users request (the endpoint's limit)
+
+# Disable with `ratings_cache.enabled = False` (the --no-cache CLI switch)
+ratings_cache = RatingsCache("lichess")
 
-def fetch_user_ratings(username: str) -> dict:
-    """
-    Fetch the user's current ratings from Lichess for all standard time controls.
-    Returns a dict keyed by perf type, e.g.:
-      {"bullet": {"rating": 1500, "games": 120, "prog": 10}, ...}
-    Only includes time controls where the user has played at least one game.
-    Raises requests.HTTPError on a bad response.
-    """
-    url = f"{LICHESS_API}/user/{username}"
-    response = requests.get(
-        url,
-        headers={"User-Agent": USER_AGENT},
-        timeout=10,
-    )
-    response.raise_for_status()
-    data = response.json()
 
+def _ratings_from_user(data: dict) -> dict:
+    """A Lichess user object's perfs as the ratings dict for PERF_TYPES."""
     ratings = {}
     perfs = data.get("perfs", {})
     for key in PERF_TYPES:
@@ -79,13 +85,97 @@ def fetch_user_ratings(username: str) -> dict:
     return ratings
 
 
-def fetch_games(username: str, max_games: int, perf_type: Optional[str] = None) -> str:
+def fetch_user_ratings(username: str) -> dict:
+    """
+    Fetch the user's current ratings from Lichess for all standard time controls.
+    Returns a dict keyed by perf type, e.g.:
+      {"bullet": {"rating": 1500, "games": 120, "prog": 10}, ...}
+    Only includes time controls where the user has played at least one game.
+    Ratings looked up within the last few minutes come from `ratings_cache`.
+    Raises requests.HTTPError on a bad response.
+    """
+    cached = ratings_cache.get(username)
+    if cached is not None:
+        return cached
+    url = f"{LICHESS_API}/user/{username}"
+    response = http_client.get(url, timeout=10)
+    response.raise_for_status()
+    ratings = _ratings_from_user(response.json())
+    ratings_cache.put(username, ratings)
+    return ratings
+
+
+def fetch_ratings(usernames: Sequence[str], errors: Optional[dict] = None) -> dict[str, dict]:
+    """
+    Current ratings for many users at once, keyed by the usernames as given,
+    each in the shape fetch_user_ratings returns. Cached users cost nothing;
+    the rest go to Lichess's multi-user endpoint, RATINGS_BATCH names per
+    request. Unknown usernames are left out of the result. So are the users
+    of a request that failed; the others are still returned, and each failure
+    is recorded in `errors` (username → exception) when a dict is passed.
+    """
+    import requests
+
+    found   = ratings_cache.get_many(usernames)
+    missing = list({u.lower(): u for u in usernames if u not in found}.values())
+
+    fetched = {}
+    for start in range(0, len(missing), RATINGS_BATCH):
+        chunk = missing[start:start + RATINGS_BATCH]
+        try:
+            response = http_client.post(
+                f"{LICHESS_API}/users",
+                data=",".join(chunk),
+                headers={"Content-Type": "text/plain"},
+                timeout=30,
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if errors is not None:
+                errors.update(dict.fromkeys(chunk, e))
+            continue
+        for user in response.json():
+            ratings = fetched[user["id"]] = _ratings_from_user(user)
+            ratings_cache.put(user["id"], ratings)
+
+    for username in usernames:
+        if username not in found and username.lower() in fetched:
+            found[username] = fetched[username.lower()]
+    return found
+
+
+def fetch_games(
+    username: str,
+    max_games: int,
+    perf_type: Optional[str] = None,
+    since: Optional[int] = None,
+    annotations: bool = False,
+) -> str:
     """
     Download the last `max_games` games for `username` from Lichess in PGN format.
-    Optionally filter by `perf_type` (bullet, blitz, rapid, classical).
+    Optionally filter by `perf_type` (bullet, blitz, rapid, classical), and by
+    `since` (epoch ms) to download only games started at or after that time.
+    `annotations` asks for [%eval] and [%clk] comments in the movetext.
     Raises requests.HTTPError on a bad response.
     """
     url = f"{LICHESS_API}/games/user/{username}"
+    response = http_client.get(
+        url,
+        headers={"Accept": "application/x-chess-pgn"},
+        params=_export_params(max_games, perf_type, since, annotations),
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.text
+
+
+def _export_params(
+    max_games: int,
+    perf_type: Optional[str],
+    since: Optional[int],
+    annotations: bool = False,
+) -> dict:
+    """Query parameters shared by the PGN and ndjson game exports."""
     params: dict = {
         "max":     max_games,
         "moves":   "true",
@@ -94,138 +184,394 @@ def fetch_games(username: str, max_games: int, perf_type: Optional[str] = None)
     }
     if perf_type:
         params["perfType"] = perf_type
-
-    response = requests.get(
-        url,
-        headers={
-            "User-Agent": USER_AGENT,
-            "Accept": "application/x-chess-pgn",
-        },
-        params=params,
+    if since:
+        params["since"] = since
+    if annotations:
+        params["evals"]  = "true"   # server analysis, for games that have it
+        params["clocks"] = "true"
+    return params
+
+
+def stream_games(
+    username: str,
+    max_games: int,
+    perf_type: Optional[str] = None,
+    fmt: str = "pgn",
+    since: Optional[int] = None,
+    replay: bool = False,
+    annotations: bool = False,
+) -> Iterator[GameRecord]:
+    """
+    Stream the last `max_games` games for `username` from Lichess and yield
+    parsed game records one at a time, as the export arrives.
+
+    `fmt` selects the export format: "pgn" (parsed straight off the socket;
+    see `iter_games` for `replay` and `annotations`) or "ndjson" (one JSON
+    object per line).
+    The response body is never held in memory as a whole, so the first game is
+    available as soon as its bytes land and peak memory stays flat.
+    Raises requests.HTTPError on a bad response.
+    """
+    if fmt not in ("pgn", "ndjson"):
+        raise ValueError(f"Unknown export format '{fmt}'.")
+
+    accept = "application/x-chess-pgn" if fmt == "pgn" else "application/x-ndjson"
+    response = http_client.get(
+        f"{LICHESS_API}/games/user/{username}",
+        headers={"Accept": accept},
+        params=_export_params(max_games, perf_type, since, annotations),
         timeout=30,
+        stream=True,
     )
-    response.raise_for_status()
-    return response.text
+    with response:
+        response.raise_for_status()
+        if fmt == "pgn":
+            response.raw.decode_content = True   # transparently gunzip
+            response.raw.auto_close = False       # let readline() see a clean EOF
+            pgn_io = io.TextIOWrapper(response.raw, encoding="utf-8")
+            yield from iter_games(pgn_io, username, replay, annotations)
+        else:
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield _parse_ndjson_game(json.loads(line), username, annotations)
 
 
 # ── PGN parsing ───────────────────────────────────────────────────────────────
 
-def parse_games(pgn_text: str, username: str) -> list[dict]:
+def _user_result(result: str, color: str) -> str:
+    """Translate a PGN result string into Win/Loss/Draw from the user's side."""
+    if color == "White":
+        return {"1-0": "Win", "0-1": "Loss", "1/2-1/2": "Draw"}.get(result, "?")
+    return {"1-0": "Loss", "0-1": "Win", "1/2-1/2": "Draw"}.get(result, "?")
+
+
+def _number_moves(sans: list[str]) -> str:
+    """Join a flat SAN list into standard numbered notation ("1.e4 e5 2.Nf3")."""
+    pairs: list[str] = []
+    for i in range(0, len(sans), 2):
+        n = i // 2 + 1
+        pairs.append(f"{n}.{sans[i]} {sans[i + 1]}" if i + 1 < len(sans) else f"{n}.{sans[i]}")
+    return " ".join(pairs)
+
+
+def _played_at(headers: Mapping[str, str]) -> int:
+    """Game start time in epoch ms from the UTCDate/UTCTime headers (0 if absent)."""
+    try:
+        start = datetime.strptime(
+            f"{headers.get('UTCDate', '')} {headers.get('UTCTime', '')}", "%Y.%m.%d %H:%M:%S"
+        )
+    except ValueError:
+        return 0
+    return int(start.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def replay_sans(game: "chess.pgn.Game") -> list[str]:
+    """Replay a game's mainline on a board and return the SAN of each move."""
+    board      = game.board()
+    sans: list[str] = []
+    for move in game.mainline_moves():
+        sans.append(board.san(move))
+        board.push(move)
+    return sans
+
+
+def replay_annotations(game: "chess.pgn.Game") -> tuple[list, list]:
+    """Per-ply [%eval] (White-relative centipawns) and [%clk] (seconds) of a game's mainline."""
+    evals:  list = []
+    clocks: list = []
+    for node in game.mainline():
+        score = node.eval()
+        evals.append(None if score is None else score.white().score(mate_score=fast_pgn.MATE_CP))
+        clock = node.clock()
+        clocks.append(None if clock is None else round(clock, 1))
+    return evals, clocks
+
+
+def _parse_game(headers: Mapping[str, str], sans: list[str], username: str) -> GameRecord:
+    """Convert one game's PGN headers and SAN list into the pipeline's game record."""
+    white   = headers.get("White", "")
+    black   = headers.get("Black", "")
+    result  = headers.get("Result", "*")
+
+    # Determine which colour the target user played
+    color = "White" if white.lower() == username.lower() else "Black"
+
+    return GameRecord(
+        color=color,
+        result=_user_result(result, color),
+        opening=headers.get("Opening", headers.get("ECO", "Unknown opening")),
+        time_control=headers.get("TimeControl", "?"),
+        move_count=len(sans),
+        moves=_number_moves(sans),
+        opponent=black if color == "White" else white,
+        url=headers.get("Site", ""),
+        played_at=_played_at(headers),
+    )
+
+
+def _parse_ndjson_game(data: dict, username: str, annotations: bool = False) -> GameRecord:
+    """
+    Convert one game object from Lichess's ndjson export into the pipeline's
+    game record. Lichess has already validated the moves, so the SAN list is
+    numbered directly without replaying it on a board.
+    With `annotations`, the export's "analysis" and "clocks" (centiseconds)
+    arrays become the game's evals and clocks.
     """
-    Parse a multi-game PGN string and return a list of structured game dicts.
-    Each dict contains the metadata and full move list needed for coaching analysis.
+    players = data.get("players", {})
+    white   = players.get("white", {}).get("user", {}).get("name", "")
+    black   = players.get("black", {}).get("user", {}).get("name", "")
+    color   = "White" if white.lower() == username.lower() else "Black"
+
+    winner = data.get("winner")
+    if winner:
+        result = "1-0" if winner == "white" else "0-1"
+    elif data.get("status") in ("created", "started", "aborted", "noStart"):
+        result = "*"
+    else:
+        result = "1/2-1/2"   # finished without a winner
+
+    clock = data.get("clock")
+    if clock:
+        time_control = f"{clock.get('initial', 0)}+{clock.get('increment', 0)}"
+    elif data.get("daysPerTurn"):
+        time_control = f"1/{data['daysPerTurn'] * 86400}"
+    else:
+        time_control = "-"
+
+    opening = data.get("opening", {})
+    sans    = data.get("moves", "").split()
+
+    game = GameRecord(
+        color=color,
+        result=_user_result(result, color),
+        opening=opening.get("name", opening.get("eco", "Unknown opening")),
+        time_control=time_control,
+        move_count=len(sans),
+        moves=_number_moves(sans),
+        opponent=black if color == "White" else white,
+        url=f"https://lichess.org/{data.get('id', '')}",
+        played_at=data.get("createdAt", 0),
+    )
+    if annotations:
+        evals = [
+            entry.get("eval") if "mate" not in entry
+            else (fast_pgn.MATE_CP if entry["mate"] > 0 else -fast_pgn.MATE_CP)
+            for entry in data.get("analysis", [])
+        ]
+        clocks = [round(cs / 100, 1) for cs in data.get("clocks", [])]
+        game_annotations.attach(game, evals, clocks)
+    return game
+
+
+def iter_games(
+    pgn_io: io.TextIOBase,
+    username: str,
+    replay: bool = False,
+    annotations: bool = False,
+) -> Iterator[GameRecord]:
+    """
+    Lazily parse games from a text stream of multi-game PGN, yielding one
+    game record at a time.
+    By default the SAN movetext is read straight from the (already validated)
+    export via fast_pgn; `replay=True` replays every move on a board instead.
+    `annotations` keeps each move's [%eval]/[%clk] (see game_annotations).
     """
-    games = []
-    pgn_io = io.StringIO(pgn_text)
+    if not replay:
+        if annotations:
+            for headers, sans, evals, clocks in fast_pgn.iter_annotated_games(pgn_io):
+                yield game_annotations.attach(_parse_game(headers, sans, username), evals, clocks)
+        else:
+            for headers, sans in fast_pgn.iter_games(pgn_io):
+                yield _parse_game(headers, sans, username)
+        return
 
+    import chess.pgn
     while True:
         game = chess.pgn.read_game(pgn_io)
         if game is None:
-            break
+            return
+        parsed = _parse_game(game.headers, replay_sans(game), username)
+        if annotations:
+            game_annotations.attach(parsed, *replay_annotations(game))
+        yield parsed
+
+
+def parse_games(
+    pgn_text: str,
+    username: str,
+    replay: bool = False,
+    annotations: bool = False,
+    columnar: bool = False,
+) -> list[GameRecord]:
+    """
+    Parse a multi-game PGN string and return a list of game records.
+    Each record holds the metadata and full move list needed for coaching analysis.
+    `columnar=True` returns a GameTable instead, for bulk sets.
+    """
+    games = iter_games(io.StringIO(pgn_text), username, replay, annotations)
+    return GameTable(games) if columnar else list(games)
+
+
+def parse_games_parallel(
+    pgn_text: str,
+    username: str,
+    replay: bool = False,
+    workers: Optional[int] = None,
+    annotations: bool = False,
+    columnar: bool = False,
+) -> list[GameRecord]:
+    """
+    Same result as `parse_games`, but a large PGN is split on game boundaries
+    and parsed across up to `workers` processes (default: one per core).
+    Small inputs are parsed in-process.
+    """
+    games = parallel_parse.parse_in_chunks(
+        partial(parse_games, username=username, replay=replay, annotations=annotations),
+        fast_pgn.split_games(pgn_text),
+        replay,
+        workers,
+        join="\n\n".join,
+    )
+    return GameTable(games) if columnar else games
 
-        headers = game.headers
-        white   = headers.get("White", "")
-        black   = headers.get("Black", "")
-        result  = headers.get("Result", "*")
 
-        # Determine which colour the target user played
-        if white.lower() == username.lower():
-            color       = "White"
-            user_result = {"1-0": "Win", "0-1": "Loss", "1/2-1/2": "Draw"}.get(result, "?")
-        else:
-            color       = "Black"
-            user_result = {"1-0": "Loss", "0-1": "Win", "1/2-1/2": "Draw"}.get(result, "?")
-
-        # Build the move list in standard numbered notation
-        board      = game.board()
-        sans: list[str] = []
-        for move in game.mainline_moves():
-            sans.append(board.san(move))
-            board.push(move)
-
-        pairs: list[str] = []
-        for i in range(0, len(sans), 2):
-            n = i // 2 + 1
-            pairs.append(f"{n}.{sans[i]} {sans[i + 1]}" if i + 1 < len(sans) else f"{n}.{sans[i]}")
-
-        games.append({
-            "color":        color,
-            "result":       user_result,
-            "opening":      headers.get("Opening", headers.get("ECO", "Unknown opening")),
-            "time_control": headers.get("TimeControl", "?"),
-            "move_count":   len(sans),
-            "moves":        " ".join(pairs),
-            "opponent":     black if color == "White" else white,
-            "url":          headers.get("Site", ""),
-        })
+# ── Local store ───────────────────────────────────────────────────────────────
 
-    return games
+def sync_games(
+    store: GameStore,
+    username: str,
+    max_games: int,
+    perf_type: Optional[str] = None,
+    annotations: bool = False,
+) -> list[GameRecord]:
+    """
+    Bring the local game store up to date and return the last `max_games`
+    games from it, most recent first.
+    A scope that has already been backfilled to `max_games` only downloads
+    games started after its newest stored game (Lichess's `since` filter);
+    otherwise the last `max_games` are fetched and merged in. Annotated syncs
+    keep their own sync state, so games stored bare gain evals and clocks.
+    """
+    scope = sync_scope(perf_type, annotations)
+    depth, high_water = store.sync_state("lichess", username, scope)
+    since = high_water + 1 if depth >= max_games and high_water else None
 
+    games = list(
+        stream_games(username, max_games, perf_type, since=since, annotations=annotations)
+    )
+    store.add_games("lichess", username, games)
+    store.record_sync("lichess", username, scope, max_games, games)
+    return store.load_games(
+        "lichess", username, perf_type, limit=max_games, annotations=annotations
+    )
 
-# ── Formatting ────────────────────────────────────────────────────────────────
 
-def format_for_claude(games: list[dict], username: str) -> str:
+def collect_file_games(
+    path: str,
+    username: str,
+    max_games: int,
+    perf_type: Optional[str] = None,
+    annotations: bool = False,
+) -> list[GameRecord]:
     """
-    Render the parsed game list as a compact text block to include in the
-    Claude user message.
+    Read `username`'s last `max_games` games from a large local PGN file (e.g.
+    a Lichess database dump) through its offset index — see pgn_index. Only
+    the player's games are decoded and parsed.
+    Raises OSError for an unreadable file and ValueError if there are no games.
     """
-    lines = [
-        f"Player: {username}",
-        f"Games provided: {len(games)}",
-        "",
-    ]
-
-    for i, g in enumerate(games, 1):
-        lines.append(
-            f"Game {i:>2} | {g['color']:5} | {g['result']:4} | "
-            f"Moves: {g['move_count']:>3} | TC: {g['time_control']:>8} | "
-            f"Opening: {g['opening']} | URL: {g['url']}"
-        )
-        lines.append(f"         {g['moves']}")
-        lines.append("")
-
-    return "\n".join(lines)
+    with timing.span("games", platform="file") as span:
+        with PgnIndex(path) as index:
+            pgn_text = index.user_pgn(username, max_games, perf_type)
+        games = parse_games(pgn_text, username, annotations=annotations)
+        span["games"] = len(games)
+    if not games:
+        raise ValueError(f"No games found for '{username}' in {path}.")
+    return games
 
 
 # ── Analysis ──────────────────────────────────────────────────────────────────
 
-def analyse(username: str, game_data: str) -> str:
-    """Stream the coaching analysis from Claude to stdout and return the full text."""
-    client = anthropic.Anthropic()
-
-    user_message = (
+def build_user_message(username: str, game_data: str) -> str:
+    """The analyst's user message for a rendered game block."""
+    return (
         f"Please analyse these games and identify the top 3 recurring patterns "
         f"or weaknesses for {username}:\n\n{game_data}"
     )
 
-    print("\n" + "=" * 60)
-    print(f" Chess Coach Analysis — {username}")
-    print("=" * 60 + "\n")
 
-    chunks: list[str] = []
-    with client.messages.stream(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=2048,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_message}],
-    ) as stream:
-        for text in stream.text_stream:
-            print(text, end="", flush=True)
-            chunks.append(text)
+def analyse(username: str, game_data: str, echo: bool = True) -> str:
+    """
+    Stream the coaching analysis from Claude to stdout and return the full text.
+    With `echo=False` nothing is printed (used when several runs share stdout).
+    Only the system prompt carries a prompt-cache breakpoint. The game block
+    does not: with a fixed number of games each new game pushes out Game 1,
+    so its prefix would not repeat, and an identical rerun is answered by the
+    response cache without an API call.
+    """
+    user_message = build_user_message(username, game_data)
+
+    if echo:
+        print("\n" + "=" * 60)
+        print(f" Chess Coach Analysis — {username}")
+        print("=" * 60 + "\n")
+
+    with timing.span("analyst"):
+        analysis = llm.stream_reply(SYSTEM_PROMPT, user_message, echo=echo)
 
-    print("\n\n" + "=" * 60)
-    return "".join(chunks)
+    if echo:
+        print("\n\n" + "=" * 60)
+    return analysis
 
 
-def run(username: str, max_games: int, perf_type: Optional[str] = None) -> str:
+def collect_games(
+    username: str,
+    max_games: int,
+    perf_type: Optional[str] = None,
+    store: Optional[GameStore] = None,
+    annotations: bool = False,
+) -> list[GameRecord]:
     """
-    Full analyst pipeline — fetch, parse, analyse.
-    Returns the analysis text. Raises on network or API errors.
+    Fetch and parse the games to analyse — synced through `store` when given.
+    `annotations` keeps the export's evals and clocks (see game_annotations).
+    Identical calls made while one is running share its download (see
+    single_flight); each caller gets its own copies of the game records, so
+    later stages may annotate them in place. Raises ValueError if there are none.
     """
-    pgn_text = fetch_games(username, max_games, perf_type)
-    games = parse_games(pgn_text, username)
+    key   = ("lichess", username.lower(), max_games, perf_type, store, annotations)
+    games = _fetches.do(key, _collect_games, username, max_games, perf_type, store, annotations)
+    return [GameRecord.from_dict(g) for g in games]
+
+
+def _collect_games(
+    username: str,
+    max_games: int,
+    perf_type: Optional[str],
+    store: Optional[GameStore],
+    annotations: bool,
+) -> list[GameRecord]:
+    with timing.span("games", platform="lichess") as span:
+        if store is not None:
+            games = sync_games(store, username, max_games, perf_type, annotations)
+        else:
+            games = list(stream_games(username, max_games, perf_type, annotations=annotations))
+        span["games"] = len(games)
     if not games:
         raise ValueError(f"No games found for '{username}'.")
+    return games
+
+
+def run(
+    username: str,
+    max_games: int,
+    perf_type: Optional[str] = None,
+    store: Optional[GameStore] = None,
+) -> str:
+    """
+    Full analyst pipeline — fetch, parse, analyse.
+    With a `store`, only games not already stored locally are downloaded.
+    Returns the analysis text. Raises on network or API errors.
+    """
+    games = collect_games(username, max_games, perf_type, store)
     return analyse(username, format_for_claude(games, username))
 
 
@@ -257,14 +603,31 @@ def main() -> None:
         metavar="TYPE",
         help="Filter by game type: Bullet, Blitz, Rapid, or Classical",
     )
+    parser.add_argument(
+        "--format",
+        choices=["pgn", "ndjson"],
+        default="pgn",
+        help="Lichess export format to stream and parse (default: pgn)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call Claude, ignoring cached responses",
+    )
     args = parser.parse_args()
+    load_dotenv()
+
+    if args.no_cache:
+        llm.response_cache.enabled = False
 
-    # ── Fetch ─────────────────────────────────────────────────
+    # ── Fetch + parse (streamed) ──────────────────────────────
     perf_type = args.type.lower() if args.type else None
     type_label = f" {args.type}" if args.type else ""
+    import requests
+
     print(f"Fetching last {args.games}{type_label} games for '{args.username}' from Lichess...")
     try:
-        pgn_text = fetch_games(args.username, args.games, perf_type)
+        games = list(stream_games(args.username, args.games, perf_type, fmt=args.format))
     except requests.HTTPError as e:
         status = e.response.status_code
         if status == 404:
@@ -276,8 +639,6 @@ def main() -> None:
         print(f"Network error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # ── Parse ─────────────────────────────────────────────────
-    games = parse_games(pgn_text, args.username)
     if not games:
         print(f"No games found for '{args.username}'.", file=sys.stderr)
         sys.exit(1)
@@ -288,18 +649,11 @@ def main() -> None:
     # ── Analyse ───────────────────────────────────────────────
     try:
         analyse(args.username, game_data)
-    except anthropic.AuthenticationError:
-        print(
-            "Error: invalid or missing API key.\n"
-            "Add it to a .env file: ANTHROPIC_API_KEY=your-key-here",
-            file=sys.stderr,
-        )
-        sys.exit(1)
-    except anthropic.APIConnectionError:
-        print("Error: could not connect to the Anthropic API.", file=sys.stderr)
-        sys.exit(1)
-    except anthropic.APIStatusError as e:
-        print(f"Anthropic API error {e.status_code}: {e.message}", file=sys.stderr)
+    except Exception as e:
+        message = llm.api_error_message(e)
+        if message is None:
+            raise
+        print(message, file=sys.stderr)
         sys.exit(1)
 
 
@@ -0,0 +1,139 @@
+"""
+On-disk cache for Chess.com monthly game archives.
+
+Archives for closed months never change, so they are served straight from disk
+with no network call. The current month is stored together with its ETag and
+Last-Modified validators so it can be revalidated with a conditional request —
+a 304 costs one round trip and no download or JSON parsing.
+
+Entries are JSON files keyed by a hash of the archive URL. When the cache grows
+past `max_bytes`, the least recently used entries are evicted.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+CACHE_ROOT = Path(
+    os.environ.get("CHESS_COACH_CACHE_DIR", Path.home() / ".cache" / "chess-coach")
+)
+
+DEFAULT_CACHE_DIR = CACHE_ROOT / "archives"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024   # 200 MB
+
+
+def is_closed_month(url: str) -> bool:
+    """
+    True when the archive URL (…/games/YYYY/MM) refers to a month that has
+    already ended in UTC, i.e. its contents are final.
+    """
+    try:
+        year, month = (int(part) for part in url.rstrip("/").split("/")[-2:])
+    except ValueError:
+        return False
+    now = datetime.now(timezone.utc)
+    return (year, month) < (now.year, now.month)
+
+
+class ArchiveCache:
+    """URL-keyed store of archive game lists plus their HTTP validators."""
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.enabled   = enabled
+        self._lock     = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Return the cached entry for `url` — a dict with games, etag,
+        last_modified and closed — or None on a miss or when disabled.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(url)
+        try:
+            with path.open(encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.touch(url)
+        return entry
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as recently used so eviction keeps it."""
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+
+    def put(
+        self,
+        url: str,
+        games: list,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store an archive's games and validators, then enforce the size cap."""
+        if not self.enabled:
+            return
+        entry = {
+            "url":           url,
+            "closed":        is_closed_month(url),
+            "etag":          etag,
+            "last_modified": last_modified,
+            "games":         games,
+        }
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            os.replace(tmp, self._path(url))
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits max_bytes."""
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """Remove every cached archive. Returns the number of entries deleted."""
+        removed = 0
+        with self._lock:
+            for path in self.directory.glob("*.json"):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Batch Chess Coach — generates reports for a whole roster of players in one run.
+
+Each job goes through the same stages as main.py (ratings + games, analyst,
+coach, save), but jobs run concurrently: network fetches and LLM calls for
+different players overlap, each capped by its own concurrency limit. A failure
+in one job is reported and does not stop the others.
+
+The jobs file has one player per line — username, platform, optional type —
+separated by whitespace or commas. Blank lines and # comments are ignored:
+
+    # username        platform    type
+    ArunRamalingam    lichess     Blitz
+    magnus            chess.com   Rapid
+    hikaru            chess.com
+
+With --message-batches the Claude calls go through the Message Batches API
+instead (see message_batches.py): slower to finish but cheaper, suited to
+overnight runs, and resumable from a state file if interrupted.
+
+Usage:
+    python batch.py students.txt
+    python batch.py students.txt --games 30 --fetch-workers 8 --llm-workers 3
+    python batch.py students.txt --message-batches
+"""
+
+import sys
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+import analyst
+import chess_com as chess_com_module
+import coach
+from game_store import GameStore
+from main import save_report
+
+_VALID_TYPES = {
+    "lichess":   ["Bullet", "Blitz", "Rapid", "Classical"],
+    "chess.com": ["Bullet", "Blitz", "Rapid", "Daily"],
+}
+_MAX_THREADS = 64
+
+
+class Job(NamedTuple):
+    username: str
+    platform: str
+    type:     Optional[str] = None
+
+
+class JobResult(NamedTuple):
+    job:    Job
+    path:   Optional[Path]
+    error:  Optional[str]
+
+
+# ── Jobs file ─────────────────────────────────────────────────────────────────
+
+def parse_jobs(text: str) -> list[Job]:
+    """Parse a jobs file. Raises ValueError naming the first invalid line."""
+    jobs = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        fields = line.split("#", 1)[0].replace(",", " ").split()
+        if not fields:
+            continue
+        if len(fields) not in (2, 3):
+            raise ValueError(f"line {lineno}: expected 'username platform [type]'")
+        username, platform = fields[0], fields[1].lower()
+        job_type = fields[2].capitalize() if len(fields) == 3 else None
+        if platform not in _VALID_TYPES:
+            raise ValueError(f"line {lineno}: unknown platform '{fields[1]}'")
+        if job_type and job_type not in _VALID_TYPES[platform]:
+            raise ValueError(
+                f"line {lineno}: type '{fields[2]}' is not valid for {platform} "
+                f"({', '.join(_VALID_TYPES[platform])})"
+            )
+        jobs.append(Job(username, platform, job_type))
+    return jobs
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+
+def _log(job: Job, message: str) -> None:
+    print(f"[{job.username} @ {job.platform}] {message}", flush=True)
+
+
+def fetch_inputs(job: Job, max_games: int, store: Optional[GameStore]) -> tuple:
+    """
+    Fetch a job's ratings and games and render the game block.
+    Returns (ratings, number of games, game_data). A ratings failure other
+    than 404 is tolerated with empty ratings, as in main.py.
+    """
+    import requests
+
+    platform_mod = analyst if job.platform == "lichess" else chess_com_module
+    time_class   = job.type.lower() if job.type else None
+
+    try:
+        ratings = platform_mod.fetch_user_ratings(job.username)
+    except requests.HTTPError as e:
+        if e.response.status_code == 404:
+            raise
+        ratings = {}
+    except requests.RequestException:
+        ratings = {}
+
+    if job.platform == "lichess":
+        games = analyst.collect_games(job.username, max_games, time_class, store)
+    else:
+        games = chess_com_module.collect_games(
+            job.username, time_class, max_games=max_games, store=store
+        )
+    return ratings, len(games), platform_mod.format_for_claude(games, job.username)
+
+
+def prefetch_ratings(jobs: list[Job]) -> None:
+    """
+    Look up every player's ratings in one bulk call per platform, so each
+    job's fetch_inputs finds them in the ratings cache instead of making its
+    own request. Players whose lookup failed are only reported: their jobs
+    fall back to a lookup of their own.
+    """
+    for platform, platform_mod in (("lichess", analyst), ("chess.com", chess_com_module)):
+        usernames = [job.username for job in jobs if job.platform == platform]
+        if not usernames:
+            continue
+        errors: dict = {}
+        found = platform_mod.fetch_ratings(usernames, errors)
+        print(f"Looked up ratings for {len(found)}/{len(usernames)} {platform} players.")
+        if errors:
+            print(
+                f"Bulk {platform} ratings lookup failed for {len(errors)} "
+                f"player{'s' if len(errors) != 1 else ''} ({next(iter(errors.values()))}); "
+                f"looking them up one by one."
+            )
+
+
+def save_job_report(job: Job, ratings: dict, analysis: str, plan: str) -> Path:
+    """Write one job's report via main.save_report."""
+    platform_mod = analyst if job.platform == "lichess" else chess_com_module
+    return save_report(
+        job.username, job.platform, job.type or "all time controls", ratings,
+        platform_mod.PERF_TYPES, analysis, plan,
+    )
+
+
+def run_job(
+    job: Job,
+    max_games: int,
+    store: Optional[GameStore],
+    fetch_slots: threading.Semaphore,
+    llm_slots: threading.Semaphore,
+) -> Path:
+    """Run one job through fetch → analyse → plan → save. Raises on failure."""
+    with fetch_slots:
+        _log(job, "fetching ratings and games...")
+        ratings, n_games, game_data = fetch_inputs(job, max_games, store)
+
+    with llm_slots:
+        _log(job, f"analysing {n_games} games...")
+        analysis = analyst.analyse(job.username, game_data, echo=False)
+    with llm_slots:
+        _log(job, "writing training plan...")
+        time_control = job.type or "all time controls"
+        plan = coach.produce_plan(job.username, time_control, analysis, echo=False)
+
+    return save_job_report(job, ratings, analysis, plan)
+
+
+def run_batch(
+    jobs: list[Job],
+    max_games: int = 20,
+    fetch_workers: int = 4,
+    llm_workers: int = 2,
+    store: Optional[GameStore] = None,
+) -> list[JobResult]:
+    """
+    Run every job concurrently, with at most `fetch_workers` jobs downloading
+    and `llm_workers` jobs talking to Claude at any moment.
+    Returns one JobResult per job, in input order.
+    """
+    import requests
+
+    fetch_slots = threading.Semaphore(fetch_workers)
+    llm_slots   = threading.Semaphore(llm_workers)
+
+    def attempt(job: Job) -> JobResult:
+        try:
+            path = run_job(job, max_games, store, fetch_slots, llm_slots)
+        except requests.HTTPError as e:
+            status = e.response.status_code
+            error  = "user not found" if status == 404 else f"HTTP {status}"
+        except Exception as e:   # isolate per-job failures
+            error = f"{type(e).__name__}: {e}"
+        else:
+            _log(job, f"report saved to {path}")
+            return JobResult(job, path, None)
+        _log(job, f"failed — {error}")
+        return JobResult(job, None, error)
+
+    threads = max(1, min(len(jobs), _MAX_THREADS))
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(attempt, jobs))
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate chess coach reports for a list of players concurrently.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Examples:\n"
+            "  python batch.py students.txt\n"
+            "  python batch.py students.txt --games 30 --fetch-workers 8 --llm-workers 3\n"
+            "  python batch.py students.txt --message-batches --poll-interval 300"
+        ),
+    )
+    parser.add_argument("jobs", type=Path, help="Jobs file: 'username platform [type]' per line")
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Number of recent games to fetch per player (default: 20)",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Maximum players downloading games at once (default: 4)",
+    )
+    parser.add_argument(
+        "--llm-workers",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Maximum concurrent Claude requests (default: 2)",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Re-download every game instead of syncing the local game store",
+    )
+    parser.add_argument(
+        "--message-batches",
+        action="store_true",
+        help="Send Claude requests through the Message Batches API (cheaper, not interactive)",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        metavar="PATH",
+        help="Resume file for --message-batches (default: <jobs file>.state.json)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=60,
+        metavar="SECONDS",
+        help="Seconds between batch status checks with --message-batches (default: 60)",
+    )
+    args = parser.parse_args()
+
+    try:
+        jobs = parse_jobs(args.jobs.read_text(encoding="utf-8"))
+    except OSError as e:
+        parser.error(f"cannot read jobs file: {e}")
+    except ValueError as e:
+        parser.error(f"{args.jobs}: {e}")
+    if not jobs:
+        parser.error(f"{args.jobs}: no jobs found")
+    if args.fetch_workers < 1 or args.llm_workers < 1:
+        parser.error("--fetch-workers and --llm-workers must be at least 1")
+
+    load_dotenv()
+    store = None if args.no_store else GameStore()
+    print(f"Running {len(jobs)} job{'s' if len(jobs) != 1 else ''}...")
+    prefetch_ratings(jobs)
+    if args.message_batches:
+        # Imported here: message_batches builds on this module's pipeline helpers
+        from message_batches import run_message_batches
+
+        state_path = args.state or args.jobs.with_name(args.jobs.name + ".state.json")
+        try:
+            results = run_message_batches(
+                jobs, state_path, args.games, args.fetch_workers, store, args.poll_interval
+            )
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not any(r.error for r in results):
+            state_path.unlink(missing_ok=True)
+    else:
+        results = run_batch(jobs, args.games, args.fetch_workers, args.llm_workers, store)
+
+    failed = [r for r in results if r.error]
+    print("\n" + "=" * 60)
+    print(f" Batch complete — {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    print("=" * 60)
+    for r in results:
+        status = str(r.path) if r.path else f"FAILED ({r.error})"
+        print(f"  {r.job.username:<20} {r.job.platform:<10} {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Parsing benchmark — compares full board replay against the fast_pgn path.
+
+Generates a reproducible set of random legal games, renders them the way each
+platform serves them (Lichess multi-game PGN; Chess.com per-game JSON with
+[%clk] comments), then times `parse_games` with and without `replay`, and
+`parse_games_parallel` across a process pool.
+
+Usage:
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --games 5000 --workers 4
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import chess
+import chess.pgn
+
+import analyst
+import chess_com
+
+USERNAME = "benchuser"
+
+# Movetext that trips up a naive tokenizer, appended to the generated games so
+# the fast-vs-replay check covers it: a rest-of-line comment, a comment
+# spanning lines, nested variations, NAGs and annotation glyphs.
+EDGE_CASE_MOVETEXT = (
+    "1. e4 e5 ; a rest-of-line comment\n"
+    "2. Nf3 {a comment\nover two lines} Nc6 (2... d6 3. d4 (3. Bc4) exd4) 3. Bb5 $1 a6!?\n"
+    "4. Ba4 Nf6 *"
+)
+
+
+def random_game(rng: random.Random, max_plies: int = 100) -> chess.pgn.Game:
+    """Play random legal moves from the start position."""
+    board = chess.Board()
+    for _ in range(rng.randint(20, max_plies)):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(rng.choice(moves))
+    return chess.pgn.Game.from_board(board)
+
+
+def make_lichess_pgn(n: int, seed: int = 1) -> str:
+    """Multi-game PGN in the shape of Lichess's export."""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(n):
+        game = random_game(rng)
+        white, black = (USERNAME, f"opp{i}") if i % 2 == 0 else (f"opp{i}", USERNAME)
+        game.headers.update({
+            "Event":       "Rated Blitz game",
+            "Site":        f"https://lichess.org/g{i:07d}",
+            "White":       white,
+            "Black":       black,
+            "UTCDate":     "2026.01.01",
+            "UTCTime":     "12:00:00",
+            "TimeControl": "300+0",
+            "Opening":     "Random Opening",
+        })
+        chunks.append(str(game))
+    chunks.append(
+        f'[Event "Rated Blitz game"]\n[Site "https://lichess.org/edgecase"]\n'
+        f'[White "{USERNAME}"]\n[Black "opp"]\n[Result "*"]\n\n{EDGE_CASE_MOVETEXT}'
+    )
+    return "\n\n".join(chunks) + "\n\n"
+
+
+def make_chess_com_games(n: int, seed: int = 2) -> list:
+    """Chess.com archive game objects with [%clk] comments in the PGN."""
+    rng = random.Random(seed)
+    games = []
+    for i in range(n):
+        game = random_game(rng)
+        for ply, node in enumerate(game.mainline()):
+            node.comment = f"[%clk 0:{4 - ply // 60 % 5}:{59 - ply % 60:02d}.9]"
+        white, black = (USERNAME, f"opp{i}") if i % 2 == 0 else (f"opp{i}", USERNAME)
+        game.headers.update({"White": white, "Black": black})
+        games.append({
+            "url":          f"https://www.chess.com/game/live/{i}",
+            "pgn":          str(game),
+            "time_control": "300",
+            "time_class":   "blitz",
+            "end_time":     1767225600 + i,
+            "white":        {"username": white, "result": "win"},
+            "black":        {"username": black, "result": "resigned"},
+        })
+    games.append(dict(
+        games[-1],
+        url="https://www.chess.com/game/live/edgecase",
+        pgn=f'[White "{USERNAME}"]\n[Black "opp"]\n\n{EDGE_CASE_MOVETEXT}',
+    ))
+    return games
+
+
+def timed(fn, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PGN parsing throughput.")
+    parser.add_argument("--games", type=int, default=2000, metavar="N",
+                        help="Number of games per platform (default: 2000)")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="Worker processes for the parallel rows (default: one per core)")
+    args = parser.parse_args()
+
+    print(f"Generating {args.games} games per platform...")
+    lichess_pgn = make_lichess_pgn(args.games)
+    chess_com_games = make_chess_com_games(args.games)
+
+    cases = [
+        ("lichess",   lambda replay: analyst.parse_games(lichess_pgn, USERNAME, replay=replay)),
+        ("chess.com", lambda replay: chess_com.parse_games(chess_com_games, USERNAME, replay=replay)),
+    ]
+    parallel_cases = [
+        ("lichess",   lambda replay: analyst.parse_games_parallel(
+            lichess_pgn, USERNAME, replay=replay, workers=args.workers)),
+        ("chess.com", lambda replay: chess_com.parse_games_parallel(
+            chess_com_games, USERNAME, replay=replay, workers=args.workers)),
+    ]
+
+    print(f"\n{'platform':<10} {'replay g/s':>12} {'fast g/s':>12} {'speedup':>9}")
+    for name, parse in cases:
+        slow, slow_t = timed(parse, True)
+        fast, fast_t = timed(parse, False)
+        if [g["moves"] for g in slow] != [g["moves"] for g in fast]:
+            sys.exit(f"error: {name} fast path produced different move lists")
+        slow_rate, fast_rate = len(slow) / slow_t, len(fast) / fast_t
+        print(f"{name:<10} {slow_rate:>12,.0f} {fast_rate:>12,.0f} {fast_rate / slow_rate:>8.1f}x")
+
+    print(f"\n{'parallel':<10} {'replay g/s':>12} {'fast g/s':>12}")
+    for name, parse in parallel_cases:
+        slow, slow_t = timed(parse, True)
+        fast, fast_t = timed(parse, False)
+        print(f"{name:<10} {len(slow) / slow_t:>12,.0f} {len(fast) / fast_t:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
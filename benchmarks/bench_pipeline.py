@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark — the whole report path, offline, with machine-readable results.
+
+Recorded fixtures (a Lichess PGN export, Chess.com archive JSON and profile
+JSON) are replayed by a local HTTP stand-in for both platforms, and Claude is
+answered by the streaming stand-in from stand_in.py. Fixtures are generated
+deterministically on first use and kept in `--fixtures`, so every run reads
+the same bytes.
+
+Before measuring, the features rendered by the format stage are checked on a
+few known games; a wrong result stops the benchmark.
+
+For each workload size it measures:
+    parse.*     games/sec of analyst.parse_games and chess_com.parse_games
+    format      games/sec of format_for_claude (features included)
+    ingest.*    bytes/sec and games/sec of analyst.stream_games and
+                chess_com.fetch_games through the local HTTP stand-in
+    end_to_end  wall time of main.main (fetch → analyst → coach → report)
+and the peak traced Python memory of each stage, measured in a separate
+pass under tracemalloc so it does not skew the timings.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 20 --json results.json
+    python benchmarks/bench_pipeline.py --sizes 20,10000 --no-memory
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Keep caches and the game store out of the user's real cache directory
+os.environ["CHESS_COACH_CACHE_DIR"] = tempfile.mkdtemp(prefix="chess-coach-bench-")
+
+import fast_pgn
+from bench_parse import USERNAME, make_chess_com_games, make_lichess_pgn
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures"
+DEFAULT_SIZES    = "20,10000"
+ARCHIVE_SIZE     = 2500   # Chess.com games per monthly archive fixture
+
+_PROFILE = {
+    "lichess": {
+        "username": USERNAME,
+        "perfs": {
+            "bullet": {"rating": 1500, "games": 120, "prog": 12},
+            "blitz":  {"rating": 1620, "games": 800, "prog": -8},
+        },
+    },
+    "chess.com": {
+        "chess_blitz": {"last": {"rating": 1580}, "record": {"win": 300, "loss": 280, "draw": 20}},
+    },
+}
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+
+class Fixtures:
+    """One workload's recorded exports, loaded from (or first written to) disk."""
+
+    def __init__(self, directory: Path, n: int):
+        directory.mkdir(parents=True, exist_ok=True)
+        pgn_path  = directory / f"lichess-{n}.pgn"
+        json_path = directory / f"chess_com-{n}.json"
+        if not pgn_path.exists():
+            pgn_path.write_text(make_lichess_pgn(n), encoding="utf-8")
+        if not json_path.exists():
+            json_path.write_text(json.dumps(make_chess_com_games(n)), encoding="utf-8")
+
+        self.n             = n
+        self.lichess_pgn   = pgn_path.read_text(encoding="utf-8")
+        self.lichess_games = [g + "\n\n" for g in fast_pgn.split_games(self.lichess_pgn)]
+        self.chess_com     = json.loads(json_path.read_text(encoding="utf-8"))
+
+        # Monthly archives, oldest-first like Chess.com's, the newest being 2026/01
+        games  = sorted(self.chess_com, key=lambda g: g["end_time"])
+        chunks = [games[i:i + ARCHIVE_SIZE] for i in range(0, len(games), ARCHIVE_SIZE)]
+        self.archives = {}
+        for months_back, chunk in enumerate(reversed(chunks)):
+            year, month = divmod(2026 * 12 - months_back, 12)
+            self.archives[f"{year}/{month + 1:02d}"] = chunk
+
+
+class PlatformStandIn(BaseHTTPRequestHandler):
+    """Serves the recorded fixtures at Lichess- and Chess.com-shaped paths."""
+
+    fixtures: Fixtures
+    bytes_served = 0
+    _lock = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with PlatformStandIn._lock:
+            PlatformStandIn.bytes_served += len(body)
+
+    def do_GET(self) -> None:
+        url   = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        base  = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+
+        if parts[:3] == ["lichess", "games", "user"]:
+            limit = int(parse_qs(url.query).get("max", [self.fixtures.n])[0])
+            body  = "".join(self.fixtures.lichess_games[:limit]).encode()
+            return self._send(body, "application/x-chess-pgn")
+        if parts[:2] == ["lichess", "user"]:
+            return self._send(json.dumps(_PROFILE["lichess"]).encode(), "application/json")
+        if parts[:2] == ["chesscom", "player"] and parts[3:] == ["stats"]:
+            return self._send(json.dumps(_PROFILE["chess.com"]).encode(), "application/json")
+        if parts[:2] == ["chesscom", "player"] and parts[3:] == ["games", "archives"]:
+            urls = [f"{base}/chesscom/player/{parts[2]}/games/{m}" for m in sorted(self.fixtures.archives)]
+            return self._send(json.dumps({"archives": urls}).encode(), "application/json")
+        if parts[:2] == ["chesscom", "player"] and parts[3:4] == ["games"] and len(parts) == 6:
+            games = self.fixtures.archives.get(f"{parts[4]}/{parts[5]}", [])
+            return self._send(json.dumps({"games": games}).encode(), "application/json")
+        self.send_error(404)
+
+
+def _start(server: ThreadingHTTPServer) -> str:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+# ── Feature check ─────────────────────────────────────────────────────────────
+
+# (moves, player's colour, expected "drop" field of the feature line)
+_DROP_CASES = [
+    ("1.e4 e5 2.Nf3 Nc6 3.Bb5 a6 4.Bxc6 dxc6 5.O-O f6", "White", "drop none"),  # even trade
+    ("1.e4 e5 2.Nf3 Nc6 3.Bb5 a6 4.Bxc6 dxc6 5.O-O f6", "Black", "drop none"),  # opponent takes first
+    ("1.e4 e5 2.Nf3 Nc6 3.Ng5 Qxg5 4.d4",               "White", "drop -3@3"),  # hung knight
+    ("1.e4 e5 2.Nf3 Qh4 3.Nxh4",                        "Black", "drop -9@2"),  # hung queen
+]
+
+
+def check_features() -> None:
+    """Exit with an error if game_features misreads a known trade or blunder."""
+    from game_features import extract_features
+
+    games = [{"moves": m, "color": c, "result": "Draw"} for m, c, _ in _DROP_CASES]
+    features = extract_features(games, USERNAME)
+    for i, (moves, colour, expected) in enumerate(_DROP_CASES):
+        line = features.game_line(i)
+        if not line.endswith(expected):
+            sys.exit(f"error: features for '{moves}' as {colour} end '{line}', expected '{expected}'")
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+def peak_memory(fn) -> float:
+    """Run `fn` again under tracemalloc and return its peak traced MiB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, memory: bool) -> tuple:
+    """Run `fn` and return (result, seconds, peak traced MiB or None)."""
+    start   = time.perf_counter()
+    result  = fn()
+    elapsed = time.perf_counter() - start
+    return result, elapsed, peak_memory(fn) if memory else None
+
+
+def run_workload(fixtures: Fixtures, memory: bool, output_dir: Path) -> list[dict]:
+    """Measure every stage for one fixture size; returns one row per stage."""
+    import analyst
+    import chess_com
+    import main as main_module
+
+    n    = fixtures.n
+    rows = []
+
+    def row(stage: str, seconds: float, peak, games: int, nbytes: int = 0) -> None:
+        entry = {
+            "workload":      n,
+            "stage":         stage,
+            "seconds":       round(seconds, 4),
+            "games":         games,
+            "games_per_sec": round(games / seconds, 1) if seconds else None,
+            "peak_mib":      None if peak is None else round(peak, 2),
+        }
+        if nbytes:
+            entry["bytes"]         = nbytes
+            entry["bytes_per_sec"] = round(nbytes / seconds) if seconds else None
+        rows.append(entry)
+
+    games, t, peak = measure(lambda: analyst.parse_games(fixtures.lichess_pgn, USERNAME), memory)
+    row("parse.lichess", t, peak, len(games))
+    cc_games, t, peak = measure(lambda: chess_com.parse_games(fixtures.chess_com, USERNAME), memory)
+    row("parse.chess_com", t, peak, len(cc_games))
+
+    def format_games() -> str:
+        with contextlib.redirect_stderr(io.StringIO()):   # token-budget notes
+            return analyst.format_for_claude(games, USERNAME, features=True)
+
+    _, t, peak = measure(format_games, memory)
+    row("format", t, peak, len(games))
+
+    def ingest(fetch) -> tuple:
+        before = PlatformStandIn.bytes_served
+        result, seconds, _ = measure(fetch, False)
+        nbytes = PlatformStandIn.bytes_served - before
+        return result, seconds, peak_memory(fetch) if memory else None, nbytes
+
+    streamed, t, peak, nbytes = ingest(lambda: list(analyst.stream_games(USERNAME, n)))
+    row("ingest.lichess", t, peak, len(streamed), nbytes)
+    fetched, t, peak, nbytes = ingest(lambda: chess_com.fetch_games(USERNAME, max_games=n))
+    row("ingest.chess_com", t, peak, len(fetched), nbytes)
+
+    argv = [
+        "main.py", USERNAME, "--games", str(n), "--no-store", "--no-cache",
+        "--output-dir", str(output_dir),
+    ]
+
+    def end_to_end() -> None:
+        saved = sys.argv
+        sys.argv = argv
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                main_module.main()
+        finally:
+            sys.argv = saved
+
+    _, t, peak = measure(end_to_end, memory)
+    row("end_to_end", t, peak, n)
+    return rows
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return ""
+    return out.stdout.strip()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the chess coach pipeline offline against recorded fixtures.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Examples:\n"
+            "  python benchmarks/bench_pipeline.py\n"
+            "  python benchmarks/bench_pipeline.py --sizes 20 --json results.json"
+        ),
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        metavar="N,N",
+        help=f"Comma-separated workload sizes in games (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=DEFAULT_FIXTURES,
+        metavar="DIR",
+        help="Directory of recorded fixtures; missing ones are generated (default: benchmarks/fixtures)",
+    )
+    parser.add_argument(
+        "--json",
+        type=Path,
+        metavar="PATH",
+        help="Also write the results as JSON to PATH ('-' for stdout)",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the tracemalloc pass, which is several times slower than the timed one",
+    )
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        parser.error("--sizes must be comma-separated integers")
+
+    import analyst
+    import chess_com
+    import llm
+    from stand_in import serve
+
+    check_features()
+
+    # Every measured run must do the real work, never replay from a cache
+    chess_com.archive_cache.enabled = False
+    chess_com.ratings_cache.enabled = False
+    analyst.ratings_cache.enabled   = False
+    llm.response_cache.enabled      = False
+
+    llm_server = serve(0, batch_delay=0)
+    os.environ["ANTHROPIC_BASE_URL"] = _start(llm_server)
+    os.environ.setdefault("ANTHROPIC_API_KEY", "stand-in")
+
+    platform_server = ThreadingHTTPServer(("127.0.0.1", 0), PlatformStandIn)
+    base = _start(platform_server)
+    analyst.LICHESS_API     = f"{base}/lichess"
+    chess_com.CHESS_COM_API = f"{base}/chesscom"
+
+    rows = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for n in sizes:
+            print(f"Workload: {n:,} games...", file=sys.stderr)
+            PlatformStandIn.fixtures = Fixtures(args.fixtures, n)
+            rows += run_workload(PlatformStandIn.fixtures, not args.no_memory, Path(output_dir))
+
+    platform_server.shutdown()
+    llm_server.shutdown()
+
+    print(f"\n{'workload':>8}  {'stage':<18} {'seconds':>9} {'games/s':>10} {'MB/s':>8} {'peak MiB':>9}")
+    for r in rows:
+        mbps = f"{r['bytes_per_sec'] / 1e6:.1f}" if r.get("bytes_per_sec") else "—"
+        peak = f"{r['peak_mib']:.1f}" if r["peak_mib"] is not None else "—"
+        print(
+            f"{r['workload']:>8,}  {r['stage']:<18} {r['seconds']:>9.3f} "
+            f"{r['games_per_sec'] or 0:>10,.0f} {mbps:>8} {peak:>9}"
+        )
+
+    if args.json:
+        import resource
+        report = {
+            "benchmark": "pipeline",
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit":    _git_commit(),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "cpus":      os.cpu_count(),
+            "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "results":   rows,
+        }
+        text = json.dumps(report, indent=2)
+        if str(args.json) == "-":
+            print(text)
+        else:
+            args.json.write_text(text + "\n", encoding="utf-8")
+            print(f"\nResults written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Game record memory benchmark — plain dicts vs GameRecord vs GameTable.
+
+Parses the recorded Lichess and Chess.com fixtures shared with
+bench_pipeline.py, stores each game as the JSON row the game store keeps, and
+measures the traced memory held by the same games loaded back in each form:
+
+    dict         json.loads per game — the representation before GameRecord
+    GameRecord   slotted records with interned categorical fields
+    GameTable    the columnar collection
+
+The first games of each form are also rendered with format_for_claude to
+check that all three produce the same text.
+
+Usage:
+    python benchmarks/bench_records.py
+    python benchmarks/bench_records.py --games 20000
+"""
+
+import io
+import sys
+import json
+import argparse
+import tracemalloc
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import DEFAULT_FIXTURES, Fixtures
+from bench_parse import USERNAME
+
+import analyst
+import chess_com
+from game_record import GameRecord, GameTable
+
+RENDER_CHECK = 200   # games rendered per form to compare the output
+
+
+def held_memory(build) -> tuple:
+    """Return (result of `build()`, traced bytes it still holds afterwards)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def render(games) -> str:
+    with contextlib.redirect_stderr(io.StringIO()):
+        return analyst.format_for_claude(games, USERNAME, token_budget=None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the memory of parsed games as dicts, GameRecords and a GameTable.",
+    )
+    parser.add_argument("--games", type=int, default=10_000, metavar="N",
+                        help="Games per platform (default: 10000)")
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES, metavar="DIR",
+                        help="Fixture directory shared with bench_pipeline.py")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(args.fixtures, args.games)
+    platforms = [
+        ("lichess",   analyst.parse_games(fixtures.lichess_pgn, USERNAME)),
+        ("chess.com", chess_com.parse_games(fixtures.chess_com, USERNAME)),
+    ]
+
+    print(f"\n{'platform':<10} {'form':<11} {'games':>7} {'MiB':>8} {'bytes/game':>11} {'saving':>7}")
+    for name, parsed in platforms:
+        rows = [json.dumps(dict(g), separators=(",", ":")) for g in parsed]
+        forms = [
+            ("dict",       lambda: [json.loads(r) for r in rows]),
+            ("GameRecord", lambda: [GameRecord.from_dict(json.loads(r)) for r in rows]),
+            ("GameTable",  lambda: GameTable(GameRecord.from_dict(json.loads(r)) for r in rows)),
+        ]
+        baseline = None
+        texts    = set()
+        for form, build in forms:
+            games, held = held_memory(build)
+            baseline = baseline or held
+            texts.add(render(games[:RENDER_CHECK]))
+            print(
+                f"{name:<10} {form:<11} {len(games):>7,} {held / 2**20:>8.1f} "
+                f"{held / len(games):>11,.0f} {1 - held / baseline:>7.0%}"
+            )
+            del games
+        if len(texts) != 1:
+            sys.exit(f"error: {name} renders differ between representations")
+
+
+if __name__ == "__main__":
+    main()
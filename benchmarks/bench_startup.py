@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark — how long short invocations take before doing any work.
+
+Each command is run in a fresh interpreter, as a shell or a forked batch
+worker would run it. For each one the benchmark reports:
+
+    wall     median wall time over --runs runs, interpreter start included
+    imports  total import time from `python -X importtime` (sum of self times)
+    heavy    which of the heavy third-party packages were imported at all
+
+The commands are module imports (what batch.py and other importers pay) and
+CLI paths that stop before any real work: --help, a rejected argument
+combination, and coach.py with nothing on stdin. None of them needs the
+Anthropic SDK, NumPy or python-chess.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20
+"""
+
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("anthropic", "numpy", "chess", "requests", "zstandard")
+
+COMMANDS = [
+    ("import main",              ["-c", "import main"]),
+    ("import analyst",           ["-c", "import analyst"]),
+    ("import chess_com",         ["-c", "import chess_com"]),
+    ("import coach",             ["-c", "import coach"]),
+    ("import batch",             ["-c", "import batch"]),
+    ("main.py --help",           ["main.py", "--help"]),
+    ("main.py (invalid args)",   ["main.py", "someone", "--month", "1"]),
+    ("coach.py (empty stdin)",   ["coach.py", "someone"]),
+]
+
+
+def run(args: list[str], importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, *args],
+        cwd=ROOT,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+
+
+def import_profile(args: list[str]) -> tuple[float, list[str]]:
+    """(total import seconds, heavy packages imported) for one command."""
+    total    = 0
+    packages = set()
+    for line in run(args, importtime=True).stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        packages.add(name.strip().split(".")[0])
+    return total / 1e6, [p for p in HEAVY if p in packages]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time interpreter startup and imports for short invocations.",
+    )
+    parser.add_argument("--runs", type=int, default=7, metavar="N",
+                        help="Runs per command; the median is reported (default: 7)")
+    args = parser.parse_args()
+
+    print(f"\n{'command':<26} {'wall ms':>8} {'imports ms':>11}  heavy packages imported")
+    for label, command in COMMANDS:
+        walls = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            run(command)
+            walls.append(time.perf_counter() - start)
+        imports, heavy = import_profile(command)
+        print(
+            f"{label:<26} {statistics.median(walls) * 1000:>8.0f} {imports * 1000:>11.0f}  "
+            f"{', '.join(heavy) or '—'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,19 +17,30 @@ import sys
 import io
 import time
 import argparse
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Sequence
 
-import requests
-import chess.pgn
-import anthropic
 from dotenv import load_dotenv
 
-from analyst import SYSTEM_PROMPT, analyse
-
-load_dotenv()
+import fast_pgn
+import game_annotations
+import http_client
+import llm
+import parallel_parse
+import timing
+from analyst import SYSTEM_PROMPT, analyse, replay_annotations, replay_sans
+from archive_cache import ArchiveCache, is_closed_month
+from game_format import format_for_claude   # re-exported for main.py and batch.py
+from game_record import GameRecord, GameTable
+from game_store import GameStore, sync_scope
+from ratings_cache import RatingsCache
+from single_flight import SingleFlight
 
 CHESS_COM_API = "https://api.chess.com/pub"
-USER_AGENT    = "chess-coach/1.0 (https://github.com/ar0000n/chess-coach)"
+
+_fetches = SingleFlight()   # game downloads in flight, by request
 
 PERF_TYPES = ["bullet", "blitz", "rapid", "daily"]
 
@@ -40,25 +51,17 @@ _RATING_KEY = {
     "daily":  "chess_daily",
 }
 
+# Chess.com's published-data API serves serial requests without limit but may
+# answer parallel ones with 429, so archive and stats fetches run through a
+# small worker pool gated by a shared token bucket.
+MAX_CONCURRENCY   = 3      # requests in flight at once
+REQUESTS_PER_SEC  = 4.0    # sustained request rate
 
-# ── Ratings ───────────────────────────────────────────────────────────────────
 
-def fetch_user_ratings(username: str) -> dict:
-    """
-    Fetch the user's current ratings from Chess.com for all standard time controls.
-    Returns a dict keyed by perf type (bullet/blitz/rapid/daily).
-    Each entry has: rating (None if unplayed), games, prog (always 0 — not in public API).
-    Raises requests.HTTPError on a bad response.
-    """
-    url = f"{CHESS_COM_API}/player/{username}/stats"
-    response = requests.get(
-        url,
-        headers={"User-Agent": USER_AGENT},
-        timeout=10,
-    )
-    response.raise_for_status()
-    data = response.json()
+# ── Ratings ───────────────────────────────────────────────────────────────────
 
+def _ratings_from_stats(data: dict) -> dict:
+    """A Chess.com stats object as the ratings dict for PERF_TYPES."""
     ratings = {}
     for key in PERF_TYPES:
         perf   = data.get(_RATING_KEY[key], {})
@@ -73,17 +76,152 @@ def fetch_user_ratings(username: str) -> dict:
     return ratings
 
 
+def fetch_user_ratings(username: str) -> dict:
+    """
+    Fetch the user's current ratings from Chess.com for all standard time controls.
+    Returns a dict keyed by perf type (bullet/blitz/rapid/daily).
+    Each entry has: rating (None if unplayed), games, prog (always 0 — not in public API).
+    Ratings looked up within the last few minutes come from `ratings_cache`.
+    Raises requests.HTTPError on a bad response.
+    """
+    cached = ratings_cache.get(username)
+    if cached is not None:
+        return cached
+    url = f"{CHESS_COM_API}/player/{username}/stats"
+    _limiter.acquire()
+    response = http_client.get(url, timeout=10, on_backoff=_limiter.pause)
+    response.raise_for_status()
+    ratings = _ratings_from_stats(response.json())
+    ratings_cache.put(username, ratings)
+    return ratings
+
+
+def fetch_ratings(usernames: Sequence[str], errors: Optional[dict] = None) -> dict[str, dict]:
+    """
+    Current ratings for many users at once, keyed by the usernames as given,
+    each in the shape fetch_user_ratings returns. Chess.com has no multi-user
+    endpoint, so uncached users are looked up concurrently, up to
+    MAX_CONCURRENCY at a time behind the token bucket archive downloads use.
+    Unknown usernames are left out of the result. So are users whose lookup
+    failed; the others are still returned, and each failure is recorded in
+    `errors` (username → exception) when a dict is passed.
+    """
+    import requests
+
+    found   = ratings_cache.get_many(usernames)
+    missing = list({u.lower(): u for u in usernames if u not in found}.values())
+
+    def lookup(username: str) -> tuple:
+        try:
+            return fetch_user_ratings(username), None
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None, None
+            return None, e
+        except requests.RequestException as e:
+            return None, e
+
+    fetched = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(missing))) as pool:
+            for username, (ratings, error) in zip(missing, pool.map(lookup, missing)):
+                if ratings is not None:
+                    fetched[username.lower()] = ratings
+                elif error is not None and errors is not None:
+                    errors[username] = error
+
+    for username in usernames:
+        if username not in found and username.lower() in fetched:
+            found[username] = fetched[username.lower()]
+    return found
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────────────
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket. `acquire()` blocks until a token is available;
+    `pause()` stalls every caller, used when the server answers 429.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate     = rate
+        self.capacity = capacity
+        self._tokens  = float(capacity)
+        self._stamp   = time.monotonic()
+        self._resume  = 0.0
+        self._lock    = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._resume:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                    self._stamp  = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._resume - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume = max(self._resume, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._stamp  = self._resume
+
+
+_limiter = _TokenBucket(REQUESTS_PER_SEC, MAX_CONCURRENCY)
+
+# Disable with `archive_cache.enabled = False` and `ratings_cache.enabled = False`
+# (the --no-cache CLI switch)
+archive_cache = ArchiveCache()
+ratings_cache = RatingsCache("chess.com")
+
+
 # ── Game fetching ─────────────────────────────────────────────────────────────
 
 def _fetch_archive(url: str) -> list:
-    """Fetch one monthly archive and return the raw game list."""
-    response = requests.get(
+    """
+    Fetch one monthly archive and return the raw game list.
+    Closed months are served from the on-disk archive cache without a request;
+    the current month is revalidated with If-None-Match / If-Modified-Since.
+    An entry cached before its month ended is revalidated once more, then
+    stored as closed.
+    Waits on the shared rate limiter, and pauses it for every worker while the
+    HTTP client backs off from a 429.
+    """
+    cached = archive_cache.get(url)
+    if cached and cached["closed"]:
+        return cached["games"]
+
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    _limiter.acquire()
+    response = http_client.get(url, headers=headers, timeout=30, on_backoff=_limiter.pause)
+
+    if response.status_code == 304 and cached:
+        if is_closed_month(url):
+            # Confirmed unchanged after its month ended: final from now on
+            archive_cache.put(url, cached["games"], cached.get("etag"), cached.get("last_modified"))
+        return cached["games"]
+    response.raise_for_status()
+    games = response.json().get("games", [])
+    archive_cache.put(
         url,
-        headers={"User-Agent": USER_AGENT},
-        timeout=30,
+        games,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
     )
-    response.raise_for_status()
-    return response.json().get("games", [])
+    return games
 
 
 def fetch_games(
@@ -92,24 +230,32 @@ def fetch_games(
     year: Optional[int] = None,
     month: Optional[int] = None,
     max_games: int = 20,
+    max_workers: int = MAX_CONCURRENCY,
+    since: Optional[int] = None,
 ) -> list:
     """
     Fetch games from Chess.com archives.
     - year + month: fetch that specific month only.
     - year only:    fetch each month of that year, most recent first.
     - neither:      work backwards through archives until max_games reached.
-    time.sleep(0.5) is applied between every archive request after the first.
-    Optionally filters by time_class (bullet/blitz/rapid/daily).
+    Archives are downloaded by up to `max_workers` threads behind a shared
+    token-bucket limiter, but consumed strictly newest-first. Only the newest
+    is requested at first; more go out only while those read fall short, and
+    none once max_games is covered.
+    Optionally filters by time_class (bullet/blitz/rapid/daily), and by
+    `since` (epoch ms): only games ending after it are returned, and the walk
+    stops at the first archive that reaches back past it.
     Returns up to max_games games, most recent first.
     Raises requests.HTTPError on a bad response.
     """
     if year and month:
         archive_urls = [f"{CHESS_COM_API}/player/{username}/games/{year}/{month:02d}"]
     else:
-        resp = requests.get(
+        _limiter.acquire()
+        resp = http_client.get(
             f"{CHESS_COM_API}/player/{username}/games/archives",
-            headers={"User-Agent": USER_AGENT},
             timeout=10,
+            on_backoff=_limiter.pause,
         )
         resp.raise_for_status()
         all_urls = resp.json().get("archives", [])
@@ -118,38 +264,83 @@ def fetch_games(
         archive_urls = list(reversed(all_urls))   # most recent first
 
     collected: list = []
-    for i, url in enumerate(archive_urls):
-        if i > 0:
-            time.sleep(0.5)
-        games = _fetch_archive(url)
-        # Each archive is oldest-first; reverse so newest is collected first
-        if time_class:
-            games = [g for g in games if g.get("time_class") == time_class.lower()]
-        collected.extend(reversed(games))
-        if len(collected) >= max_games:
-            break
+    workers = max(1, min(max_workers, len(archive_urls)))
+    fetch   = timing.in_span(_fetch_archive)   # attribute worker requests to this stage
+    pool    = ThreadPoolExecutor(max_workers=workers)
+    # Start with the newest archive alone and widen the window of archives in
+    # flight by one each time the ones consumed so far fall short, so a run
+    # served by the current month requests nothing else.
+    pending  = [pool.submit(fetch, archive_urls[0])] if archive_urls else []
+    next_idx = len(pending)
+    window   = 1
+    try:
+        while pending:
+            games = pending.pop(0).result()
+            # Each archive is oldest-first; reverse so newest is collected first
+            reached_since = False
+            if since is not None:
+                newer = [g for g in games if g.get("end_time", 0) * 1000 > since]
+                reached_since = len(newer) < len(games)
+                games = newer
+            if time_class:
+                games = [g for g in games if g.get("time_class") == time_class.lower()]
+            collected.extend(reversed(games))
+            if len(collected) >= max_games or reached_since:
+                break
+            window = min(window + 1, workers)
+            while len(pending) < window and next_idx < len(archive_urls):
+                pending.append(pool.submit(fetch, archive_urls[next_idx]))
+                next_idx += 1
+    finally:
+        # Archives still downloading are not needed; don't wait for them
+        pool.shutdown(wait=False, cancel_futures=True)
 
     return collected[:max_games]
 
 
 # ── PGN parsing ───────────────────────────────────────────────────────────────
 
-def parse_games(raw_games: list, username: str) -> list:
+def parse_games(
+    raw_games: list,
+    username: str,
+    replay: bool = False,
+    annotations: bool = False,
+    columnar: bool = False,
+) -> list:
     """
-    Convert Chess.com game JSON into the standard format used across the pipeline.
-    Uses python-chess to parse the embedded PGN for a clean, numbered move list.
+    Convert Chess.com game JSON into the game records used across the pipeline.
+    By default the embedded PGN's SAN movetext is tokenized directly (fast_pgn);
+    `replay=True` replays it with python-chess instead. `annotations` keeps
+    each move's [%clk] (see game_annotations). `columnar=True` returns a
+    GameTable instead of a list, for bulk sets.
     """
+    if replay:
+        import chess.pgn
     games = []
     for g in raw_games:
         pgn_text = g.get("pgn", "")
         if not pgn_text:
             continue
 
-        parsed = chess.pgn.read_game(io.StringIO(pgn_text))
-        if parsed is None:
-            continue
+        if replay:
+            parsed = chess.pgn.read_game(io.StringIO(pgn_text))
+            if parsed is None:
+                continue
+            headers = parsed.headers
+            sans    = replay_sans(parsed)
+            if annotations:
+                evals, clocks = replay_annotations(parsed)
+        elif annotations:
+            parsed = next(fast_pgn.iter_annotated_games(pgn_text.splitlines()), None)
+            if parsed is None:
+                continue
+            headers, sans, evals, clocks = parsed
+        else:
+            parsed = next(fast_pgn.iter_games(pgn_text.splitlines()), None)
+            if parsed is None:
+                continue
+            headers, sans = parsed
 
-        headers    = parsed.headers
         white_info = g.get("white", {})
         black_info = g.get("black", {})
         white      = white_info.get("username", "")
@@ -171,13 +362,6 @@ def parse_games(raw_games: list, username: str) -> list:
         else:
             user_result = "Draw"
 
-        # Build numbered move list via python-chess
-        board      = parsed.board()
-        sans: list[str] = []
-        for move in parsed.mainline_moves():
-            sans.append(board.san(move))
-            board.push(move)
-
         pairs: list[str] = []
         for i in range(0, len(sans), 2):
             n = i // 2 + 1
@@ -193,59 +377,156 @@ def parse_games(raw_games: list, username: str) -> list:
                 opening = eco_url.rstrip("/").split("/")[-1].replace("-", " ")
         opening = opening or "Unknown opening"
 
-        games.append({
-            "color":        color,
-            "result":       user_result,
-            "opening":      opening,
-            "time_control": g.get("time_control", "?"),
-            "move_count":   len(sans),
-            "moves":        " ".join(pairs),
-            "opponent":     black if color == "White" else white,
-            "url":          g.get("url", ""),
-        })
+        game = GameRecord(
+            color=color,
+            result=user_result,
+            opening=opening,
+            time_control=g.get("time_control", "?"),
+            move_count=len(sans),
+            moves=" ".join(pairs),
+            opponent=black if color == "White" else white,
+            url=g.get("url", ""),
+            played_at=g.get("end_time", 0) * 1000,
+        )
+        if g.get("time_class"):
+            game["time_class"] = sys.intern(g["time_class"])   # what fetch_games filters on
+        if annotations:
+            game_annotations.attach(game, evals, clocks)
+        games.append(game)
 
-    return games
+    return GameTable(games) if columnar else games
 
 
-# ── Formatting ────────────────────────────────────────────────────────────────
-
-def format_for_claude(games: list, username: str) -> str:
-    """Render the parsed game list as a compact text block for Claude."""
-    lines = [
-        f"Player: {username}",
-        f"Games provided: {len(games)}",
-        "",
-    ]
-    for i, g in enumerate(games, 1):
-        lines.append(
-            f"Game {i:>2} | {g['color']:5} | {g['result']:4} | "
-            f"Moves: {g['move_count']:>3} | TC: {g['time_control']:>8} | "
-            f"Opening: {g['opening']} | URL: {g['url']}"
-        )
-        lines.append(f"         {g['moves']}")
-        lines.append("")
-    return "\n".join(lines)
+def parse_games_parallel(
+    raw_games: list,
+    username: str,
+    replay: bool = False,
+    workers: Optional[int] = None,
+    annotations: bool = False,
+    columnar: bool = False,
+) -> list:
+    """
+    Same result as `parse_games`, but a large game list is split into chunks
+    and parsed across up to `workers` processes (default: one per core).
+    Small inputs are parsed in-process.
+    """
+    games = parallel_parse.parse_in_chunks(
+        partial(parse_games, username=username, replay=replay, annotations=annotations),
+        raw_games,
+        replay,
+        workers,
+    )
+    return GameTable(games) if columnar else games
+
+
+# ── Local store ───────────────────────────────────────────────────────────────
+
+def sync_games(
+    store: GameStore,
+    username: str,
+    time_class: Optional[str] = None,
+    max_games: int = 20,
+    annotations: bool = False,
+) -> list:
+    """
+    Bring the local game store up to date and return the last `max_games`
+    games from it, most recent first.
+    A scope that has already been backfilled to `max_games` only walks back
+    from the newest archive until it reaches games it has already stored;
+    otherwise the last `max_games` are fetched and merged in. Annotated syncs
+    keep their own sync state, so games stored bare gain evals and clocks.
+    """
+    scope = sync_scope(time_class, annotations)
+    depth, high_water = store.sync_state("chess.com", username, scope)
+    since = high_water if depth >= max_games and high_water else None
+
+    raw_games = _download(username, time_class, max_games=max_games, since=since)
+    games = _parse(raw_games, username, annotations)
+    store.add_games("chess.com", username, games)
+    store.record_sync("chess.com", username, scope, max_games, games)
+    return store.load_games(
+        "chess.com", username, time_class, limit=max_games, annotations=annotations
+    )
 
 
 # ── Pipeline ──────────────────────────────────────────────────────────────────
 
+def _download(username: str, *args, **kwargs) -> list:
+    """`fetch_games`, timed as the "download" stage."""
+    with timing.span("download") as span:
+        raw_games = fetch_games(username, *args, **kwargs)
+        span["games"] = len(raw_games)
+    return raw_games
+
+
+def _parse(raw_games: list, username: str, annotations: bool) -> list:
+    """`parse_games_parallel`, timed as the "parse" stage."""
+    with timing.span("parse") as span:
+        games = parse_games_parallel(raw_games, username, annotations=annotations)
+        span["games"] = len(games)
+    return games
+
+
+def collect_games(
+    username: str,
+    time_class: Optional[str] = None,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    max_games: int = 20,
+    store: Optional[GameStore] = None,
+    annotations: bool = False,
+) -> list:
+    """
+    Fetch and parse the games to analyse. With a `store` (and no year/month
+    filter), only games not already stored locally are downloaded.
+    `annotations` keeps each move's clock (see game_annotations).
+    Identical calls made while one is running share its download (see
+    single_flight); each caller gets its own copies of the game records, so
+    later stages may annotate them in place. Raises ValueError if there are none.
+    """
+    key   = ("chess.com", username.lower(), time_class, year, month, max_games, store, annotations)
+    games = _fetches.do(
+        key, _collect_games, username, time_class, year, month, max_games, store, annotations
+    )
+    return [GameRecord.from_dict(g) for g in games]
+
+
+def _collect_games(
+    username: str,
+    time_class: Optional[str],
+    year: Optional[int],
+    month: Optional[int],
+    max_games: int,
+    store: Optional[GameStore],
+    annotations: bool,
+) -> list:
+    with timing.span("games", platform="chess.com") as span:
+        if store is not None and not year:
+            games = sync_games(store, username, time_class, max_games, annotations)
+        else:
+            raw_games = _download(username, time_class, year, month, max_games)
+            if not raw_games:
+                raise ValueError(f"No Chess.com games found for '{username}'.")
+            games = _parse(raw_games, username, annotations)
+        span["games"] = len(games)
+    if not games:
+        raise ValueError(f"No parseable games found for '{username}'.")
+    return games
+
+
 def run(
     username: str,
     time_class: Optional[str] = None,
     year: Optional[int] = None,
     month: Optional[int] = None,
     max_games: int = 20,
+    store: Optional[GameStore] = None,
 ) -> str:
     """
     Full Chess.com analyst pipeline — fetch, parse, format, analyse.
     Returns the analysis text. Raises on network or API errors.
     """
-    raw_games = fetch_games(username, time_class, year, month, max_games)
-    if not raw_games:
-        raise ValueError(f"No Chess.com games found for '{username}'.")
-    games = parse_games(raw_games, username)
-    if not games:
-        raise ValueError(f"No parseable games found for '{username}'.")
+    games = collect_games(username, time_class, year, month, max_games, store)
     return analyse(username, format_for_claude(games, username))
 
 
@@ -291,14 +572,36 @@ def main() -> None:
         metavar="N",
         help="Maximum number of games to analyse (default: 20)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the local archive and Claude response caches for this run",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Delete all cached archives and Claude responses before running",
+    )
     args = parser.parse_args()
+    load_dotenv()
 
     if args.month and not args.year:
         parser.error("--month requires --year")
 
+    if args.clear_cache:
+        removed = archive_cache.clear()
+        print(f"Cleared {removed} cached archive{'s' if removed != 1 else ''}.")
+        removed = llm.response_cache.clear()
+        print(f"Cleared {removed} cached response{'s' if removed != 1 else ''}.")
+    if args.no_cache:
+        archive_cache.enabled = False
+        llm.response_cache.enabled = False
+
     time_class = args.type.lower() if args.type else None
     type_label = f" {args.type}" if args.type else ""
 
+    import requests
+
     print(f"Fetching last {args.games}{type_label} games for '{args.username}' from Chess.com...")
     try:
         raw_games = fetch_games(args.username, time_class, args.year, args.month, args.games)
@@ -317,7 +620,7 @@ def main() -> None:
         print(f"No games found for '{args.username}'.", file=sys.stderr)
         sys.exit(1)
 
-    games = parse_games(raw_games, args.username)
+    games = parse_games_parallel(raw_games, args.username)
     if not games:
         print(f"No parseable games found for '{args.username}'.", file=sys.stderr)
         sys.exit(1)
@@ -325,18 +628,11 @@ def main() -> None:
     print(f"Parsed {len(games)} game{'s' if len(games) != 1 else ''}. Sending to Claude...")
     try:
         analyse(args.username, format_for_claude(games, args.username))
-    except anthropic.AuthenticationError:
-        print(
-            "Error: invalid or missing API key.\n"
-            "Add it to a .env file: ANTHROPIC_API_KEY=your-key-here",
-            file=sys.stderr,
-        )
-        sys.exit(1)
-    except anthropic.APIConnectionError:
-        print("Error: could not connect to the Anthropic API.", file=sys.stderr)
-        sys.exit(1)
-    except anthropic.APIStatusError as e:
-        print(f"Anthropic API error {e.status_code}: {e.message}", file=sys.stderr)
+    except Exception as e:
+        message = llm.api_error_message(e)
+        if message is None:
+            raise
+        print(message, file=sys.stderr)
         sys.exit(1)
 
 
@@ -13,10 +13,10 @@ Programmatic usage (imported by main.py):
 
 import sys
 import argparse
-import anthropic
 from dotenv import load_dotenv
 
-load_dotenv()
+import llm
+import timing
 
 SYSTEM_PROMPT = """\
 You are an expert chess coach creating a personalised weekly improvement plan. \
@@ -74,38 +74,38 @@ under 60 seconds". Avoid vague goals like "improve endgame play".]
 """
 
 
-def produce_plan(username: str, time_control: str, analysis: str) -> str:
-    """Stream the improvement plan from Claude to stdout and return the full text."""
-    client = anthropic.Anthropic()
-
-    prompt = PROMPT_TEMPLATE.format(
+def build_prompt(username: str, time_control: str, analysis: str) -> str:
+    """The coach's user message for an analyst report."""
+    return PROMPT_TEMPLATE.format(
         username=username,
         time_control=time_control,
         analysis=analysis,
     )
 
-    print("\n" + "=" * 60)
-    print(f" 1-Week Improvement Plan — {username}")
-    print("=" * 60 + "\n")
 
-    chunks: list[str] = []
-    with client.messages.stream(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=2048,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": prompt}],
-    ) as stream:
-        for text in stream.text_stream:
-            print(text, end="", flush=True)
-            chunks.append(text)
+def produce_plan(username: str, time_control: str, analysis: str, echo: bool = True) -> str:
+    """
+    Stream the improvement plan from Claude to stdout and return the full text.
+    With `echo=False` nothing is printed (used when several runs share stdout).
+    """
+    prompt = build_prompt(username, time_control, analysis)
+
+    if echo:
+        print("\n" + "=" * 60)
+        print(f" 1-Week Improvement Plan — {username}")
+        print("=" * 60 + "\n")
 
-    print("\n\n" + "=" * 60)
-    return "".join(chunks)
+    with timing.span("coach"):
+        plan = llm.stream_reply(SYSTEM_PROMPT, prompt, echo=echo)
 
+    if echo:
+        print("\n\n" + "=" * 60)
+    return plan
 
-def run(username: str, time_control: str, analysis: str) -> str:
+
+def run(username: str, time_control: str, analysis: str, echo: bool = True) -> str:
     """Programmatic entry point — returns the improvement plan text."""
-    return produce_plan(username, time_control, analysis)
+    return produce_plan(username, time_control, analysis, echo)
 
 
 def main() -> None:
@@ -126,7 +126,16 @@ def main() -> None:
         metavar="TYPE",
         help="Game type that was analysed (used for context)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call Claude, ignoring cached responses",
+    )
     args = parser.parse_args()
+    load_dotenv()
+
+    if args.no_cache:
+        llm.response_cache.enabled = False
 
     time_control = args.type or "all time controls"
 
@@ -143,18 +152,11 @@ def main() -> None:
 
     try:
         produce_plan(args.username, time_control, analysis)
-    except anthropic.AuthenticationError:
-        print(
-            "Error: invalid or missing API key.\n"
-            "Add it to a .env file: ANTHROPIC_API_KEY=your-key-here",
-            file=sys.stderr,
-        )
-        sys.exit(1)
-    except anthropic.APIConnectionError:
-        print("Error: could not connect to the Anthropic API.", file=sys.stderr)
-        sys.exit(1)
-    except anthropic.APIStatusError as e:
-        print(f"Anthropic API error {e.status_code}: {e.message}", file=sys.stderr)
+    except Exception as e:
+        message = llm.api_error_message(e)
+        if message is None:
+            raise
+        print(message, file=sys.stderr)
         sys.exit(1)
 
 
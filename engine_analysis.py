@@ -0,0 +1,244 @@
+"""
+Optional engine analysis: finds the real blunders before the analyst sees the games.
+
+Every position of every game is evaluated by a local UCI engine (e.g.
+Stockfish) at a fixed depth or node budget. A pool of engine processes — one
+per core by default, each single-threaded — works through the positions in
+parallel.
+
+Evaluations are memoised in a SQLite cache keyed by the position's Zobrist
+hash and the search limit, so shared positions (opening theory above all) are
+evaluated once: across the games of one run, across runs, and across players.
+
+Each game dict gains a "blunders" list — the player's moves that lost at least
+BLUNDER_CP centipawns — which game_format renders next to the moves:
+
+    engine_analysis.annotate_games(games, "/usr/bin/stockfish", depth=12)
+"""
+
+import os
+import re
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from archive_cache import CACHE_ROOT
+
+if TYPE_CHECKING:   # python-chess is imported where a board or engine is first needed
+    import chess
+    import chess.engine
+
+DEFAULT_DB_PATH = CACHE_ROOT / "evals.db"
+DEFAULT_DEPTH   = 12
+MATE_SCORE      = 10_000   # centipawn value of a forced mate
+EVAL_CLIP       = 1_000    # evals are clipped here before measuring losses
+BLUNDER_CP      = 200      # loss (player's view) that counts as a blunder
+
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evals (
+    zobrist INTEGER NOT NULL,
+    search  TEXT    NOT NULL,
+    score   INTEGER NOT NULL,
+    PRIMARY KEY (zobrist, search)
+);
+"""
+
+
+def _signed(key: int) -> int:
+    """Map an unsigned 64-bit Zobrist hash onto SQLite's signed INTEGER."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class EvalCache:
+    """Thread-safe SQLite cache of White-relative centipawn evaluations."""
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get_many(self, keys: list[int], search: str) -> dict:
+        """Return {zobrist: score} for the cached subset of `keys`."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):   # stay under SQLite's variable limit
+                chunk = [_signed(k) for k in keys[start:start + 500]]
+                rows  = self._conn.execute(
+                    f"SELECT zobrist, score FROM evals WHERE search = ? "
+                    f"AND zobrist IN ({','.join('?' * len(chunk))})",
+                    [search, *chunk],
+                )
+                for key, score in rows:
+                    found[key % (1 << 64)] = score
+        return found
+
+    def put_many(self, scores: dict, search: str) -> None:
+        """Store {zobrist: score} evaluations made with `search`."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO evals (zobrist, search, score) VALUES (?, ?, ?)",
+                [(_signed(k), search, s) for k, s in scores.items()],
+            )
+
+
+class EnginePool:
+    """A fixed set of UCI engine processes shared by worker threads."""
+
+    def __init__(self, path: str, workers: Optional[int] = None):
+        self.size    = workers or os.cpu_count() or 1
+        self._idle: queue.Queue = queue.Queue()
+        self._all    = []
+        import chess.engine
+        try:
+            for _ in range(self.size):
+                engine = chess.engine.SimpleEngine.popen_uci(path)
+                if "Threads" in engine.options:
+                    engine.configure({"Threads": 1})
+                self._all.append(engine)
+                self._idle.put(engine)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        import chess.engine
+        for engine in self._all:
+            try:
+                engine.quit()
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError):
+                pass
+        self._all.clear()
+
+    def __enter__(self) -> "EnginePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def evaluate(self, board: "chess.Board", limit: "chess.engine.Limit") -> int:
+        """White-relative centipawn score of one position."""
+        engine = self._idle.get()
+        try:
+            info = engine.analyse(board, limit)
+        finally:
+            self._idle.put(engine)
+        return info["score"].white().score(mate_score=MATE_SCORE)
+
+
+# ── Game annotation ───────────────────────────────────────────────────────────
+
+def _terminal_score(board: "chess.Board") -> Optional[int]:
+    """Exact score of a finished position, which needs no engine search."""
+    import chess
+    if board.is_checkmate():
+        return -MATE_SCORE if board.turn == chess.WHITE else MATE_SCORE
+    if board.is_stalemate() or board.is_insufficient_material():
+        return 0
+    return None
+
+
+def _replay(moves: str, unique: dict, scores: dict) -> tuple:
+    """
+    Replay a numbered SAN string, returning (zobrist key of every position,
+    SAN list). Positions not yet seen are added to `unique` (to search) or,
+    when the game is over in them, scored directly into `scores`.
+    """
+    import chess.polyglot
+    board = chess.Board()
+    keys  = []
+    sans  = []
+
+    def visit() -> None:
+        key = chess.polyglot.zobrist_hash(board)
+        keys.append(key)
+        if key not in unique and key not in scores:
+            terminal = _terminal_score(board)
+            if terminal is None:
+                unique[key] = board.copy(stack=False)
+            else:
+                scores[key] = terminal
+
+    visit()
+    for token in moves.split():
+        san = _MOVE_NUMBER.sub("", token)
+        try:
+            board.push_san(san)
+        except ValueError:
+            break   # evaluate up to the first unreadable move
+        sans.append(san)
+        visit()
+    return keys, sans
+
+
+def _blunders(game: dict, scores: list[int], sans: list[str]) -> list[str]:
+    """The player's moves that lost at least BLUNDER_CP, as '14...Qxb7 (-3.2)'."""
+    sign   = 1 if game["color"] == "White" else -1
+    first  = 0 if game["color"] == "White" else 1
+    found  = []
+    for ply in range(first, len(sans), 2):
+        before = max(-EVAL_CLIP, min(EVAL_CLIP, sign * scores[ply]))
+        after  = max(-EVAL_CLIP, min(EVAL_CLIP, sign * scores[ply + 1]))
+        loss   = before - after
+        if loss >= BLUNDER_CP:
+            number = ply // 2 + 1
+            dots   = "." if ply % 2 == 0 else "..."
+            found.append(f"{number}{dots}{sans[ply]} (-{loss / 100:.1f})")
+    return found
+
+
+def annotate_games(
+    games: list,
+    engine_path: str,
+    depth: Optional[int] = DEFAULT_DEPTH,
+    nodes: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache: Optional[EvalCache] = None,
+) -> dict:
+    """
+    Evaluate every position of `games` and add each game's "blunders" list.
+    Unique positions missing from `cache` are searched by a pool of
+    `workers` engines with the given depth or node budget.
+    Returns counts: {"positions", "cached", "evaluated"}.
+    """
+    import chess.engine
+    limit  = chess.engine.Limit(depth=None if nodes else depth, nodes=nodes)
+    search = f"nodes={nodes}" if nodes else f"depth={depth}"
+
+    unique: dict = {}
+    scores: dict = {}
+    replays = [_replay(g["moves"], unique, scores) for g in games]
+
+    cached = cache.get_many(list(unique), search) if cache is not None else {}
+    scores.update(cached)
+    todo = {k: b for k, b in unique.items() if k not in cached}
+
+    if todo:
+        with EnginePool(engine_path, workers) as pool, \
+                ThreadPoolExecutor(max_workers=pool.size) as executor:
+            futures = {executor.submit(pool.evaluate, b, limit): k for k, b in todo.items()}
+            fresh   = {}
+            for future in as_completed(futures):
+                fresh[futures[future]] = future.result()
+                if cache is not None and len(fresh) >= 200:   # checkpoint as we go
+                    cache.put_many(fresh, search)
+                    scores.update(fresh)
+                    fresh = {}
+            if cache is not None and fresh:
+                cache.put_many(fresh, search)
+            scores.update(fresh)
+
+    for g, (keys, sans) in zip(games, replays):
+        g["blunders"] = _blunders(g, [scores[k] for k in keys], sans)
+
+    return {"positions": len(unique), "cached": len(cached), "evaluated": len(todo)}
@@ -0,0 +1,149 @@
+"""
+Fast-path PGN reader for platform exports.
+
+Lichess and Chess.com only ever serve legal, fully validated games, so there
+is no need to replay each move on a `chess.Board` (legal-move generation plus
+SAN rendering) just to recover the SAN text that is already in the file. This
+module reads the tag pairs and tokenizes the mainline movetext directly —
+comments, variations, NAGs, move numbers and the result token are dropped.
+
+`iter_annotated_games` additionally keeps the `[%eval]` and `[%clk]` comment
+commands (Lichess exports with evals/clocks, Chess.com PGNs) as per-move
+arrays aligned with the SAN list.
+
+Use `chess.pgn.read_game` instead whenever board positions are needed.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+_TAG        = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_COMMENT    = re.compile(r"\{[^}]*\}|;[^\n]*")
+_VARIATION  = re.compile(r"\([^()]*\)")
+_MOVE_NUM   = re.compile(r"\d+\.(?:\.\.)?")
+_NON_MOVES  = frozenset({"1-0", "0-1", "1/2-1/2", "*"})
+_GAME_SPLIT = re.compile(r'\n\s*\n(?=\[\s*\w+\s+")')
+_TOKEN      = re.compile(r"\{([^}]*)\}|;[^\n]*|[()]|[^\s{}();]+")
+_EVAL       = re.compile(r"\[%eval\s+(#)?([+-]?\d+(?:\.\d+)?)")
+_CLOCK      = re.compile(r"\[%clk\s+(\d+):(\d+):(\d+(?:\.\d+)?)\]")
+
+MATE_CP = 10_000   # centipawn value given to a forced mate in %eval
+
+
+def san_moves(movetext: str) -> list[str]:
+    """Return the mainline SAN moves of a PGN movetext section."""
+    text = _COMMENT.sub(" ", movetext)
+    # Strip innermost variations repeatedly until nested ones are gone
+    while "(" in text:
+        stripped = _VARIATION.sub(" ", text)
+        if stripped == text:
+            break
+        text = stripped
+    text = _MOVE_NUM.sub(" ", text)
+
+    sans: list[str] = []
+    for token in text.split():
+        if token in _NON_MOVES or token.startswith("$"):
+            continue
+        sans.append(token.rstrip("!?"))
+    return sans
+
+
+def _eval_cp(match: re.Match) -> int:
+    """White-relative centipawns of an [%eval] match ("0.23" pawns or "#-3" mate)."""
+    value = float(match.group(2))
+    if match.group(1):
+        return MATE_CP if value > 0 else -MATE_CP
+    return round(value * 100)
+
+
+def annotated_moves(movetext: str) -> tuple[list[str], list, list]:
+    """
+    Return the mainline SAN moves of a PGN movetext section together with the
+    evaluation (White-relative centipawns) and clock (seconds remaining)
+    recorded in each move's comment, None where a move has none.
+    """
+    sans:   list[str] = []
+    evals:  list = []
+    clocks: list = []
+    depth = 0
+    for match in _TOKEN.finditer(movetext):
+        token = match.group(0)
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth or token.startswith(";"):
+            continue
+        elif match.group(1) is not None:
+            if not sans:
+                continue   # a comment before the first move
+            comment = match.group(1)
+            evaluation = _EVAL.search(comment)
+            if evaluation:
+                evals[-1] = _eval_cp(evaluation)
+            clock = _CLOCK.search(comment)
+            if clock:
+                h, m, sec = clock.groups()
+                clocks[-1] = round(int(h) * 3600 + int(m) * 60 + float(sec), 1)
+        elif token in _NON_MOVES or token.startswith("$"):
+            continue
+        else:
+            if token[0].isdigit():
+                token = _MOVE_NUM.sub("", token, count=1)
+                if not token:
+                    continue
+            sans.append(token.rstrip("!?"))
+            evals.append(None)
+            clocks.append(None)
+    return sans, evals, clocks
+
+
+def parse_headers(lines: Iterable[str]) -> dict:
+    """Parse `[Tag "Value"]` lines into a dict."""
+    headers = {}
+    for line in lines:
+        match = _TAG.match(line)
+        if match:
+            headers[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+    return headers
+
+
+def _iter_sections(lines: Iterable[str]) -> Iterator[tuple[list[str], str]]:
+    """Split a multi-game PGN line stream into (tag lines, movetext) per game."""
+    tag_lines: list[str] = []
+    move_lines: list[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if _TAG.match(stripped):
+            if move_lines:
+                yield tag_lines, "\n".join(move_lines)
+                tag_lines, move_lines = [], []
+            tag_lines.append(stripped)
+        elif stripped:
+            move_lines.append(stripped)
+    if tag_lines or move_lines:
+        yield tag_lines, "\n".join(move_lines)
+
+
+def iter_games(lines: Iterable[str]) -> Iterator[tuple[dict, list[str]]]:
+    """
+    Split a multi-game PGN line stream into games, yielding (headers, sans)
+    for each without building a python-chess game tree.
+    """
+    for tag_lines, movetext in _iter_sections(lines):
+        yield parse_headers(tag_lines), san_moves(movetext)
+
+
+def iter_annotated_games(lines: Iterable[str]) -> Iterator[tuple[dict, list[str], list, list]]:
+    """Like `iter_games`, yielding (headers, sans, evals, clocks) — see `annotated_moves`."""
+    for tag_lines, movetext in _iter_sections(lines):
+        yield (parse_headers(tag_lines), *annotated_moves(movetext))
+
+
+def split_games(pgn_text: str) -> list[str]:
+    """
+    Split multi-game PGN text into one string per game, at each blank line
+    that is followed by a tag pair.
+    """
+    return [chunk for chunk in _GAME_SPLIT.split(pgn_text.strip()) if chunk.strip()]
@@ -0,0 +1,127 @@
+"""
+Signals derived from the `[%eval]` and `[%clk]` annotations platforms embed in
+their exports — engine-quality facts at no local engine cost.
+
+Games parsed with `annotations=True` may carry two per-ply arrays, aligned
+with the move list and None where a ply has no annotation:
+
+    "evals"   White-relative centipawns after each ply (mate = ±fast_pgn.MATE_CP);
+              Lichess fills these only for games that were analysed
+    "clocks"  seconds on the mover's clock after each ply
+
+From these this module derives the player's blunders (same threshold and
+format as engine_analysis), their think-time distribution and when they fell
+into time trouble. game_format renders the results next to each game.
+"""
+
+import re
+import statistics
+from typing import Optional
+
+from engine_analysis import BLUNDER_CP, EVAL_CLIP
+
+TIME_TROUBLE_SHARE = 0.1    # under 10% of the base time…
+TIME_TROUBLE_MIN   = 10.0   # …or 10 seconds, whichever is larger
+START_EVAL         = 20     # typical engine eval of the initial position
+
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+
+def attach(game: dict, evals: list, clocks: list) -> dict:
+    """Add non-empty annotation arrays to a parsed game dict; returns `game`."""
+    if any(e is not None for e in evals):
+        game["evals"] = evals
+    if any(c is not None for c in clocks):
+        game["clocks"] = clocks
+    return game
+
+
+def _clip(cp: int) -> int:
+    return max(-EVAL_CLIP, min(EVAL_CLIP, cp))
+
+
+def eval_blunders(game: dict) -> list[str]:
+    """
+    The player's moves whose recorded evals show a loss of BLUNDER_CP or
+    more, formatted like engine_analysis blunders ('14...Qxb7 (-3.2)').
+    """
+    evals = game.get("evals") or []
+    sans  = [_MOVE_NUMBER.sub("", t) for t in game["moves"].split()]
+    sign  = 1 if game["color"] == "White" else -1
+    first = 0 if game["color"] == "White" else 1
+    found = []
+    for ply in range(first, min(len(evals), len(sans)), 2):
+        before = START_EVAL if ply == 0 else evals[ply - 1]
+        after  = evals[ply]
+        if before is None or after is None:
+            continue
+        loss = _clip(sign * before) - _clip(sign * after)
+        if loss >= BLUNDER_CP:
+            dots = "." if ply % 2 == 0 else "..."
+            found.append(f"{ply // 2 + 1}{dots}{sans[ply]} (-{loss / 100:.1f})")
+    return found
+
+
+def _base_and_increment(time_control: str) -> Optional[tuple[float, float]]:
+    """(initial seconds, increment) of a "300+2" time control; None for daily/unknown."""
+    initial, plus, increment = time_control.partition("+")
+    try:
+        return float(initial), float(increment) if plus else 0.0
+    except ValueError:
+        return None
+
+
+def think_times(game: dict) -> list[tuple[int, float]]:
+    """(move number, seconds spent) for each of the player's clocked moves."""
+    clocks  = game.get("clocks") or []
+    control = _base_and_increment(game.get("time_control", ""))
+    if not clocks or control is None:
+        return []
+    base, increment = control
+    first = 0 if game["color"] == "White" else 1
+    times = []
+    previous = base
+    for ply in range(first, len(clocks), 2):
+        clock = clocks[ply]
+        if clock is None:
+            continue
+        times.append((ply // 2 + 1, max(0.0, previous + increment - clock)))
+        previous = clock
+    return times
+
+
+def time_trouble(game: dict) -> Optional[tuple[int, int]]:
+    """
+    (first move, number of moves) the player spent under the time-trouble
+    threshold, or None if they never dropped below it.
+    """
+    clocks  = game.get("clocks") or []
+    control = _base_and_increment(game.get("time_control", ""))
+    if not clocks or control is None:
+        return None
+    threshold = max(TIME_TROUBLE_MIN, TIME_TROUBLE_SHARE * control[0])
+    first = 0 if game["color"] == "White" else 1
+    low   = [
+        ply // 2 + 1 for ply in range(first, len(clocks), 2)
+        if clocks[ply] is not None and clocks[ply] < threshold
+    ]
+    return (low[0], len(low)) if low else None
+
+
+def clock_line(game: dict) -> Optional[str]:
+    """One-line think-time and time-trouble summary, or None without clock data."""
+    times = think_times(game)
+    if not times:
+        return None
+    spent   = sorted(t for _, t in times)
+    p90     = spent[min(len(spent) - 1, int(0.9 * len(spent)))]
+    longest = max(times, key=lambda mt: mt[1])
+    line = (
+        f"think median {statistics.median(spent):.1f}s, p90 {p90:.1f}s, "
+        f"longest {longest[1]:.1f}s@{longest[0]}"
+    )
+    trouble = time_trouble(game)
+    if trouble:
+        start, count = trouble
+        line += f"; time trouble from move {start} ({count} move{'s' if count != 1 else ''})"
+    return line
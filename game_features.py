@@ -0,0 +1,214 @@
+"""
+Per-game and per-player features computed locally from the move lists.
+
+Instead of asking the analyst to replay hundreds of moves in its head to work
+out when a player castled or how far behind on material they fell, each game
+is replayed once here and the facts are handed over as numbers.
+
+Replay is the only per-move Python work: every position is reduced to a row of
+piece counts, and those rows for all games are stacked into one padded NumPy
+array. Every feature and aggregate is then computed across the whole batch in
+vectorised passes (masks, argmax, reductions).
+
+Per game, from the player's side (moves are full-move numbers):
+    castled       move and side of the player's castling (K/Q), if any
+    developed     move by which all four of the player's minor pieces had left
+                  their starting squares
+    opening_end   end of the opening: 6 of the 8 minor pieces developed, or
+                  move 15 at the latest
+    endgame       move at which non-pawn material fell to 26 points or less
+    final / max / min material balance (pawn = 1, minor = 3, rook = 5, queen = 9)
+    drop          worst material loss against the player over one of their
+                  moves and the reply, unless won back on their next move,
+                  and the move it started on
+"""
+
+import re
+from typing import Optional
+
+import chess
+import numpy as np
+
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+OPENING_MAX_PLY    = 30    # the opening ends by move 15 at the latest
+OPENING_DEVELOPED  = 6     # …or once this many of the 8 minor pieces are out
+ENDGAME_MATERIAL   = 26    # non-pawn material (both sides) at or below this
+DROP_THRESHOLD     = 3     # a swing of a minor piece or more counts as a drop
+
+# Column layout of the per-position count rows
+_PIECES  = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)
+_VALUES  = np.array([1, 3, 3, 5, 9], dtype=np.int16)
+_HOME_MINORS = {
+    chess.WHITE: chess.BB_B1 | chess.BB_G1 | chess.BB_C1 | chess.BB_F1,
+    chess.BLACK: chess.BB_B8 | chess.BB_G8 | chess.BB_C8 | chess.BB_F8,
+}
+_N_COLS = 2 * len(_PIECES) + 2   # white counts, black counts, home minors W/B
+
+
+def _position_row(board: chess.Board) -> list[int]:
+    row = []
+    for color in (chess.WHITE, chess.BLACK):
+        for piece in _PIECES:
+            row.append(chess.popcount(board.pieces_mask(piece, color)))
+    for color in (chess.WHITE, chess.BLACK):
+        minors = board.pieces_mask(chess.KNIGHT, color) | board.pieces_mask(chess.BISHOP, color)
+        row.append(chess.popcount(minors & _HOME_MINORS[color]))
+    return row
+
+
+def _replay(moves: str) -> tuple:
+    """
+    Replay a numbered SAN move string. Returns the count row of every position
+    (start position included) and the ply/side of each castling move.
+    """
+    board  = chess.Board()
+    rows   = [_position_row(board)]
+    castle = {}   # colour → (ply, "K"/"Q")
+    for ply, token in enumerate(moves.split(), 1):
+        san = _MOVE_NUMBER.sub("", token)
+        try:
+            move = board.parse_san(san)
+        except ValueError:
+            break   # stop at the first unreadable move; earlier facts still hold
+        if board.is_castling(move):
+            castle[board.turn] = (ply, "K" if board.is_kingside_castling(move) else "Q")
+        board.push(move)
+        rows.append(_position_row(board))
+    return rows, castle
+
+
+def _first(mask: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Index of the first True along axis 1, or NaN where there is none."""
+    mask  = mask & valid
+    first = mask.argmax(axis=1).astype(float)
+    first[~mask.any(axis=1)] = np.nan
+    return first
+
+
+def _to_move(ply: np.ndarray) -> np.ndarray:
+    """Position index (plies played) → full-move number of the move that led there."""
+    return np.ceil(ply / 2)
+
+
+class GameFeatures:
+    """Feature columns for a list of games, one entry per game, same order."""
+
+    def __init__(self, games: list, username: str):
+        self.username = username
+        n = len(games)
+
+        replays = [_replay(g["moves"]) for g in games]
+        lengths = np.array([len(rows) for rows, _ in replays], dtype=np.int32)
+        width   = int(lengths.max(initial=1))
+
+        # (games, positions, columns), padded by repeating each final position
+        counts = np.empty((n, width, _N_COLS), dtype=np.int8)
+        for i, (rows, _) in enumerate(replays):
+            counts[i, : len(rows)] = rows
+            counts[i, len(rows):]  = rows[-1]
+        valid = np.arange(width)[None, :] < lengths[:, None]
+
+        white    = counts[:, :, 0:5].astype(np.int16) @ _VALUES
+        black    = counts[:, :, 5:10].astype(np.int16) @ _VALUES
+        is_white = np.array([g["color"] == "White" for g in games])
+        balance  = np.where(is_white[:, None], white - black, black - white)
+        non_pawn = (white - counts[:, :, 0]) + (black - counts[:, :, 5])
+
+        own_home   = np.where(is_white[:, None], counts[:, :, 10], counts[:, :, 11])
+        total_home = counts[:, :, 10].astype(np.int16) + counts[:, :, 11]
+
+        self.results  = np.array([g["result"] for g in games])
+        self.plies    = lengths - 1
+        self.final    = balance[np.arange(n), lengths - 1] if n else balance[:, 0]
+        self.max_bal  = np.where(valid, balance, -99).max(axis=1, initial=-99)
+        self.min_bal  = np.where(valid, balance, 99).min(axis=1, initial=99)
+
+        self.developed   = _to_move(_first(own_home == 0, valid))
+        opening_ply      = _first(total_home <= 8 - OPENING_DEVELOPED, valid)
+        self.opening_end = _to_move(np.fmin(opening_ply, np.minimum(OPENING_MAX_PLY, self.plies)))
+        self.endgame     = _to_move(_first(non_pawn <= ENDGAME_MATERIAL, valid))
+
+        # Worst material loss over one of the player's moves and the reply,
+        # measured once the exchange settles: material won back with the
+        # player's next move (a recapture) does not count as lost
+        ply    = np.arange(width)[None, :]
+        starts = (ply % 2 == np.where(is_white, 0, 1)[:, None]) & (ply < self.plies[:, None])
+        ahead  = np.concatenate([balance, np.repeat(balance[:, -1:], 3, axis=1)], axis=1)
+        swing  = np.maximum(ahead[:, 2:width + 2], ahead[:, 3:width + 3]) - balance
+        swing  = np.where(starts, swing, 0)
+        worst  = swing.argmin(axis=1)
+        self.drop      = np.maximum(-swing[np.arange(n), worst], 0)
+        self.drop_move = np.where(self.drop >= DROP_THRESHOLD, _to_move(worst + 1.0), np.nan)
+
+        own_colour = [chess.WHITE if w else chess.BLACK for w in is_white]
+        castles    = [c.get(colour) for (_, c), colour in zip(replays, own_colour)]
+        self.castle_move = np.array([_to_move(c[0]) if c else np.nan for c in castles], dtype=float)
+        self.castle_side = [c[1] if c else "" for c in castles]
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def game_line(self, i: int) -> str:
+        """One compact line of features for game `i` (index into the input list)."""
+        def move(v: float) -> str:
+            return "-" if np.isnan(v) else str(int(v))
+
+        side = self.castle_side[i]
+        if side:
+            castled = f"{'O-O-O' if side == 'Q' else 'O-O'}@{move(self.castle_move[i])}"
+        else:
+            castled = "no castling"
+        drop = f"-{self.drop[i]}@{move(self.drop_move[i])}" if self.drop[i] >= DROP_THRESHOLD else "none"
+        return (
+            f"{castled} dev@{move(self.developed[i])} open→{move(self.opening_end[i])} "
+            f"end@{move(self.endgame[i])} mat {self.final[i]:+d} "
+            f"(max {self.max_bal[i]:+d}, min {self.min_bal[i]:+d}) drop {drop}"
+        )
+
+    def summary(self, keep: Optional[int] = None) -> str:
+        """
+        Per-player aggregates over the first `keep` games (all by default),
+        with castling and material drops split by result.
+        """
+        k = len(self) if keep is None else keep
+        if k == 0:
+            return "Player features: no games"
+
+        def mean(v: np.ndarray) -> str:
+            v = v[~np.isnan(v)]
+            return f"{v.mean():.1f}" if v.size else "-"
+
+        def pct(mask: np.ndarray) -> str:
+            return f"{100 * mask.mean():.0f}%" if mask.size else "-"
+
+        castle  = self.castle_move[:k]
+        sides   = np.array(self.castle_side[:k])
+        dropped = self.drop[:k] >= DROP_THRESHOLD
+        results = self.results[:k]
+
+        lines = [
+            f"Player features over {k} games (moves are full-move numbers):",
+            f"  castled {pct(~np.isnan(castle))} (O-O {int((sides == 'K').sum())}, "
+            f"O-O-O {int((sides == 'Q').sum())}), mean castling move {mean(castle)}",
+            f"  all minors developed by move {mean(self.developed[:k])}; "
+            f"opening ends move {mean(self.opening_end[:k])}; "
+            f"endgame reached in {pct(~np.isnan(self.endgame[:k]))} at move {mean(self.endgame[:k])}",
+            f"  material: mean final {self.final[:k].mean():+.1f}, "
+            f"{pct(dropped)} of games had a drop of {DROP_THRESHOLD}+ (mean move {mean(self.drop_move[:k])})",
+        ]
+        for label, plural in (("Win", "wins"), ("Loss", "losses"), ("Draw", "draws")):
+            mask = results == label
+            if mask.any():
+                lines.append(
+                    f"  {plural} ({int(mask.sum())}): castled {pct(~np.isnan(castle[mask]))}, "
+                    f"mean castling move {mean(castle[mask])}, "
+                    f"{pct(dropped[mask])} with a material drop, "
+                    f"mean final material {self.final[:k][mask].mean():+.1f}"
+                )
+        return "\n".join(lines)
+
+
+def extract_features(games: list, username: str) -> GameFeatures:
+    """Replay `games` once and compute their feature columns."""
+    return GameFeatures(games, username)
@@ -0,0 +1,253 @@
+"""
+Renders parsed games into the text block sent to Claude.
+
+Two encodings are available:
+- verbose (default): padded header columns and numbered SAN, as the analyst
+  has always received it;
+- compact: one line per game with single-letter colour/result codes and
+  un-numbered SAN, roughly a third fewer tokens.
+
+Either encoding can trim long games past `max_plies` and is fitted to a token
+budget. When the block is over budget, games are first trimmed to shorter
+move lists and then the oldest games are dropped. Anything removed is reported
+on stderr — the analyst never silently loses games or overruns its context.
+Token counts use a fast local estimate unless an exact counter (e.g. the API's
+token-counting endpoint via `api_token_counter`) is supplied.
+
+With `features` (opt-in, see game_features), each game also carries a line
+of precomputed facts — castling, development, phases, material — and a
+per-player summary is added at the end, next to the game count. Games annotated by
+engine_analysis list the blunders the engine found; games parsed with
+annotations list those shown by the export's own evals, and a clock summary
+(see game_annotations).
+"""
+
+import re
+import sys
+from typing import TYPE_CHECKING, Callable, Optional
+
+import game_annotations
+import timing
+
+if TYPE_CHECKING:   # NumPy, python-chess and the SDK load on first use
+    from game_features import GameFeatures
+
+DEFAULT_TOKEN_BUDGET = 150_000          # leaves headroom in a 200k context
+CHARS_PER_TOKEN      = 3.0              # conservative for SAN-heavy text
+_TRIM_STEPS          = (120, 80, 60, 40)
+
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate — errs on the high side for move lists."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def api_token_counter(system: str, model: str) -> Callable[[str], int]:
+    """
+    Return a counter that asks Anthropic's token-counting endpoint how many
+    input tokens a user message would cost alongside `system`.
+    """
+    import anthropic
+    client = anthropic.Anthropic()
+
+    def count(text: str) -> int:
+        return client.messages.count_tokens(
+            model=model,
+            system=system,
+            messages=[{"role": "user", "content": text}],
+        ).input_tokens
+
+    return count
+
+
+def _plies(moves: str, max_plies: Optional[int], numbered: bool) -> tuple:
+    """Split a numbered move string into plies, optionally trimmed and unnumbered."""
+    plies = moves.split()
+    dropped = 0
+    if max_plies is not None and len(plies) > max_plies:
+        dropped = len(plies) - max_plies
+        plies = plies[:max_plies]
+    if not numbered:
+        plies = [_MOVE_NUMBER.sub("", p) for p in plies]
+    return plies, dropped
+
+
+def _has_blunders(g: dict) -> bool:
+    return "blunders" in g or "evals" in g
+
+
+def _blunder_list(g: dict, compact: bool = False) -> str:
+    """
+    "Engine blunders: …" from the local engine (engine_analysis), else
+    "Export-eval blunders: …" from the export's own evals; "none" if empty.
+    """
+    if "blunders" in g:
+        label, blunders = "Engine", g["blunders"]
+    else:
+        label, blunders = "Export-eval", game_annotations.eval_blunders(g)
+    return f"{label.lower() if compact else label} blunders: {', '.join(blunders) or 'none'}"
+
+
+def _render_verbose(i: int, g: dict, max_plies: Optional[int], facts: str) -> str:
+    plies, dropped = _plies(g["moves"], max_plies, numbered=True)
+    clock = game_annotations.clock_line(g)
+    tail = f" … (+{dropped} plies)" if dropped else ""
+    return (
+        f"Game {i:>2} | {g['color']:5} | {g['result']:4} | "
+        f"Moves: {g['move_count']:>3} | TC: {g['time_control']:>8} | "
+        f"Opening: {g['opening']} | URL: {g['url']}\n"
+        + (f"         Features: {facts}\n" if facts else "")
+        + (f"         {_blunder_list(g)}\n" if _has_blunders(g) else "")
+        + (f"         Clock: {clock}\n" if clock else "")
+        + f"         {' '.join(plies)}{tail}\n"
+    )
+
+
+def _render_compact(i: int, g: dict, max_plies: Optional[int], facts: str) -> str:
+    plies, dropped = _plies(g["moves"], max_plies, numbered=False)
+    clock = game_annotations.clock_line(g)
+    tail = f" +{dropped}" if dropped else ""
+    return (
+        f"G{i} {g['color'][0]} {g['result'][0]} {g['time_control']} | "
+        f"{g['opening']} | {g['url']} | " + (f"{facts} | " if facts else "")
+        + (f"{_blunder_list(g, compact=True)} | " if _has_blunders(g) else "")
+        + (f"clock: {clock} | " if clock else "")
+        + f"{' '.join(plies)}{tail}"
+    )
+
+
+_FEATURES_LEGEND = (
+    "Features (player's side, full-move numbers): castling@move, dev@ = all minor "
+    "pieces developed, open→ = opening ends, end@ = endgame starts, mat = final "
+    "material balance (max/min during the game), drop = worst material lost over "
+    "one move and the reply and not won back next move@move it started"
+)
+
+
+def _render(
+    games: list,
+    username: str,
+    compact: bool,
+    max_plies: Optional[int],
+    features: Optional["GameFeatures"] = None,
+) -> str:
+    """Oldest game first, game count last, so newer games only ever extend the block."""
+    render = _render_compact if compact else _render_verbose
+    lines  = [f"Player: {username}", ""]
+    if compact:
+        lines += [
+            "Format: G<n> <colour W/B> <result W/L/D> <time control> | opening | url | "
+            + ("features | " if features is not None else "")
+            + ("blunders | " if any(_has_blunders(g) for g in games) else "")
+            + ("clock | " if any("clocks" in g for g in games) else "")
+            + "moves in SAN, alternating White/Black (+N = plies omitted)",
+            "",
+        ]
+    if features is not None:
+        lines += [_FEATURES_LEGEND, ""]
+    for i, g in enumerate(reversed(games), 1):
+        facts = features.game_line(len(games) - i) if features is not None else ""
+        lines.append(render(i, g, max_plies, facts))
+        if compact:
+            lines.append("")
+    # Summary and count share the final paragraph, after every game
+    if features is not None:
+        lines.append(features.summary(keep=len(games)))
+    lines.append(f"Games provided: {len(games)} (Game 1 is the oldest)")
+    return "\n".join(lines)
+
+
+def format_games(
+    games: list,
+    username: str,
+    compact: bool = False,
+    max_plies: Optional[int] = None,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+    features: bool = False,
+) -> str:
+    """
+    Render `games` (most recent first) for the analyst, fitted to `token_budget`.
+    Pass `token_budget=None` to disable fitting, `features=True` to add the
+    precomputed game features (NumPy and a board replay of every game, so
+    they are opt-in). Raises ValueError when not even one game's
+    header fits the budget.
+    """
+    if features and games:
+        from game_features import extract_features
+        feats = extract_features(games, username)
+    else:
+        feats = None
+    text  = _render(games, username, compact, max_plies, feats)
+    if token_budget is None or count_tokens(text) <= token_budget:
+        return text
+
+    # 1. Trim long games progressively
+    longest = max((g["move_count"] for g in games), default=0)
+    for step in _TRIM_STEPS:
+        if (max_plies is not None and step >= max_plies) or step >= longest:
+            continue
+        text = _render(games, username, compact, step, feats)
+        if count_tokens(text) <= token_budget:
+            print(
+                f"Note: trimmed games to their first {step} plies to fit the "
+                f"{token_budget:,}-token budget.",
+                file=sys.stderr,
+            )
+            return text
+        max_plies = step
+
+    # 2. Drop the oldest games until the block fits — a binary search for the
+    #    most recent games that do, since the block only grows with each game
+    low, high = 1, len(games) - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(_render(games[:mid], username, compact, max_plies, feats)) <= token_budget:
+            low = mid
+        else:
+            high = mid - 1
+    kept = games[:low]   # games are most recent first
+    text = _render(kept, username, compact, max_plies, feats)
+
+    # 3. Even the most recent game alone is over: halve its moves until it fits
+    plies = min(max_plies or longest, longest)
+    while count_tokens(text) > token_budget:
+        if plies == 0:
+            raise ValueError(
+                f"the {token_budget:,}-token budget cannot fit even one game"
+            )
+        plies //= 2
+        max_plies = plies
+        text = _render(kept, username, compact, max_plies, feats)
+
+    print(
+        f"Warning: only the {len(kept)} most recent of {len(games)} games fit the "
+        f"{token_budget:,}-token budget"
+        + (
+            " (moves left out)." if max_plies == 0
+            else f" (trimmed to {max_plies} plies)." if max_plies else "."
+        ),
+        file=sys.stderr,
+    )
+    return text
+
+
+def format_for_claude(
+    games: list,
+    username: str,
+    compact: bool = False,
+    max_plies: Optional[int] = None,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+    features: bool = False,
+) -> str:
+    """
+    `format_games` for parsed games (a list of records or a GameTable), timed
+    as the "format" stage. Both platform modules re-export it.
+    """
+    with timing.span("format", games=len(games)):
+        return format_games(
+            games, username, compact, max_plies, token_budget, count_tokens, features
+        )
@@ -0,0 +1,225 @@
+"""
+Compact in-memory form of a parsed game.
+
+A parsed game used to be a plain dict: nine keys, the joined move string, and
+a fresh copy of its colour, result, time control, opening and opponent name.
+For store-backed and bulk workloads (100k+ games) the per-game dict and the
+duplicated strings cost more memory than the moves themselves.
+
+GameRecord holds the same fields in __slots__ and interns the categorical
+strings, so each distinct value is stored once however many games share it.
+It is a MutableMapping, so code written against the dict shape keeps working
+unchanged — g["moves"], g.get("evals"), "clocks" in g, g["blunders"] = [...] —
+and dict(g) gives back the plain dict (e.g. for JSON).
+
+GameTable is the columnar form for bulk sets. Categorical fields become
+integer codes into per-column category lists, counts and timestamps live in
+typed arrays, and the move and URL text is packed into one buffer per column.
+A GameRecord is materialised only when a game is indexed:
+
+    table = GameTable(analyst.iter_games(pgn_io, "magnus"))
+    table[0]["opening"], table.column("result")
+"""
+
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping, Sequence
+from typing import Union
+
+FIELDS = (
+    "color", "result", "opening", "time_control", "move_count",
+    "moves", "opponent", "url", "played_at",
+)
+OPTIONAL = ("evals", "clocks", "blunders", "time_class")   # set only when the game has them
+
+_SLOTS       = frozenset(FIELDS + OPTIONAL)
+_CATEGORICAL = ("color", "result", "opening", "time_control", "opponent")
+_INTEGER     = {"move_count": "I", "played_at": "q"}   # array typecodes
+_TEXT        = ("moves", "url")
+
+
+class GameRecord(MutableMapping):
+    """One parsed game — the pipeline's game dict, stored in slots."""
+
+    __slots__ = FIELDS + OPTIONAL
+
+    def __init__(
+        self,
+        color: str,
+        result: str,
+        opening: str,
+        time_control: str,
+        move_count: int,
+        moves: str,
+        opponent: str,
+        url: str,
+        played_at: int,
+    ):
+        intern = sys.intern
+        self.color        = intern(color)
+        self.result       = intern(result)
+        self.opening      = intern(opening)
+        self.time_control = intern(time_control)
+        self.move_count   = move_count
+        self.moves        = moves
+        self.opponent     = intern(opponent)
+        self.url          = url
+        self.played_at    = played_at
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "GameRecord":
+        """Build a record from a game dict (e.g. one loaded from JSON)."""
+        record = cls(*(data[field] for field in FIELDS))
+        for field in OPTIONAL:
+            if field in data:
+                setattr(record, field, data[field])
+        return record
+
+    def __getitem__(self, key: str):
+        if key not in _SLOTS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:   # an optional field that was never set
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in _SLOTS:
+            raise KeyError(f"GameRecord has no field '{key}'")
+        if key in _CATEGORICAL:
+            value = sys.intern(value)
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in OPTIONAL:
+            raise KeyError(f"'{key}' is not an optional GameRecord field")
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: object) -> bool:
+        return key in _SLOTS and hasattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from FIELDS
+        for field in OPTIONAL:
+            if hasattr(self, field):
+                yield field
+
+    def __len__(self) -> int:
+        return len(FIELDS) + sum(hasattr(self, field) for field in OPTIONAL)
+
+    def __repr__(self) -> str:
+        return f"GameRecord({self.color} {self.result} vs {self.opponent}, {self.url})"
+
+
+class _TextColumn:
+    """Strings packed end to end in one buffer, addressed by offsets."""
+
+    __slots__ = ("_data", "_ends")
+
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array("Q")
+
+    def append(self, text: str) -> None:
+        self._data += text.encode("utf-8")
+        self._ends.append(len(self._data))
+
+    def __getitem__(self, i: int) -> str:
+        start = self._ends[i - 1] if i else 0
+        return self._data[start:self._ends[i]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return len(self._data) + self._ends.itemsize * len(self._ends)
+
+
+class GameTable(Sequence):
+    """
+    Column-oriented collection of games. Indexing returns a new GameRecord
+    (a copy: set engine blunders or annotations before adding games, not on
+    the records read back); slicing returns a GameTable.
+    """
+
+    def __init__(self, games: Iterable[Mapping] = ()):
+        self._categories = {field: [] for field in _CATEGORICAL}   # code → value
+        self._lookup     = {field: {} for field in _CATEGORICAL}   # value → code
+        self._codes      = {field: array("I") for field in _CATEGORICAL}
+        self._integers   = {field: array(code) for field, code in _INTEGER.items()}
+        self._text       = {field: _TextColumn() for field in _TEXT}
+        self._optional: dict[int, dict] = {}   # game index → its optional fields
+        self._length = 0
+        self.extend(games)
+
+    def append(self, game: Mapping) -> None:
+        for field in _CATEGORICAL:
+            value  = game[field]
+            lookup = self._lookup[field]
+            code   = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(lookup)
+                self._categories[field].append(sys.intern(value))
+            self._codes[field].append(code)
+        for field, column in self._integers.items():
+            column.append(game[field])
+        for field, column in self._text.items():
+            column.append(game[field])
+        extra = {field: game[field] for field in OPTIONAL if field in game}
+        if extra:
+            self._optional[self._length] = extra
+        self._length += 1
+
+    def extend(self, games: Iterable[Mapping]) -> None:
+        for game in games:
+            self.append(game)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _record(self, i: int) -> GameRecord:
+        values = {}
+        for field in _CATEGORICAL:
+            values[field] = self._categories[field][self._codes[field][i]]
+        for field, column in self._integers.items():
+            values[field] = column[i]
+        for field, column in self._text.items():
+            values[field] = column[i]
+        record = GameRecord(**values)
+        for field, value in self._optional.get(i, {}).items():
+            setattr(record, field, value)
+        return record
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return GameTable(self._record(i) for i in range(self._length)[index])
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("GameTable index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for i in range(self._length):
+            yield self._record(i)
+
+    def column(self, field: str) -> list:
+        """Every game's value of one field, in order, without building records."""
+        if field in self._codes:
+            categories = self._categories[field]
+            return [categories[code] for code in self._codes[field]]
+        if field in self._integers:
+            return self._integers[field].tolist()
+        if field in self._text:
+            column = self._text[field]
+            return [column[i] for i in range(self._length)]
+        if field in OPTIONAL:
+            return [self._optional.get(i, {}).get(field) for i in range(self._length)]
+        raise KeyError(field)
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns (category strings excluded)."""
+        total  = sum(c.itemsize * len(c) for c in self._codes.values())
+        total += sum(c.itemsize * len(c) for c in self._integers.values())
+        total += sum(c.nbytes() for c in self._text.values())
+        return total
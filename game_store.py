@@ -0,0 +1,198 @@
+"""
+Local SQLite store of parsed games, used to sync each platform incrementally.
+
+Games are kept per (platform, username) and deduplicated by game URL, so a
+re-sync that overlaps earlier downloads is harmless. Each sync scope — one
+platform, user and time class — records how deep it has been backfilled and the
+newest game it has seen, letting the platform modules ask only for games
+played after that point:
+
+    store = GameStore()
+    games = analyst.sync_games(store, "magnus", 20, "blitz")
+
+`played_at` is the timestamp each platform's incremental filter works on: game
+start on Lichess (the `since` export parameter), game end on Chess.com.
+
+A stored game gains the export's evals and clocks when it is synced again
+with annotations; runs without annotations read games without them.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from archive_cache import CACHE_ROOT
+from game_record import GameRecord, GameTable
+
+DEFAULT_DB_PATH = CACHE_ROOT / "games.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    platform    TEXT    NOT NULL,
+    username    TEXT    NOT NULL,
+    url         TEXT    NOT NULL,
+    time_class  TEXT    NOT NULL,
+    played_at   INTEGER NOT NULL,
+    data        TEXT    NOT NULL,
+    PRIMARY KEY (platform, username, url)
+);
+CREATE INDEX IF NOT EXISTS games_by_user_time
+    ON games (username, platform, time_class, played_at);
+CREATE INDEX IF NOT EXISTS games_by_user
+    ON games (username, platform, played_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    platform    TEXT    NOT NULL,
+    username    TEXT    NOT NULL,
+    scope       TEXT    NOT NULL,
+    depth       INTEGER NOT NULL,
+    high_water  INTEGER NOT NULL,
+    PRIMARY KEY (platform, username, scope)
+);
+"""
+
+# Estimated game duration (initial + 40 × increment, seconds) upper bounds
+_SPEED_LIMITS = {
+    "lichess":   [(179, "bullet"), (479, "blitz"), (1499, "rapid")],
+    "chess.com": [(179, "bullet"), (599, "blitz")],
+}
+_SLOWEST = {"lichess": "classical", "chess.com": "rapid"}
+
+
+def sync_scope(time_class: Optional[str], annotations: bool = False) -> str:
+    """
+    Sync-state key for one time class ("all" for every class). Annotated
+    syncs are tracked apart: games first stored without evals and clocks are
+    downloaded again, with them, on the first annotated sync of a scope.
+    """
+    scope = time_class or "all"
+    return f"{scope}+annotations" if annotations else scope
+
+
+def time_class_of(platform: str, time_control: str) -> str:
+    """
+    Classify a PGN TimeControl value ("300+2", "1/86400", "-") into the
+    platform's time classes using its estimated-duration thresholds — for
+    records that carry no time class of their own.
+    """
+    if time_control.startswith("1/") or time_control in ("-", "?", ""):
+        return "daily" if platform == "chess.com" else "correspondence"
+    initial, _, increment = time_control.partition("+")
+    try:
+        estimate = int(initial) + 40 * int(increment or 0)
+    except ValueError:
+        return "unknown"
+    for limit, label in _SPEED_LIMITS[platform]:
+        if estimate <= limit:
+            return label
+    return _SLOWEST[platform]
+
+
+class GameStore:
+    """Thread-safe wrapper around the SQLite game database."""
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ── Games ─────────────────────────────────────────────────────────────────
+
+    def add_games(self, platform: str, username: str, games: list) -> int:
+        """
+        Insert parsed game records, skipping URLs already stored — unless the
+        new record carries annotations (evals or clocks), which then replace
+        the stored one. A record's own time class (Chess.com's archives carry
+        one) is stored as given, and refreshed on stored rows; otherwise it is
+        derived from the time control. Returns rows added.
+        """
+        rows, annotated = [], []
+        for g in games:
+            row = (
+                platform,
+                username.lower(),
+                g["url"],
+                g.get("time_class") or time_class_of(platform, g["time_control"]),
+                g["played_at"],
+                json.dumps(dict(g), separators=(",", ":")),
+            )
+            (annotated if "evals" in g or "clocks" in g else rows).append(row)
+        count = "SELECT COUNT(*) FROM games WHERE username = ? AND platform = ?"
+        with self._lock, self._conn:
+            (before,) = self._conn.execute(count, (username.lower(), platform)).fetchone()
+            self._conn.executemany(
+                "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (platform, username, url) DO UPDATE SET time_class = excluded.time_class",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (platform, username, url) "
+                "DO UPDATE SET time_class = excluded.time_class, data = excluded.data",
+                annotated,
+            )
+            (after,) = self._conn.execute(count, (username.lower(), platform)).fetchone()
+        return after - before
+
+    def load_games(
+        self,
+        platform: str,
+        username: str,
+        time_class: Optional[str] = None,
+        limit: Optional[int] = None,
+        columnar: bool = False,
+        annotations: bool = True,
+    ) -> list:
+        """
+        Return stored game records, most recent first — as a GameTable with
+        `columnar=True`, which bulk reads should prefer. `annotations=False`
+        leaves out any stored evals and clocks.
+        """
+        sql    = "SELECT data FROM games WHERE username = ? AND platform = ?"
+        params: list = [username.lower(), platform]
+        if time_class:
+            sql += " AND time_class = ?"
+            params.append(time_class)
+        sql += " ORDER BY played_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        records = (json.loads(data) for (data,) in rows)
+        if not annotations:
+            records = ({k: v for k, v in r.items() if k not in ("evals", "clocks")} for r in records)
+        games = (GameRecord.from_dict(r) for r in records)
+        return GameTable(games) if columnar else list(games)
+
+    # ── Sync state ────────────────────────────────────────────────────────────
+
+    def sync_state(self, platform: str, username: str, scope: str) -> tuple:
+        """Return (depth, high_water) for a sync scope, or (0, 0) if never synced."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT depth, high_water FROM sync_state "
+                "WHERE platform = ? AND username = ? AND scope = ?",
+                (platform, username.lower(), scope),
+            ).fetchone()
+        return row or (0, 0)
+
+    def record_sync(
+        self, platform: str, username: str, scope: str, depth: int, games: list
+    ) -> None:
+        """Advance a scope's backfill depth and newest-seen timestamp."""
+        old_depth, old_high = self.sync_state(platform, username, scope)
+        high = max([old_high] + [g["played_at"] for g in games])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                (platform, username.lower(), scope, max(depth, old_depth), high),
+            )
@@ -0,0 +1,132 @@
+"""
+Shared HTTP client for the platform modules.
+
+Every Lichess and Chess.com request goes through one `requests.Session`, so
+connections are kept alive and pooled per host instead of paying a fresh
+TCP + TLS handshake per call. Responses are negotiated gzip-compressed.
+
+Transient failures — connection errors, timeouts and 429/5xx responses — are
+retried with jittered exponential backoff, honouring Retry-After when the
+server sends it. Callers still receive an ordinary `requests.Response` and call
+`raise_for_status()` themselves.
+
+Timing hooks registered with `add_timing_hook` are called with every response
+(including retried attempts); `response.elapsed` holds the time to headers.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:   # requests loads with the session, on the first request
+    import requests
+
+USER_AGENT = "chess-coach/1.0 (https://github.com/ar0000n/chess-coach)"
+
+MAX_RETRIES    = 3                      # attempts after the first
+BACKOFF_BASE   = 0.5                    # seconds; doubles each attempt
+BACKOFF_CAP    = 30.0                   # longest single wait
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+POOL_SIZE      = 10                     # keep-alive connections per host
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+_timing_hooks: list = []
+
+
+def session() -> "requests.Session":
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({
+                "User-Agent":      USER_AGENT,
+                "Accept-Encoding": "gzip, deflate",
+            })
+            _session = s
+        return _session
+
+
+def add_timing_hook(hook: Callable[["requests.Response"], None]) -> None:
+    """Register a callable invoked with each response as soon as headers arrive."""
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: Callable[["requests.Response"], None]) -> None:
+    _timing_hooks.remove(hook)
+
+
+def _backoff(attempt: int, response: Optional["requests.Response"]) -> float:
+    """Seconds to wait before retry `attempt` — Retry-After, else full jitter."""
+    if response is not None:
+        header = response.headers.get("Retry-After", "")
+        if header:
+            try:
+                return min(max(float(header), 0.0), BACKOFF_CAP)
+            except ValueError:
+                pass
+            try:
+                when = parsedate_to_datetime(header)
+                delay = (when - datetime.now(timezone.utc)).total_seconds()
+                return min(max(delay, 0.0), BACKOFF_CAP)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    retries: int = MAX_RETRIES,
+    on_backoff: Optional[Callable[[float], None]] = None,
+    **kwargs,
+) -> "requests.Response":
+    """
+    Send a request through the shared session, retrying transient failures.
+    `on_backoff`, if given, is called with the delay before each retry (used by
+    rate limiters to hold back other workers). Remaining keyword arguments are
+    passed to `requests.Session.request`.
+    Raises requests.RequestException once retries are exhausted on a network
+    error; an HTTP error status is returned for the caller to raise.
+    """
+    import requests
+
+    attempt = 0
+    while True:
+        try:
+            response = session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            delay = _backoff(attempt, None)
+        else:
+            for hook in _timing_hooks:
+                hook(response)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = _backoff(attempt, response)
+            response.close()
+
+        if on_backoff is not None:
+            on_backoff(delay)
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    return request("POST", url, **kwargs)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Scan a Lichess database export (https://database.lichess.org/) for the games
+of a few players, across every core, within a fixed memory ceiling.
+
+The monthly `.pgn.zst` files hold tens of millions of games, nearly all of
+them irrelevant to any one player. The export is stream-decompressed in the
+main process and cut into chunks on game boundaries; worker processes then
+search each chunk for `[White "name"]` / `[Black "name"]` header lines with a
+single case-insensitive regex — no game is split into moves unless one of the
+players is in it — and parse only the matches into game records.
+
+At most a fixed number of chunks are in flight at once, so memory stays at
+roughly `--memory-mb` however large the export is. Matches are written
+straight into the local game store and/or to a JSON-lines file, as they
+arrive. They go in as stored history only — no sync state is recorded, since
+an export covers one past month and says nothing about the player's latest
+games — so the next analyst.sync_games still downloads the recent games and
+loads them together with these. Progress and the final summary report
+decompressed MB/s.
+
+Usage:
+    python lichess_dump.py lichess_db_standard_rated_2026-01.pgn.zst magnus
+    python lichess_dump.py dump.pgn.zst magnus hikaru --workers 8 --memory-mb 1024
+    python lichess_dump.py dump.pgn.zst magnus --output magnus.jsonl --no-store
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+
+import zstandard
+
+import analyst
+from game_record import GameRecord
+from game_store import GameStore
+
+DEFAULT_MEMORY_MB    = 512
+IN_FLIGHT_PER_WORKER = 2          # chunks queued per worker, so none sits idle
+MIN_CHUNK            = 1 << 20    # 1 MiB
+MAX_CHUNK            = 64 << 20   # 64 MiB
+PROGRESS_INTERVAL    = 5.0        # seconds between progress lines
+MAX_CARRY_CHUNKS     = 4          # chunk sizes read without a game boundary before giving up
+
+# blank line, then the next game's first tag pair (LF or CRLF line endings)
+_GAME_START = re.compile(rb"\r?\n\r?\n\[")
+
+
+# ── Chunking ──────────────────────────────────────────────────────────────────
+
+def chunk_size(memory_bytes: int, workers: int) -> int:
+    """
+    Chunk size that keeps the scan's buffers under `memory_bytes`: every
+    in-flight chunk exists once in this process and once in its worker, and
+    cutting the next chunk briefly holds the read, the joined buffer, the cut
+    chunk and its tail. The decompressor's window (set by the export's frame
+    header, 8 MiB or less without --long) comes on top.
+    """
+    copies = 2 * workers * IN_FLIGHT_PER_WORKER + 4
+    return max(MIN_CHUNK, min(MAX_CHUNK, memory_bytes // copies))
+
+
+def decompressed(path: Path, raw: BinaryIO) -> BinaryIO:
+    """The decompressed byte stream of an export opened as `raw` (plain PGN as-is)."""
+    if path.suffix.lower() != ".zst":
+        return raw
+    # accept exports recompressed with `zstd --long` (windows above 128 MiB)
+    return zstandard.ZstdDecompressor(max_window_size=2**31).stream_reader(raw, closefd=False)
+
+
+def last_game_start(buffer: bytes, end: Optional[int] = None) -> int:
+    """
+    Offset of the `[` opening the last game that starts before `end` (default:
+    the end of `buffer`), or -1 if there is none. Searches backwards from
+    `end` in growing windows, so a chunk's tail is all it usually reads.
+    """
+    end    = len(buffer) if end is None else end
+    window = 1 << 16
+    while True:
+        low  = max(0, end - window)
+        last = None
+        for last in _GAME_START.finditer(buffer, low, end):
+            pass
+        if last is not None:
+            return last.end() - 1
+        if low == 0:
+            return -1
+        window *= 4
+
+
+def iter_chunks(stream: BinaryIO, size: int) -> Iterator[bytes]:
+    """
+    Read `stream` in pieces of about `size` bytes, each cut just before the
+    start of a game so no game is split across chunks.
+    Raises ValueError if MAX_CARRY_CHUNKS chunk sizes go by without a game
+    boundary — the input is not a PGN export.
+    """
+    carry = b""
+    while True:
+        data = stream.read(size)
+        if not data:
+            break
+        buffer = carry + data
+        cut    = last_game_start(buffer)
+        if cut <= 0:
+            if len(buffer) > MAX_CARRY_CHUNKS * size:
+                raise ValueError(
+                    f"no game boundary in {len(buffer) / 2**20:,.1f} MiB — not a PGN export?"
+                )
+            carry = buffer   # one game longer than a chunk — keep reading
+            continue
+        yield buffer[:cut]
+        carry = buffer[cut:]
+    if carry.strip():
+        yield carry
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+
+def player_pattern(usernames: list[str]) -> re.Pattern:
+    """Regex for a White or Black header line naming any of `usernames`."""
+    names = b"|".join(re.escape(name.encode()) for name in usernames)
+    return re.compile(rb'^\[(?:White|Black) "(' + names + rb')"\]', re.M | re.I)
+
+
+def scan_chunk(chunk: bytes, pattern: re.Pattern, annotations: bool) -> tuple[int, list]:
+    """
+    Return (games in the chunk, [(username, GameRecord), ...]) for the games
+    whose White or Black header matches `pattern`. Only those games are
+    decoded and parsed.
+    """
+    matches = []
+    seen    = set()
+    for match in pattern.finditer(chunk):
+        start = max(last_game_start(chunk, match.start()), 0)
+        username = match.group(1).decode("utf-8", "replace").lower()
+        if (start, username) in seen:
+            continue
+        seen.add((start, username))
+        end  = _GAME_START.search(chunk, match.end())
+        text = chunk[start:end.start() if end else len(chunk)].decode("utf-8", "replace")
+        for game in analyst.parse_games(text, username, annotations=annotations):
+            matches.append((username, game))
+    return chunk.count(b'\n[Event "') + chunk.startswith(b'[Event "'), matches
+
+
+# ── Scan ──────────────────────────────────────────────────────────────────────
+
+def scan_export(
+    path: Path,
+    usernames: list[str],
+    workers: Optional[int] = None,
+    memory_mb: int = DEFAULT_MEMORY_MB,
+    annotations: bool = False,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> Iterator[tuple[str, GameRecord]]:
+    """
+    Yield (lower-cased username, game record) for every game of `usernames`
+    in the export at `path`, in file order. `on_progress`, if given, is called
+    every PROGRESS_INTERVAL seconds and once at the end with the running
+    counts: {"bytes_in", "bytes_out", "games", "matches", "seconds"}.
+    """
+    workers = workers or os.cpu_count() or 1
+    size    = chunk_size(memory_mb * 2**20, workers)
+    pattern = player_pattern(usernames)
+    stats   = {"bytes_in": 0, "bytes_out": 0, "games": 0, "matches": 0, "seconds": 0.0}
+    started = time.perf_counter()
+    last_report = started
+
+    with path.open("rb") as raw_file, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        stream  = decompressed(path, raw_file)
+        pending: deque = deque()
+
+        def drain(limit: int) -> Iterator[tuple[str, GameRecord]]:
+            nonlocal last_report
+            while len(pending) > limit:
+                games, matches = pending.popleft().result()
+                stats["games"]   += games
+                stats["matches"] += len(matches)
+                yield from matches
+                now = time.perf_counter()
+                if on_progress is not None and now - last_report >= PROGRESS_INTERVAL:
+                    stats["seconds"] = now - started
+                    on_progress(dict(stats))
+                    last_report = now
+
+        try:
+            for chunk in iter_chunks(stream, size):
+                stats["bytes_out"] += len(chunk)
+                stats["bytes_in"]   = raw_file.tell()   # compressed bytes consumed
+                pending.append(pool.submit(scan_chunk, chunk, pattern, annotations))
+                del chunk
+                yield from drain(workers * IN_FLIGHT_PER_WORKER - 1)
+            yield from drain(0)
+        finally:
+            for future in pending:
+                future.cancel()
+            if stream is not raw_file:
+                stream.close()
+
+    stats["bytes_in"] = path.stat().st_size
+    stats["seconds"]  = time.perf_counter() - started
+    if on_progress is not None:
+        on_progress(dict(stats))
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def _progress_line(stats: dict) -> str:
+    seconds = max(stats["seconds"], 1e-9)
+    return (
+        f"{stats['bytes_out'] / 1e6:,.0f} MB decompressed "
+        f"({stats['bytes_out'] / 1e6 / seconds:,.1f} MB/s, "
+        f"{stats['bytes_in'] / 1e6 / seconds:,.1f} MB/s compressed), "
+        f"{stats['games']:,} games scanned, {stats['matches']:,} matched"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find players' games in a Lichess database export, in parallel.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Examples:\n"
+            "  python lichess_dump.py lichess_db_standard_rated_2026-01.pgn.zst magnus\n"
+            "  python lichess_dump.py dump.pgn.zst magnus hikaru --workers 8 --memory-mb 1024\n"
+            "  python lichess_dump.py dump.pgn.zst magnus --output magnus.jsonl --no-store"
+        ),
+    )
+    parser.add_argument("export", type=Path, help="Lichess export (.pgn.zst or plain .pgn)")
+    parser.add_argument("usernames", nargs="+", metavar="username", help="Players to extract")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Worker processes for header filtering and parsing (default: one per core)",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=int,
+        default=DEFAULT_MEMORY_MB,
+        metavar="MB",
+        help=f"Approximate ceiling for chunk buffers in flight (default: {DEFAULT_MEMORY_MB})",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        metavar="PATH",
+        help="Also write matched games as JSON lines ({\"username\": ..., \"game\": {...}})",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Do not add matched games to the local game store",
+    )
+    parser.add_argument(
+        "--annotations",
+        action="store_true",
+        help="Keep each move's [%%eval] and [%%clk] (see game_annotations)",
+    )
+    args = parser.parse_args()
+
+    if args.no_store and not args.output:
+        parser.error("--no-store needs --output, or the matches go nowhere")
+    if not args.export.exists():
+        print(f"Error: {args.export} not found.", file=sys.stderr)
+        sys.exit(1)
+
+    store  = None if args.no_store else GameStore()
+    output = args.output.open("w", encoding="utf-8") if args.output else None
+    counts: Counter = Counter()
+    batch:  list = []
+
+    def flush() -> None:
+        if store is not None:
+            for username in {u for u, _ in batch}:
+                store.add_games("lichess", username, [g for u, g in batch if u == username])
+        batch.clear()
+
+    def report(stats: dict) -> None:
+        print(f"  {_progress_line(stats)}", file=sys.stderr, flush=True)
+
+    workers = args.workers or os.cpu_count() or 1
+    print(
+        f"Scanning {args.export.name} for {', '.join(args.usernames)} with {workers} "
+        f"worker{'s' if workers != 1 else ''} (chunks of "
+        f"{chunk_size(args.memory_mb * 2**20, workers) / 2**20:.0f} MiB)...",
+        file=sys.stderr,
+    )
+    final: dict = {}
+    try:
+        for username, game in scan_export(
+            args.export, args.usernames, workers, args.memory_mb, args.annotations,
+            on_progress=lambda s: (final.update(s), report(s)),
+        ):
+            counts[username] += 1
+            batch.append((username, game))
+            if output is not None:
+                output.write(json.dumps({"username": username, "game": dict(game)}) + "\n")
+            if len(batch) >= 1000:
+                flush()
+        flush()
+    except zstandard.ZstdError as e:
+        print(f"Error: could not decompress {args.export} ({e}).", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {args.export}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output is not None:
+            output.close()
+
+    print(f"\nDone in {final['seconds']:.1f}s — {_progress_line(final)}")
+    for username in args.usernames:
+        print(f"  {username}: {counts[username.lower()]:,} games")
+    if store is not None:
+        print("Games added to the local game store.")
+    if output is not None:
+        print(f"Games written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Shared Claude call used by the analyst and coach agents.
+
+Requests are built for Anthropic prompt caching. The system prompt always
+carries a cache breakpoint. A caller can also mark the user message as
+cacheable: it is then sent as one content block per paragraph with a
+breakpoint near the end, so a later request that repeats those paragraphs
+(e.g. the same games plus a few new ones appended) reads them from the cache
+instead of paying full input price and prefill time again.
+
+Complete replies are also kept in a local content-addressed response cache
+(see response_cache), so an identical request is replayed from disk without an
+API call. Disable it with `response_cache.enabled = False` (--no-cache).
+
+Cache activity is reported on stderr after each call, keeping stdout clean for
+piping analyst output into the coach. When a timing trace is being recorded,
+each call's time to first token, output rate and token counts go into it too
+(see timing).
+
+The SDK is imported on the first real API call, not with this module: a
+replayed reply, or a run that stops before reaching Claude, never pays for it.
+The client is then kept for the life of the process, so a long-running worker
+(see worker.py) reuses its pooled connections across calls. Identical requests
+made concurrently share one call and its token stream (see single_flight).
+"""
+
+import sys
+import time
+import threading
+from typing import Optional
+
+import timing
+from response_cache import ResponseCache, cache_key
+from single_flight import Flight, SingleFlight
+
+MODEL      = "claude-haiku-4-5-20251001"
+MAX_TOKENS = 2048
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+response_cache = ResponseCache()
+_in_flight     = SingleFlight()   # replies being streamed, by response key
+
+_client      = None
+_client_lock = threading.Lock()
+
+
+def client():
+    """The process-wide Anthropic client, created (and the SDK imported) on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import anthropic
+            _client = anthropic.Anthropic()
+        return _client
+
+
+def cached_system(text: str) -> list[dict]:
+    """System prompt as a single text block with a cache breakpoint."""
+    return [{"type": "text", "text": text, "cache_control": _EPHEMERAL}]
+
+
+def cached_content(text: str, uncached_tail: int = 0) -> list[dict]:
+    """
+    Split a user message into one text block per paragraph, with a cache
+    breakpoint after all but the last `uncached_tail` blocks. Block boundaries
+    let the API match the longest previously cached prefix of the message.
+    """
+    paragraphs = text.split("\n\n")
+    blocks = [
+        {"type": "text", "text": para + ("\n\n" if i < len(paragraphs) - 1 else "")}
+        for i, para in enumerate(paragraphs)
+        if para
+    ]
+    if len(blocks) > uncached_tail:
+        blocks[-1 - uncached_tail]["cache_control"] = _EPHEMERAL
+    return blocks
+
+
+def report_cache_usage(usage) -> None:
+    """Print the prompt-cache hit/miss token counts of one response to stderr."""
+    read    = getattr(usage, "cache_read_input_tokens", 0) or 0
+    written = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    print(
+        f"[prompt cache] {read:,} tokens read, {written:,} written, "
+        f"{usage.input_tokens:,} uncached input, {usage.output_tokens:,} output",
+        file=sys.stderr,
+    )
+
+
+def _record_timing(usage, started: float, first: float, finished: float) -> None:
+    """Add one streamed call's time to first token and token counts to the trace."""
+    generating = finished - first
+    timing.record_llm(
+        model=MODEL,
+        cached=False,
+        ttft_s=round(first - started, 4),
+        seconds=round(finished - started, 4),
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+        cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        output_tokens_per_sec=round(usage.output_tokens / generating, 1) if generating > 0 else None,
+    )
+
+
+def response_key(system: str, user_message: str) -> str:
+    """Response-cache key for a request made with this module's model settings."""
+    return cache_key(MODEL, MAX_TOKENS, system, user_message)
+
+
+def request_params(
+    system: str,
+    user_message: str,
+    cache_message: bool = False,
+    uncached_tail: int = 0,
+) -> dict:
+    """
+    Messages API parameters for one request, with prompt-cache breakpoints.
+    Shared by the streaming path and Message Batches submissions.
+    """
+    if cache_message:
+        content = cached_content(user_message, uncached_tail)
+    else:
+        content = user_message
+    return {
+        "model":      MODEL,
+        "max_tokens": MAX_TOKENS,
+        "system":     cached_system(system),
+        "messages":   [{"role": "user", "content": content}],
+    }
+
+
+def stream_reply(
+    system: str,
+    user_message: str,
+    echo: bool = True,
+    cache_message: bool = False,
+    uncached_tail: int = 0,
+) -> str:
+    """
+    Stream one Claude reply, printing it to stdout as it arrives when `echo`
+    is set, and return the full text. `cache_message` adds a cache breakpoint
+    to the user message (only worth it when its prefix is likely to repeat),
+    leaving the last `uncached_tail` paragraphs after it.
+    A locally cached reply is replayed through the same stdout path instead.
+    If an identical request is already streaming in this process, the call
+    attaches to it and echoes the same tokens rather than making another.
+    """
+    key = response_key(system, user_message)
+    flight, leader = _in_flight.join(key)
+    if not leader:
+        print("[single-flight] identical request in flight — sharing its reply", file=sys.stderr)
+        for text in flight.stream():
+            if echo:
+                print(text, end="", flush=True)
+        reply = flight.wait()
+        timing.record_llm(model=MODEL, shared=True)
+        return reply
+
+    try:
+        reply = _reply(key, system, user_message, echo, cache_message, uncached_tail, flight)
+    except BaseException as e:
+        _in_flight.end(key, flight, error=e)
+        raise
+    _in_flight.end(key, flight, reply)
+    return reply
+
+
+def _reply(
+    key: str,
+    system: str,
+    user_message: str,
+    echo: bool,
+    cache_message: bool,
+    uncached_tail: int,
+    flight: Flight,
+) -> str:
+    """The leader's side of stream_reply: cache replay or API call, published to `flight`."""
+    cached = response_cache.get(key)
+    if cached is not None:
+        flight.emit(cached)
+        if echo:
+            print(cached, end="", flush=True)
+        print("[response cache] hit — replayed without an API call", file=sys.stderr)
+        timing.record_llm(model=MODEL, cached=True)
+        return cached
+
+    params = request_params(system, user_message, cache_message, uncached_tail)
+
+    chunks: list[str] = []
+    started = time.perf_counter()
+    first   = None
+    with client().messages.stream(**params) as stream:
+        for text in stream.text_stream:
+            if first is None:
+                first = time.perf_counter()
+            flight.emit(text)
+            if echo:
+                print(text, end="", flush=True)
+            chunks.append(text)
+        usage = stream.get_final_message().usage
+    finished = time.perf_counter()
+
+    report_cache_usage(usage)
+    _record_timing(usage, started, first or finished, finished)
+    reply = "".join(chunks)
+    response_cache.put(key, reply)
+    return reply
+
+
+def api_error_message(error: BaseException) -> Optional[str]:
+    """
+    What to tell the user about an Anthropic API error, or None when `error`
+    is not one. If the SDK was never imported, no call was made and `error`
+    cannot have come from it — so this never imports the SDK itself.
+    """
+    anthropic = sys.modules.get("anthropic")
+    if anthropic is None:
+        return None
+    if isinstance(error, anthropic.AuthenticationError):
+        return (
+            "Error: invalid or missing API key.\n"
+            "Add it to a .env file: ANTHROPIC_API_KEY=your-key-here"
+        )
+    if isinstance(error, anthropic.APIConnectionError):
+        return "Error: could not connect to the Anthropic API."
+    if isinstance(error, anthropic.APIStatusError):
+        return f"Anthropic API error {error.status_code}: {error.message}"
+    return None
@@ -12,18 +12,22 @@ Usage:
 
 import sys
 import argparse
+import threading
+from concurrent.futures import Future
 from datetime import date
 from pathlib import Path
+from typing import Optional
 
-import requests
-import anthropic
 from dotenv import load_dotenv
 
 import analyst
 import chess_com as chess_com_module
 import coach
-
-load_dotenv()
+import engine_analysis
+import game_format
+import llm
+import timing
+from game_store import GameStore
 
 _PERF_LABEL = {
     "bullet":    "Bullet",
@@ -83,12 +87,16 @@ def save_report(
     perf_types: list,
     analysis: str,
     plan: str,
+    directory: Optional[Path] = None,
 ) -> Path:
-    """Save the combined ratings, analysis, and plan to a markdown file."""
+    """
+    Save the combined ratings, analysis, and plan to a markdown file in
+    `directory` (default: next to this script).
+    """
     platform_slug = platform.replace(".", "")          # chess.com → chesscom
     type_slug     = time_control.lower().replace(" ", "-")
     filename      = f"chess-{username}-{platform_slug}-{type_slug}-{date.today()}.md"
-    output_path   = Path(__file__).parent / filename
+    output_path   = Path(directory or Path(__file__).parent) / filename
 
     ratings_md = format_ratings_markdown(ratings, perf_types)
 
@@ -171,6 +179,111 @@ def main() -> None:
         metavar="MONTH",
         help="Chess.com only: fetch games from this month (1–12). Requires --year.",
     )
+    parser.add_argument(
+        "--pgn",
+        metavar="FILE",
+        help=(
+            "Read games from a large local PGN file (e.g. a Lichess database dump) "
+            "through a persistent offset index instead of downloading them"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the local archive, ratings, engine evaluation and Claude response caches for this run",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Delete all cached archives, ratings and Claude responses before running",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Re-download every game instead of syncing the local game store",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Send games to Claude in the compact encoding (fewer input tokens)",
+    )
+    parser.add_argument(
+        "--max-plies",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Trim each game to its first N plies before analysis",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=game_format.DEFAULT_TOKEN_BUDGET,
+        metavar="N",
+        help=(
+            "Maximum input tokens for the game block; long games are trimmed, "
+            f"then the oldest dropped, to fit (default: {game_format.DEFAULT_TOKEN_BUDGET:,})"
+        ),
+    )
+    parser.add_argument(
+        "--exact-tokens",
+        action="store_true",
+        help="Measure the token budget with Anthropic's token-counting endpoint",
+    )
+    parser.add_argument(
+        "--features",
+        action="store_true",
+        help="Add precomputed game features (castling, development, phases, material) for the analyst",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Directory to save the report in (default: next to main.py)",
+    )
+    parser.add_argument(
+        "--annotations",
+        action="store_true",
+        help="Use the platform's embedded evals and clock times (blunders, think time, time trouble)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Write a JSON timing trace of the run (stages, HTTP, Claude TTFT and tokens) to PATH",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print a per-stage timing table to stderr at the end of the run",
+    )
+    parser.add_argument(
+        "--engine",
+        metavar="PATH",
+        help="UCI engine (e.g. stockfish) to find blunders in every game before analysis",
+    )
+    parser.add_argument(
+        "--engine-depth",
+        type=int,
+        default=engine_analysis.DEFAULT_DEPTH,
+        metavar="N",
+        help=f"Search depth per position with --engine (default: {engine_analysis.DEFAULT_DEPTH})",
+    )
+    parser.add_argument(
+        "--engine-nodes",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Search N nodes per position instead of a fixed depth",
+    )
+    parser.add_argument(
+        "--engine-workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Engine processes to run in parallel (default: one per core)",
+    )
     args = parser.parse_args()
 
     # Validate arg combinations
@@ -182,6 +295,49 @@ def main() -> None:
         parser.error("--type Classical is only valid for Lichess. Use Daily for Chess.com.")
     if args.platform == "lichess" and (args.year or args.month):
         parser.error("--year and --month are only supported for Chess.com.")
+    if args.pgn and args.platform != "lichess":
+        parser.error("--pgn reads Lichess-style PGN files; use it without --platform chess.com.")
+    load_dotenv()
+
+    if args.trace or args.timings:
+        timing.start()
+    try:
+        with timing.span("run", platform=args.platform, games_requested=args.games):
+            _run(args)
+    finally:
+        # Also reached through sys.exit, so failed runs leave a trace too
+        if timing.enabled():
+            timing.stop()
+            if args.trace:
+                timing.write_trace(args.trace, argv=sys.argv[1:])
+                print(f"Timing trace written to {args.trace}", file=sys.stderr)
+            if args.timings:
+                print("\n" + timing.summary(), file=sys.stderr)
+
+
+def _in_background(fn, *args, **kwargs) -> Future:
+    """
+    Run `fn` on a daemon thread and return a Future for its result. Unlike a
+    ThreadPoolExecutor's workers, the thread is not joined at interpreter exit,
+    so an early sys.exit does not wait for it to finish.
+    """
+    future = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _run(args: argparse.Namespace) -> None:
+    """Fetch, analyse, plan and save for the parsed command line."""
+    import requests   # not at module level: --help and rejected arguments never need it
 
     # Resolve platform-specific settings
     if args.platform == "lichess":
@@ -197,36 +353,73 @@ def main() -> None:
 
     type_label = f" {args.type}" if args.type else ""
 
-    # ── Ratings ───────────────────────────────────────────────────────────────
-    print(f"Looking up ratings for '{args.username}' on {args.platform}...")
-    try:
-        ratings = platform_mod.fetch_user_ratings(args.username)
-    except requests.HTTPError as e:
-        status = e.response.status_code
-        if status == 404:
-            print(f"Error: user '{args.username}' not found on {args.platform}.", file=sys.stderr)
-            sys.exit(1)
-        print(f"Warning: could not fetch ratings (HTTP {status}). Continuing...")
-        ratings = {}
-    except requests.RequestException as e:
-        print(f"Warning: network error fetching ratings ({e}). Continuing...")
-        ratings = {}
+    if args.clear_cache:
+        removed = chess_com_module.archive_cache.clear()
+        print(f"Cleared {removed} cached archive{'s' if removed != 1 else ''}.")
+        removed = analyst.ratings_cache.clear() + chess_com_module.ratings_cache.clear()
+        print(f"Cleared {removed} cached rating{'s' if removed != 1 else ''}.")
+        removed = llm.response_cache.clear()
+        print(f"Cleared {removed} cached response{'s' if removed != 1 else ''}.")
+    if args.no_cache:
+        chess_com_module.archive_cache.enabled = False
+        chess_com_module.ratings_cache.enabled = False
+        analyst.ratings_cache.enabled = False
+        llm.response_cache.enabled = False
+
+    # ── Ratings + games ───────────────────────────────────────────────────────
+    # The ratings lookup and the game download are independent, so both
+    # requests go out at once and ratings are shown as soon as they land.
+    # An unknown user exits straight away, without waiting for the download.
+    # A --pgn run stays offline: the file's player need not have an account
+    # on the platform, so there is no ratings lookup at all.
+    store = None if args.no_store else GameStore()
+    source = args.pgn or args.platform
+    ratings_future = None
+    if not args.pgn:
+        print(f"Looking up ratings for '{args.username}' on {args.platform}...")
+        ratings_future = _in_background(
+            timing.in_span(platform_mod.fetch_user_ratings, "ratings"), args.username
+        )
+    print(f"Fetching last {args.games}{type_label} games for '{args.username}' from {source}...")
+    if args.pgn:
+        games_future = _in_background(
+            timing.in_span(analyst.collect_file_games), args.pgn, args.username,
+            args.games, perf_type, args.annotations,
+        )
+    elif args.platform == "lichess":
+        games_future = _in_background(
+            timing.in_span(analyst.collect_games), args.username, args.games,
+            perf_type, store, args.annotations,
+        )
+    else:
+        games_future = _in_background(
+            timing.in_span(chess_com_module.collect_games),
+            args.username,
+            time_class=time_class,
+            year=args.year,
+            month=args.month,
+            max_games=args.games,
+            store=store,
+            annotations=args.annotations,
+        )
 
-    display_ratings(args.username, ratings, perf_types)
+    ratings = {}
+    if ratings_future is not None:
+        try:
+            ratings = ratings_future.result()
+        except requests.HTTPError as e:
+            status = e.response.status_code
+            if status == 404:
+                print(f"Error: user '{args.username}' not found on {args.platform}.", file=sys.stderr)
+                sys.exit(1)
+            print(f"Warning: could not fetch ratings (HTTP {status}). Continuing...")
+        except requests.RequestException as e:
+            print(f"Warning: network error fetching ratings ({e}). Continuing...")
+
+        display_ratings(args.username, ratings, perf_types)
 
-    # ── Step 1: Analyst ───────────────────────────────────────────────────────
-    print(f"Fetching last {args.games}{type_label} games for '{args.username}' from {args.platform}...")
     try:
-        if args.platform == "lichess":
-            analysis = analyst.run(args.username, args.games, perf_type)
-        else:
-            analysis = chess_com_module.run(
-                args.username,
-                time_class=time_class,
-                year=args.year,
-                month=args.month,
-                max_games=args.games,
-            )
+        games = games_future.result()
     except requests.HTTPError as e:
         status = e.response.status_code
         if status == 404:
@@ -237,44 +430,71 @@ def main() -> None:
     except requests.RequestException as e:
         print(f"Network error: {e}", file=sys.stderr)
         sys.exit(1)
-    except ValueError as e:
+    except (OSError, ValueError) as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
-    except anthropic.AuthenticationError:
+
+    if args.engine:
+        import chess.engine
+        print(f"Evaluating every position with {args.engine}...")
+        cache = None if args.no_cache else engine_analysis.EvalCache()
+        try:
+            with timing.span("engine", games=len(games)) as span:
+                counts = engine_analysis.annotate_games(
+                    games, args.engine, args.engine_depth, args.engine_nodes,
+                    args.engine_workers, cache,
+                )
+                span.update(counts)
+        except (OSError, chess.engine.EngineError, chess.engine.EngineTerminatedError) as e:
+            print(f"Error: engine analysis failed ({e}).", file=sys.stderr)
+            sys.exit(1)
         print(
-            "Error: invalid or missing API key.\n"
-            "Add it to a .env file: ANTHROPIC_API_KEY=your-key-here",
-            file=sys.stderr,
+            f"Engine: {counts['positions']:,} unique positions, "
+            f"{counts['cached']:,} from cache, {counts['evaluated']:,} searched."
         )
+
+    # ── Step 1: Analyst ───────────────────────────────────────────────────────
+    count_tokens = (
+        game_format.api_token_counter(analyst.SYSTEM_PROMPT, llm.MODEL)
+        if args.exact_tokens else game_format.estimate_tokens
+    )
+    try:
+        game_data = platform_mod.format_for_claude(
+            games,
+            args.username,
+            compact=args.compact,
+            max_plies=args.max_plies,
+            token_budget=args.token_budget,
+            count_tokens=count_tokens,
+            features=args.features,
+        )
+        analysis = analyst.analyse(args.username, game_data)
+    except ValueError as e:   # the token budget cannot fit a single game
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
-    except anthropic.APIConnectionError:
-        print("Error: could not connect to the Anthropic API.", file=sys.stderr)
-        sys.exit(1)
-    except anthropic.APIStatusError as e:
-        print(f"Anthropic API error {e.status_code}: {e.message}", file=sys.stderr)
+    except Exception as e:
+        message = llm.api_error_message(e)
+        if message is None:
+            raise
+        print(message, file=sys.stderr)
         sys.exit(1)
 
     # ── Step 2: Coach ─────────────────────────────────────────────────────────
     try:
         plan = coach.run(args.username, time_control, analysis)
-    except anthropic.AuthenticationError:
-        print(
-            "Error: invalid or missing API key.\n"
-            "Add it to a .env file: ANTHROPIC_API_KEY=your-key-here",
-            file=sys.stderr,
-        )
-        sys.exit(1)
-    except anthropic.APIConnectionError:
-        print("Error: could not connect to the Anthropic API.", file=sys.stderr)
-        sys.exit(1)
-    except anthropic.APIStatusError as e:
-        print(f"Anthropic API error {e.status_code}: {e.message}", file=sys.stderr)
+    except Exception as e:
+        message = llm.api_error_message(e)
+        if message is None:
+            raise
+        print(message, file=sys.stderr)
         sys.exit(1)
 
     # ── Step 3: Save ─────────────────────────────────────────────────────────
-    output_path = save_report(
-        args.username, args.platform, time_control, ratings, perf_types, analysis, plan
-    )
+    with timing.span("save"):
+        output_path = save_report(
+            args.username, args.platform, time_control, ratings, perf_types, analysis, plan,
+            args.output_dir,
+        )
     print(f"\nReport saved to: {output_path}")
 
 
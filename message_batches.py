@@ -0,0 +1,262 @@
+"""
+Message Batches mode for batch.py — overnight bulk reports at batch pricing.
+
+Instead of streaming each analyst and coach call interactively, the whole
+roster goes through Anthropic's Message Batches API in two rounds:
+
+    1. fetch ratings and games for every job (concurrently, as batch.py does)
+    2. submit every analyst request as one batch, poll until it ends
+    3. submit the dependent coach requests as a second batch, poll
+    4. write every report via main.save_report
+
+Progress is checkpointed to a JSON state file after every step, including the
+batch ids as soon as they are created, so a crashed or interrupted run picks
+up where it left off: finished fetches are not repeated, and a batch that was
+already submitted is polled rather than paid for twice. Replies also go into
+the local response cache, so a later interactive run reuses them.
+"""
+
+import os
+import json
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import anthropic
+import requests
+
+import analyst
+import coach
+import llm
+from batch import Job, JobResult, _log, fetch_inputs, save_job_report
+from game_store import GameStore
+
+DEFAULT_POLL_INTERVAL = 60   # seconds between batch status checks
+
+
+# ── State file ────────────────────────────────────────────────────────────────
+
+def _custom_id(index: int) -> str:
+    return f"job-{index:03d}"
+
+
+def _new_state(jobs: list[Job]) -> dict:
+    return {
+        "jobs":    [list(job) for job in jobs],
+        "results": {_custom_id(i): {} for i in range(len(jobs))},
+        "batches": {},
+    }
+
+
+def load_state(path: Path, jobs: list[Job]) -> dict:
+    """
+    Load the checkpoint at `path`, or start a fresh one. Raises ValueError if
+    the checkpoint belongs to a different jobs list.
+    """
+    try:
+        with path.open(encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return _new_state(jobs)
+    if state.get("jobs") != [list(job) for job in jobs]:
+        raise ValueError(
+            f"{path} was written for a different jobs list — delete it to start over"
+        )
+    return state
+
+
+def save_state(path: Path, state: dict) -> None:
+    """Write the checkpoint atomically so a crash never leaves it half-written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+# ── Batch rounds ──────────────────────────────────────────────────────────────
+
+def _reply_text(message) -> str:
+    return "".join(block.text for block in message.content if block.type == "text")
+
+
+def _wait_for_batch(client: anthropic.Anthropic, batch_id: str, poll_interval: float):
+    """Poll a batch until processing has ended, printing progress."""
+    while True:
+        batch  = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(
+            f"  {batch_id}: {batch.processing_status} — {counts.processing} processing, "
+            f"{counts.succeeded} succeeded, {counts.errored} errored, "
+            f"{counts.expired} expired",
+            flush=True,
+        )
+        if batch.processing_status == "ended":
+            return
+        time.sleep(poll_interval)
+
+
+def run_round(
+    client: anthropic.Anthropic,
+    name: str,
+    prompts: dict,
+    system: str,
+    state: dict,
+    state_path: Path,
+    poll_interval: float,
+) -> dict:
+    """
+    Get a reply for every {custom_id: user message} in `prompts`, answering
+    from the response cache where possible and sending the rest as one batch.
+    Returns {custom_id: reply text}; failed requests are recorded in the
+    state's per-job error instead.
+    """
+    replies = {}
+    pending = {}
+    for custom_id, message in prompts.items():
+        cached = llm.response_cache.get(llm.response_key(system, message))
+        if cached is not None:
+            replies[custom_id] = cached
+        else:
+            pending[custom_id] = message
+    if replies:
+        print(f"{name}: {len(replies)} replies from the response cache")
+    if not pending:
+        return replies
+
+    batch_id = state["batches"].get(name)
+    if batch_id is None:
+        batch = client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": llm.request_params(system, message),
+            }
+            for custom_id, message in pending.items()
+        ])
+        batch_id = batch.id
+        state["batches"][name] = batch_id
+        save_state(state_path, state)
+        print(f"{name}: submitted {len(pending)} requests as {batch_id}")
+    else:
+        print(f"{name}: resuming {batch_id}")
+
+    _wait_for_batch(client, batch_id, poll_interval)
+
+    for entry in client.messages.batches.results(batch_id):
+        message = pending.get(entry.custom_id)
+        if message is None:
+            continue
+        if entry.result.type == "succeeded":
+            text = _reply_text(entry.result.message)
+            llm.response_cache.put(llm.response_key(system, message), text)
+            replies[entry.custom_id] = text
+        else:
+            state["results"][entry.custom_id]["error"] = f"{name} request {entry.result.type}"
+    for custom_id in pending.keys() - replies.keys():
+        state["results"][custom_id].setdefault("error", f"{name} request has no result")
+    return replies
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+
+def _fetch_all(
+    jobs: list[Job],
+    max_games: int,
+    fetch_workers: int,
+    store: Optional[GameStore],
+    state: dict,
+    state_path: Path,
+) -> None:
+    """Fetch inputs for every job not yet fetched, checkpointing each one."""
+    todo = [
+        (i, job) for i, job in enumerate(jobs)
+        if not {"game_data", "error"} & state["results"][_custom_id(i)].keys()
+    ]
+
+    def fetch(item: tuple) -> tuple:
+        i, job = item
+        _log(job, "fetching ratings and games...")
+        try:
+            ratings, n_games, game_data = fetch_inputs(job, max_games, store)
+        except requests.HTTPError as e:
+            status = e.response.status_code
+            return i, {"error": "user not found" if status == 404 else f"HTTP {status}"}
+        except Exception as e:   # isolate per-job failures
+            return i, {"error": f"{type(e).__name__}: {e}"}
+        _log(job, f"{n_games} games ready")
+        return i, {"ratings": ratings, "game_data": game_data}
+
+    with ThreadPoolExecutor(max_workers=max(1, fetch_workers)) as pool:
+        for i, result in pool.map(fetch, todo):
+            state["results"][_custom_id(i)].update(result)
+            save_state(state_path, state)
+
+
+def run_message_batches(
+    jobs: list[Job],
+    state_path: Path,
+    max_games: int = 20,
+    fetch_workers: int = 4,
+    store: Optional[GameStore] = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> list[JobResult]:
+    """
+    Generate every job's report through two Message Batches (analyst, then
+    coach), resuming from `state_path` if it exists.
+    Returns one JobResult per job, in input order.
+    """
+    state   = load_state(state_path, jobs)
+    results = state["results"]
+    client  = anthropic.Anthropic()
+
+    _fetch_all(jobs, max_games, fetch_workers, store, state, state_path)
+
+    def waiting_for(stage: str) -> dict:
+        return {
+            cid: r for cid, r in results.items()
+            if "error" not in r and stage not in r
+        }
+
+    prompts = {
+        cid: analyst.build_user_message(jobs[int(cid[4:])].username, r["game_data"])
+        for cid, r in waiting_for("analysis").items()
+    }
+    if prompts:
+        replies = run_round(
+            client, "analyst", prompts, analyst.SYSTEM_PROMPT, state, state_path,
+            poll_interval,
+        )
+        for cid, text in replies.items():
+            results[cid]["analysis"] = text
+        save_state(state_path, state)
+
+    prompts = {}
+    for cid, r in waiting_for("plan").items():
+        job = jobs[int(cid[4:])]
+        prompts[cid] = coach.build_prompt(
+            job.username, job.type or "all time controls", r["analysis"]
+        )
+    if prompts:
+        replies = run_round(
+            client, "coach", prompts, coach.SYSTEM_PROMPT, state, state_path,
+            poll_interval,
+        )
+        for cid, text in replies.items():
+            results[cid]["plan"] = text
+        save_state(state_path, state)
+
+    out = []
+    for i, job in enumerate(jobs):
+        r = results[_custom_id(i)]
+        if "error" in r:
+            _log(job, f"failed — {r['error']}")
+            out.append(JobResult(job, None, r["error"]))
+            continue
+        if "report" not in r:
+            r["report"] = str(save_job_report(job, r["ratings"], r["analysis"], r["plan"]))
+            save_state(state_path, state)
+        _log(job, f"report saved to {r['report']}")
+        out.append(JobResult(job, Path(r["report"]), None))
+    return out
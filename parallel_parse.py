@@ -0,0 +1,48 @@
+"""
+Multi-core parsing for large game batches.
+
+Splits the input of a `parse_games` function into contiguous chunks, parses
+them across a process pool and concatenates the results in original order.
+Inputs too small to repay the pool's startup and pickling cost are parsed
+in-process instead.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Sequence
+
+# Fewest games worth handing to each worker. The fast path parses thousands of
+# games per second per core, so it needs far larger batches than full replay.
+MIN_GAMES_PER_WORKER = {False: 2000, True: 100}
+CHUNKS_PER_WORKER    = 4    # extra chunks smooth out uneven game lengths
+
+
+def plan_workers(n_games: int, replay: bool, workers: Optional[int] = None) -> int:
+    """Number of worker processes worth starting for `n_games` (1 = in-process)."""
+    available = workers or os.cpu_count() or 1
+    return max(1, min(available, n_games // MIN_GAMES_PER_WORKER[replay]))
+
+
+def parse_in_chunks(
+    parse: Callable[..., list],
+    items: Sequence,
+    replay: bool,
+    workers: Optional[int] = None,
+    join: Optional[Callable[[Sequence], object]] = None,
+) -> list:
+    """
+    Apply `parse` to `items` (one entry per game) across a process pool.
+    `parse` must be picklable and accept one chunk — either a slice of `items`
+    or, when `join` is given, `join(slice)`. Results come back in input order.
+    """
+    n_workers = plan_workers(len(items), replay, workers)
+    if n_workers < 2:
+        return parse(join(items) if join else items)
+
+    size   = -(-len(items) // (n_workers * CHUNKS_PER_WORKER))   # ceiling division
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    if join:
+        chunks = [join(chunk) for chunk in chunks]
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        return [game for parsed in pool.map(parse, chunks) for game in parsed]
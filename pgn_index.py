@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Persistent byte-offset index over a large local PGN file.
+
+Monthly Lichess database dumps and other multi-GB PGN files are far too big to
+load as one string. The file is memory-mapped instead and scanned once: every
+game's byte offset and length, and its White/Black/Date/TimeControl tags, go
+into a SQLite index kept in the cache directory. A query then looks a player's
+games up in the index and decodes only their bytes from the map, so repeat
+queries against the same file take milliseconds:
+
+    with PgnIndex("lichess_db_standard_rated_2026-01.pgn") as index:
+        pgn_text = index.user_pgn("magnus", limit=20, time_class="blitz")
+
+The index records the file's size and modification time and is rebuilt
+whenever either changes. Compressed dumps (.zst, .bz2) must be decompressed
+first — a compressed stream cannot be memory-mapped.
+
+Usage:
+    python pgn_index.py lichess_db_standard_rated_2026-01.pgn
+    python pgn_index.py lichess_db_standard_rated_2026-01.pgn --user magnus
+"""
+
+import re
+import sys
+import mmap
+import time
+import hashlib
+import functools
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Optional
+
+from archive_cache import CACHE_ROOT
+from game_store import time_class_of
+
+DEFAULT_INDEX_DIR = CACHE_ROOT / "pgn-index"
+COMPRESSED_SUFFIXES = (".zst", ".bz2", ".gz", ".xz")
+_BATCH = 50_000   # index rows per INSERT batch
+
+# A run of tag-pair lines opens every game; movetext lines never match, since
+# comment commands look like "[%clk ...]", not '[Tag "...'.
+_HEADER_BLOCK = re.compile(rb'^(?:\[[A-Za-z0-9_]+[ \t]+"[^\r\n]*\][ \t]*\r?\n)+', re.M)
+_FIELD = re.compile(
+    rb'^\[(White|Black|UTCDate|UTCTime|Date|TimeControl)[ \t]+"((?:[^"\\\r\n]|\\.)*)"', re.M
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS source (
+    path        TEXT    NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    games       INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    offset      INTEGER PRIMARY KEY,
+    length      INTEGER NOT NULL,
+    white       TEXT    NOT NULL,
+    black       TEXT    NOT NULL,
+    played      TEXT    NOT NULL,
+    time_class  TEXT    NOT NULL
+);
+"""
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS games_by_white ON games (white, played);
+CREATE INDEX IF NOT EXISTS games_by_black ON games (black, played);
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _time_class(time_control: bytes) -> str:
+    return time_class_of("lichess", time_control.decode("ascii", "replace"))
+
+
+def _index_path(pgn_path: Path, index_dir: Path) -> Path:
+    digest = hashlib.sha256(str(pgn_path).encode()).hexdigest()[:24]
+    return index_dir / f"{pgn_path.stem}-{digest}.db"
+
+
+class PgnIndex:
+    """A memory-mapped PGN file plus its offset index, built on first use."""
+
+    def __init__(self, path, index_dir: Path = DEFAULT_INDEX_DIR):
+        self.path = Path(path).resolve()
+        if self.path.suffix.lower() in COMPRESSED_SUFFIXES:
+            raise ValueError(
+                f"{self.path.name} is compressed — decompress it first "
+                f"(e.g. `zstd -d {self.path.name}`), or scan it with lichess_dump.py"
+            )
+        stat = self.path.stat()   # raises FileNotFoundError for a bad path
+        self._file = self.path.open("rb")
+        self._map  = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        )
+
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(_index_path(self.path, index_dir)))
+        self._conn.executescript(_SCHEMA)
+        if not self._is_current(stat.st_size, stat.st_mtime_ns):
+            self._build(stat.st_size, stat.st_mtime_ns)
+
+    def close(self) -> None:
+        self._conn.close()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "PgnIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT games FROM source").fetchone()[0]
+
+    # ── Building ──────────────────────────────────────────────────────────────
+
+    def _is_current(self, size: int, mtime_ns: int) -> bool:
+        row = self._conn.execute("SELECT size, mtime_ns FROM source").fetchone()
+        return row == (size, mtime_ns)
+
+    def _build(self, size: int, mtime_ns: int) -> None:
+        """Scan the whole file once, recording every game's offset and tags."""
+        data = self._map
+        with self._conn:
+            self._conn.execute("DELETE FROM source")
+            self._conn.execute("DROP INDEX IF EXISTS games_by_white")
+            self._conn.execute("DROP INDEX IF EXISTS games_by_black")
+            self._conn.execute("DELETE FROM games")
+
+            rows:  list = []
+            count = 0
+            previous = None   # (offset, tags) of the game whose end is not yet known
+            for block in _HEADER_BLOCK.finditer(data):
+                if previous is not None:
+                    rows.append(self._row(*previous, block.start()))
+                previous = (block.start(), dict(_FIELD.findall(block.group())))
+                if len(rows) >= _BATCH:
+                    self._insert(rows)
+                    count += len(rows)
+                    rows = []
+            if previous is not None:
+                rows.append(self._row(*previous, size))
+            self._insert(rows)
+            count += len(rows)
+
+            self._conn.executescript(_INDEXES)
+            self._conn.execute(
+                "INSERT INTO source VALUES (?, ?, ?, ?)", (str(self.path), size, mtime_ns, count)
+            )
+
+    @staticmethod
+    def _row(offset: int, tags: dict, end: int) -> tuple:
+        """One index row from a game's raw (bytes) tag values."""
+        date   = tags.get(b"UTCDate") or tags.get(b"Date", b"")
+        played = (date + b" " + tags.get(b"UTCTime", b"")).strip()
+        return (
+            offset,
+            end - offset,
+            tags.get(b"White", b"").decode("utf-8", "replace").lower(),
+            tags.get(b"Black", b"").decode("utf-8", "replace").lower(),
+            played.decode("ascii", "replace"),
+            _time_class(tags.get(b"TimeControl", b"-")),
+        )
+
+    def _insert(self, rows: list) -> None:
+        self._conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def offsets(
+        self,
+        username: str,
+        limit: Optional[int] = None,
+        time_class: Optional[str] = None,
+    ) -> list[tuple[int, int]]:
+        """(offset, length) of `username`'s games, most recent first."""
+        where  = " AND time_class = ?" if time_class else ""
+        params = [username.lower()] + ([time_class] if time_class else [])
+        sql = (
+            f"SELECT offset, length, played FROM games WHERE white = ?{where} "
+            f"UNION "
+            f"SELECT offset, length, played FROM games WHERE black = ?{where} "
+            f"ORDER BY played DESC, offset DESC"
+        )
+        params = params + params
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [(offset, length) for offset, length, _ in self._conn.execute(sql, params)]
+
+    def read(self, offsets: list[tuple[int, int]]) -> str:
+        """Decode the games at `offsets` from the map as one multi-game PGN string."""
+        return "\n\n".join(
+            self._map[offset:offset + length].decode("utf-8", "replace").strip()
+            for offset, length in offsets
+        ) + "\n"
+
+    def user_pgn(
+        self,
+        username: str,
+        limit: Optional[int] = None,
+        time_class: Optional[str] = None,
+    ) -> str:
+        """`username`'s games (most recent first) as multi-game PGN text."""
+        return self.read(self.offsets(username, limit, time_class))
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build (or reuse) the offset index of a large PGN file and query it.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Examples:\n"
+            "  python pgn_index.py lichess_db_standard_rated_2026-01.pgn\n"
+            "  python pgn_index.py lichess_db_standard_rated_2026-01.pgn --user magnus --games 50"
+        ),
+    )
+    parser.add_argument("pgn", type=Path, help="Uncompressed PGN file")
+    parser.add_argument("--user", metavar="NAME", help="Count (and time) this player's games")
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=None,
+        metavar="N",
+        help="With --user, look up at most the N most recent games",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        index = PgnIndex(args.pgn)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    with index:
+        print(f"{len(index):,} games indexed ({time.perf_counter() - start:.2f}s)")
+        if args.user:
+            start   = time.perf_counter()
+            offsets = index.offsets(args.user, args.games)
+            text    = index.read(offsets)
+            print(
+                f"{len(offsets):,} games for '{args.user}', {len(text):,} characters "
+                f"read in {(time.perf_counter() - start) * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
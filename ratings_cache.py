@@ -0,0 +1,97 @@
+"""
+Short-lived local cache for players' current ratings.
+
+Ratings change only when a game finishes, so a lookup made a few minutes ago
+is as good as a new one for a report, a leaderboard or the next job in a
+batch. Each platform gets its own cache; entries are JSON files keyed by a
+hash of the lowercased username (both platforms treat names case-insensitively)
+and expire after `ttl` seconds.
+
+    cache   = RatingsCache("lichess")
+    ratings = cache.get("Magnus")          # None on a miss or expiry
+    cache.put("Magnus", ratings)
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from archive_cache import CACHE_ROOT
+
+DEFAULT_CACHE_DIR = CACHE_ROOT / "ratings"
+DEFAULT_TTL       = 10 * 60   # ten minutes
+
+
+class RatingsCache:
+    """Per-user ratings dicts for one platform, with TTL expiry."""
+
+    def __init__(
+        self,
+        platform: str,
+        directory: Path = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        enabled: bool = True,
+    ):
+        self.directory = Path(directory) / platform.replace(".", "_")
+        self.ttl       = ttl
+        self.enabled   = enabled
+        self._lock     = threading.Lock()
+
+    def _path(self, username: str) -> Path:
+        digest = hashlib.sha256(username.lower().encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def get(self, username: str) -> Optional[dict]:
+        """Return the cached ratings for `username`, or None on a miss, expiry or when disabled."""
+        if not self.enabled:
+            return None
+        path = self._path(username)
+        try:
+            with path.open(encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("fetched", 0) > self.ttl:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        return entry["ratings"]
+
+    def get_many(self, usernames: Iterable[str]) -> dict[str, dict]:
+        """Cached ratings for each of `usernames` that has a fresh entry, keyed as given."""
+        found = {}
+        for username in usernames:
+            ratings = self.get(username)
+            if ratings is not None:
+                found[username] = ratings
+        return found
+
+    def put(self, username: str, ratings: dict) -> None:
+        """Store one user's ratings as fetched now."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"fetched": time.time(), "username": username, "ratings": ratings}, f)
+            os.replace(tmp, self._path(username))
+
+    def clear(self) -> int:
+        """Remove every cached entry for this platform. Returns the number deleted."""
+        removed = 0
+        with self._lock:
+            for path in self.directory.glob("*.json"):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
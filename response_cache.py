@@ -0,0 +1,113 @@
+"""
+Content-addressed local cache for Claude responses.
+
+A response is stored under a hash of everything that determines it — model,
+token limit, system prompt and user message — so an identical rerun (same
+player, no new games) is answered from disk in milliseconds instead of making
+another streaming API call.
+
+Entries expire after `ttl` seconds. When there are more than `max_entries`,
+the least recently used ones are evicted.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from archive_cache import CACHE_ROOT
+
+DEFAULT_CACHE_DIR   = CACHE_ROOT / "responses"
+DEFAULT_TTL         = 7 * 24 * 3600   # one week
+DEFAULT_MAX_ENTRIES = 500
+
+
+def cache_key(model: str, max_tokens: int, system: str, user_message: str) -> str:
+    """Stable hash identifying one request."""
+    payload = json.dumps([model, max_tokens, system, user_message], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Hash-keyed store of response texts with TTL expiry and LRU eviction."""
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        enabled: bool = True,
+    ):
+        self.directory   = Path(directory)
+        self.ttl         = ttl
+        self.max_entries = max_entries
+        self.enabled     = enabled
+        self._lock       = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for `key`, or None on a miss, expiry or when disabled."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with path.open(encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)   # mark as recently used
+        except OSError:
+            pass
+        return entry["text"]
+
+    def put(self, key: str, text: str) -> None:
+        """Store a response text, then evict down to max_entries."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "text": text}, f, ensure_ascii=False)
+            os.replace(tmp, self._path(key))
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries beyond max_entries."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort(key=lambda e: e[0], reverse=True)
+        for _, path in entries[self.max_entries:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """Remove every cached response. Returns the number of entries deleted."""
+        removed = 0
+        with self._lock:
+            for path in self.directory.glob("*.json"):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
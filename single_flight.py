@@ -0,0 +1,121 @@
+"""
+Single-flight de-duplication of identical work that is already running.
+
+When several callers in one process ask for the same thing at once — e.g.
+three dashboard refreshes for the same player reaching the worker together —
+only the first (the leader) does the work. The others attach to the leader's
+flight, wait for it, and get the same result, or the same exception:
+
+    fetches = SingleFlight()
+    games   = fetches.do(("lichess", "magnus", 20), collect, "magnus", 20)
+
+A flight can also carry a stream. The leader publishes each piece as it is
+produced (`emit`); a follower's `stream()` replays what was already sent and
+then follows along live, so every caller sees the same tokens:
+
+    flight, leader = replies.join(key)
+    if not leader:
+        for text in flight.stream():
+            print(text, end="")
+        return flight.wait()
+
+Keys are forgotten as soon as the flight ends; later callers start afresh
+(and will usually find the result in a cache instead). Nothing is shared
+between processes.
+"""
+
+import threading
+from typing import Callable, Hashable, Iterator, Optional
+
+
+class Flight:
+    """One in-flight computation, its streamed pieces and, once done, its outcome."""
+
+    def __init__(self):
+        self._done      = threading.Condition()
+        self._chunks: list = []
+        self._finished  = False
+        self._result    = None
+        self._error: Optional[BaseException] = None
+        self.followers  = 0
+
+    def emit(self, chunk) -> None:
+        """Publish one streamed piece to current and future followers."""
+        with self._done:
+            self._chunks.append(chunk)
+            self._done.notify_all()
+
+    def finish(self, result=None, error: Optional[BaseException] = None) -> None:
+        with self._done:
+            self._result, self._error, self._finished = result, error, True
+            self._done.notify_all()
+
+    def stream(self) -> Iterator:
+        """Every piece emitted so far, then each new one as it arrives, until the flight ends."""
+        sent = 0
+        while True:
+            with self._done:
+                while sent == len(self._chunks) and not self._finished:
+                    self._done.wait()
+                pending = self._chunks[sent:]
+                finished = self._finished
+            yield from pending
+            sent += len(pending)
+            if finished and sent == len(self._chunks):
+                return
+
+    def wait(self):
+        """Block until the flight ends; return its result or raise its error."""
+        with self._done:
+            while not self._finished:
+                self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """A set of flights keyed by what they compute."""
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._flights: dict[Hashable, Flight] = {}
+
+    def join(self, key: Hashable) -> tuple[Flight, bool]:
+        """
+        Return (flight, leader). The leader must run the work and call
+        `end(key, flight, ...)`; a follower just waits on the flight.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def end(
+        self,
+        key: Hashable,
+        flight: Flight,
+        result=None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Finish the leader's flight and let new callers start a fresh one."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(result, error)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` unless an identical call is in flight; share its outcome."""
+        flight, leader = self.join(key)
+        if not leader:
+            return flight.wait()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.end(key, flight, error=e)
+            raise
+        self.end(key, flight, result)
+        return result
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Anthropic Messages API, for running the pipeline
+without network access or an API key.
+
+Implements just enough of the API for this project:
+    POST /v1/messages                        (streaming and non-streaming)
+    POST /v1/messages/batches                create a Message Batch
+    GET  /v1/messages/batches/<id>           batch status
+    GET  /v1/messages/batches/<id>/results   JSONL results once ended
+
+Every reply is a short deterministic placeholder. Batches report
+"in_progress" until `--batch-delay` seconds after creation, then "ended".
+Batch state lives in memory, so restart the stand-in only between runs.
+
+Usage:
+    python stand_in.py --port 8770
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8770 ANTHROPIC_API_KEY=stand-in \\
+        python batch.py students.txt --message-batches
+"""
+
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+REPLY_WORDS = 60   # length of each placeholder reply
+
+
+def placeholder_reply(params: dict) -> str:
+    """Deterministic stand-in text, sized like a short coaching reply."""
+    prompt = json.dumps(params.get("messages", []))
+    words  = [f"point{i % 7}" for i in range(REPLY_WORDS)]
+    return f"Stand-in reply to a {len(prompt):,}-character prompt. " + " ".join(words)
+
+
+def message_object(params: dict, text: str, msg_id: str) -> dict:
+    return {
+        "id":            msg_id,
+        "type":          "message",
+        "role":          "assistant",
+        "model":         params.get("model", "stand-in"),
+        "content":       [{"type": "text", "text": text}],
+        "stop_reason":   "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens":                len(json.dumps(params)) // 4,
+            "output_tokens":               len(text.split()),
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens":     0,
+        },
+    }
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class StandInState:
+    """In-memory batches shared by all request handlers."""
+
+    def __init__(self, batch_delay: float):
+        self.batch_delay = batch_delay
+        self.batches: dict = {}
+        self.counter = 0
+        self.lock    = threading.Lock()
+
+    def create_batch(self, requests: list) -> str:
+        with self.lock:
+            self.counter += 1
+            batch_id = f"msgbatch_standin_{self.counter:06d}"
+            self.batches[batch_id] = {"created": time.time(), "requests": requests}
+        return batch_id
+
+    def batch_object(self, batch_id: str, base_url: str) -> Optional[dict]:
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        created = batch["created"]
+        n       = len(batch["requests"])
+        ended   = time.time() >= created + self.batch_delay
+        return {
+            "id":                  batch_id,
+            "type":                "message_batch",
+            "processing_status":   "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else n,
+                "succeeded":  n if ended else 0,
+                "errored":    0,
+                "canceled":   0,
+                "expired":    0,
+            },
+            "created_at":          _iso(created),
+            "expires_at":          _iso(created + 86400),
+            "ended_at":            _iso(created + self.batch_delay) if ended else None,
+            "archived_at":         None,
+            "cancel_initiated_at": None,
+            "results_url":         f"{base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: StandInState
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self) -> None:
+        self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _stream(self, params: dict) -> None:
+        text    = placeholder_reply(params)
+        message = message_object(params, "", "msg_standin_stream")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        def event(name: str, data: dict) -> None:
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        event("message_start", {"type": "message_start", "message": {**message, "content": []}})
+        event("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+        })
+        for word in text.split(" "):
+            event("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": word + " "},
+            })
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(text.split())},
+        })
+        event("message_stop", {"type": "message_stop"})
+
+    def do_POST(self) -> None:
+        path = self.path.split("?")[0]
+        if path == "/v1/messages":
+            params = self._read_json()
+            if params.get("stream"):
+                self._stream(params)
+            else:
+                self._send_json(200, message_object(params, placeholder_reply(params), "msg_standin"))
+        elif path == "/v1/messages/batches":
+            batch_id = self.state.create_batch(self._read_json().get("requests", []))
+            self._send_json(200, self.state.batch_object(batch_id, self._base_url()))
+        else:
+            self._not_found()
+
+    def do_GET(self) -> None:
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:3] != ["v1", "messages", "batches"] or len(parts) < 4:
+            return self._not_found()
+        batch = self.state.batch_object(parts[3], self._base_url())
+        if batch is None:
+            return self._not_found()
+        if len(parts) == 4:
+            return self._send_json(200, batch)
+        if parts[4:] != ["results"] or batch["processing_status"] != "ended":
+            return self._not_found()
+
+        lines = []
+        for i, req in enumerate(self.state.batches[parts[3]]["requests"]):
+            params = req.get("params", {})
+            message = message_object(params, placeholder_reply(params), f"msg_standin_{i}")
+            lines.append(json.dumps({
+                "custom_id": req.get("custom_id"),
+                "result":    {"type": "succeeded", "message": message},
+            }))
+        body = ("\n".join(lines) + "\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int, batch_delay: float) -> ThreadingHTTPServer:
+    """Create (but do not start) a stand-in server bound to 127.0.0.1:`port`."""
+    Handler.state = StandInState(batch_delay)
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Messages API.")
+    parser.add_argument("--port", type=int, default=8770, help="Port to listen on (default: 8770)")
+    parser.add_argument(
+        "--batch-delay",
+        type=float,
+        default=5.0,
+        metavar="SECONDS",
+        help="Seconds before a submitted batch reports 'ended' (default: 5)",
+    )
+    args = parser.parse_args()
+
+    server = serve(args.port, args.batch_delay)
+    print(f"Anthropic stand-in listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Per-stage timing for a run — where did the 90 seconds go?
+
+Code marks its stages with `span`, which records the wall time, the thread the
+stage ran on and any counts it attaches. Rates are derived from those counts
+(games → games/s, bytes → bytes/s):
+
+    with timing.span("parse", platform="lichess") as s:
+        games = parse_games(pgn, username)
+        s["games"] = len(games)
+
+Two kinds of event are recorded against the span open on their thread:
+
+    http  every response seen by http_client's timing hook — status, time to
+          headers and bytes read off the wire (resolved when the trace is
+          written, so streamed bodies are counted in full)
+    llm   every Claude call from llm.stream_reply — time to first token,
+          output tokens/s and the input/output/cache token counts from the
+          stream's final usage; response-cache replays are marked "cached",
+          calls that joined an identical one in flight "shared"
+
+Nothing is recorded until `start()`, so un-traced runs pay only a flag check.
+main.py's --trace writes the result as JSON and --timings prints a summary
+table to stderr.
+"""
+
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+if TYPE_CHECKING:   # requests loads with http_client's session, on the first request
+    import requests
+
+_lock  = threading.Lock()
+_local = threading.local()
+
+_enabled = False
+_origin  = 0.0
+_spans: list = []
+_http:  list = []   # (event dict, urllib3 response whose byte count is read later)
+_llm:   list = []
+
+
+def _now() -> float:
+    return time.perf_counter() - _origin
+
+
+def _current() -> Optional[str]:
+    """Slash-separated path of the innermost span open on this thread."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def _record_http(response: "requests.Response") -> None:
+    event = {
+        "span":      _current(),
+        "at":        round(_now(), 4),
+        "method":    response.request.method,
+        "url":       response.url.split("?", 1)[0],
+        "status":    response.status_code,
+        "headers_s": round(response.elapsed.total_seconds(), 4),
+    }
+    with _lock:
+        _http.append((event, response.raw))
+
+
+# ── Recording ─────────────────────────────────────────────────────────────────
+
+def enabled() -> bool:
+    return _enabled
+
+
+def start() -> None:
+    """Begin recording (clearing any earlier trace) and hook into http_client."""
+    global _enabled, _origin
+    import http_client
+    with _lock:
+        _spans.clear()
+        _http.clear()
+        _llm.clear()
+        _origin = time.perf_counter()
+        if not _enabled:
+            http_client.add_timing_hook(_record_http)
+        _enabled = True
+
+
+def stop() -> None:
+    """Stop recording; the trace collected so far stays available."""
+    global _enabled
+    import http_client
+    with _lock:
+        if _enabled:
+            http_client.remove_timing_hook(_record_http)
+        _enabled = False
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[dict]:
+    """
+    Time the enclosed block as stage `name`. Yields a dict the block can add
+    counts to; it is recorded (with the duration) even if the block raises.
+    """
+    if not _enabled:
+        yield {}
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    path  = f"{stack[-1]}/{name}" if stack else name
+    entry = {
+        "name":   path,
+        "thread": threading.current_thread().name,
+        "start":  round(_now(), 4),
+    }
+    counts = dict(attrs)
+    stack.append(path)
+    try:
+        yield counts
+    finally:
+        stack.pop()
+        entry["seconds"] = round(_now() - entry["start"], 4)
+        entry.update(counts)
+        with _lock:
+            _spans.append(entry)
+
+
+def in_span(fn: Callable, name: Optional[str] = None) -> Callable:
+    """
+    Wrap `fn` to run on a worker thread as if inside the span open here, so
+    its HTTP requests and sub-spans are attributed to it; with `name`, each
+    call is also timed as a span of its own.
+    """
+    parent = _current()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        saved = stack[:]
+        stack[:] = [parent] if parent else []
+        try:
+            if name is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        finally:
+            stack[:] = saved
+
+    return wrapper if _enabled else fn
+
+
+def record_llm(**fields) -> None:
+    """Record one Claude call's timings and token counts."""
+    if not _enabled:
+        return
+    event = {"span": _current(), "at": round(_now(), 4), **fields}
+    with _lock:
+        _llm.append(event)
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+
+def _with_rates(entry: dict) -> dict:
+    out = dict(entry)
+    seconds = out.get("seconds")
+    for count, rate in (("games", "games_per_sec"), ("bytes", "bytes_per_sec")):
+        if seconds and out.get(count) is not None:
+            out[rate] = round(out[count] / seconds, 1)
+    return out
+
+
+def _http_events() -> list[dict]:
+    events = []
+    for event, raw in _http:
+        event = dict(event)
+        try:
+            event["bytes"] = raw.tell()   # compressed bytes read so far
+        except (AttributeError, OSError):
+            event["bytes"] = None
+        events.append(event)
+    return events
+
+
+def trace() -> dict:
+    """The recorded spans and events, ordered by start time."""
+    with _lock:
+        spans = sorted(_spans, key=lambda s: s["start"])
+        http  = _http_events()
+        llm   = list(_llm)
+    return {
+        "spans": [_with_rates(s) for s in spans],
+        "http":  http,
+        "llm":   llm,
+    }
+
+
+def write_trace(path: Path, **meta) -> None:
+    """Write the trace as JSON, with any `meta` fields (command line, etc.) on top."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump({**meta, **trace()}, f, indent=2)
+        f.write("\n")
+
+
+def _within(event_span: Optional[str], path: str) -> bool:
+    return event_span is not None and (event_span == path or event_span.startswith(path + "/"))
+
+
+def _size(n: int) -> str:
+    if n < 1024:
+        return f"{n:,} B"
+    if n < 1024 ** 2:
+        return f"{n / 1024:,.1f} KB"
+    return f"{n / 1024 ** 2:,.1f} MB"
+
+
+def summary() -> str:
+    """
+    One line per span: duration, games/s, HTTP traffic (including that of
+    nested spans) and the timings of Claude calls made directly in it.
+    """
+    data  = trace()
+    lines = [f"{'Stage':<28} {'Seconds':>8}  Detail", "─" * 78]
+    for s in data["spans"]:
+        detail = []
+        if s.get("games") is not None:
+            rate = f" ({s['games_per_sec']:,.0f}/s)" if "games_per_sec" in s else ""
+            detail.append(f"{s['games']:,} games{rate}")
+        http = [e for e in data["http"] if _within(e["span"], s["name"])]
+        if http:
+            nbytes = sum(e["bytes"] or 0 for e in http)
+            detail.append(f"{len(http)} request{'s' if len(http) != 1 else ''}, {_size(nbytes)}")
+        for call in (e for e in data["llm"] if e["span"] == s["name"]):
+            if call.get("cached"):
+                detail.append("response cache hit")
+                continue
+            if call.get("shared"):
+                detail.append("shared an identical call in flight")
+                continue
+            prompt = (
+                call["input_tokens"] + call["cache_read_input_tokens"]
+                + call["cache_creation_input_tokens"]
+            )
+            rate = call["output_tokens_per_sec"]
+            detail.append(
+                f"TTFT {call['ttft_s']:.2f}s, {prompt:,} in "
+                f"({call['cache_read_input_tokens']:,} cached) / {call['output_tokens']:,} out tokens"
+                + (f", {rate:,.1f} tok/s" if rate is not None else "")
+            )
+        depth = s["name"].count("/")
+        label = "  " * depth + s["name"].rsplit("/", 1)[-1]
+        lines.append(f"{label:<28} {s['seconds']:>8.2f}  {'; '.join(detail)}".rstrip())
+    return "\n".join(lines)
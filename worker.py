@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Analysis worker — a long-running service that works through the web app's
+queued analysis jobs.
+
+A job names a player, platform, optional time control and game count. The web
+app (or `worker.py submit`) adds it to a local SQLite queue as "pending". The
+worker claims it ("processing"), runs the same stages as batch.py (ratings and
+games, analyst, coach) and stores the result as an AnalysisReport
+(types/analysis.ts, built by analysis_report) with status "complete" — or
+"failed" with the error. `worker.py status <id>` prints a job's report at any
+stage.
+
+Unlike main.py, the process stays up between jobs, so each job skips
+interpreter startup and finds everything already warm: the Anthropic client
+and the pooled HTTP session with their open connections, the game store, and
+the archive and response caches. Up to --concurrency jobs run at once.
+
+SIGTERM or Ctrl-C drains the worker: no new jobs are claimed, jobs in flight
+are finished and saved, then the process exits. A second signal stops it
+immediately. A job whose worker died mid-run is claimed again once its lease
+expires.
+
+Usage:
+    python worker.py serve --concurrency 4
+    python worker.py submit magnus --platform lichess --type rapid --games 20
+    python worker.py status report-6f1c...
+    python worker.py serve --drain          # process what is queued, then exit
+"""
+
+import sys
+import json
+import time
+import uuid
+import signal
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+import analyst
+import coach
+import http_client
+import llm
+from analysis_report import build_report, timestamp
+from archive_cache import CACHE_ROOT
+from batch import Job, fetch_inputs
+from game_store import GameStore
+
+DEFAULT_QUEUE_PATH  = CACHE_ROOT / "jobs.db"
+DEFAULT_CONCURRENCY = 2
+POLL_INTERVAL       = 2.0            # seconds between queue checks when idle
+LEASE_SECONDS       = 15 * 60        # a processing job older than this is reclaimed
+MAX_ATTEMPTS        = 3
+
+TIME_CONTROLS = {
+    "lichess":   ("bullet", "blitz", "rapid", "classical"),
+    "chess.com": ("bullet", "blitz", "rapid", "daily"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT    PRIMARY KEY,
+    user_id      TEXT    NOT NULL,
+    platform     TEXT    NOT NULL,
+    username     TEXT    NOT NULL,
+    time_control TEXT,
+    max_games    INTEGER NOT NULL,
+    status       TEXT    NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    lease_until  REAL,
+    report       TEXT,
+    error        TEXT,
+    created_at   TEXT    NOT NULL,
+    updated_at   TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+"""
+
+
+# ── Queue ─────────────────────────────────────────────────────────────────────
+
+class JobQueue:
+    """SQLite-backed job queue, safe to share between threads and processes."""
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def submit(
+        self,
+        username: str,
+        platform: str,
+        time_control: Optional[str] = None,
+        max_games: int = 20,
+        user_id: str = "",
+    ) -> str:
+        """Queue a job as pending and return its report id."""
+        if platform not in TIME_CONTROLS:
+            raise ValueError(f"unknown platform '{platform}'")
+        if time_control and time_control.lower() not in TIME_CONTROLS[platform]:
+            raise ValueError(
+                f"time control '{time_control}' is not valid for {platform} "
+                f"({', '.join(TIME_CONTROLS[platform])})"
+            )
+        job_id = f"report-{uuid.uuid4()}"
+        now    = timestamp()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, user_id, platform, username, time_control, max_games, "
+                "status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)",
+                (job_id, user_id, platform, username,
+                 time_control.lower() if time_control else None, max_games, now, now),
+            )
+        return job_id
+
+    def claim(self, lease_seconds: float = LEASE_SECONDS) -> Optional[dict]:
+        """
+        Mark the oldest pending job (or a processing job whose lease has
+        expired) as processing and return it, or None if there is none.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'processing', attempts = attempts + 1, "
+                "lease_until = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'pending' "
+                "            OR (status = 'processing' AND lease_until < ?) "
+                "            ORDER BY created_at, rowid LIMIT 1) "
+                "RETURNING *",
+                (now + lease_seconds, timestamp(), now),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def complete(self, job_id: str, report: dict) -> None:
+        self._finish(job_id, "complete", json.dumps(report), None)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "failed", None, error)
+
+    def _finish(self, job_id: str, status: str, report: Optional[str], error: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, report = ?, error = ?, lease_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (status, report, error, timestamp(), job_id),
+            )
+
+    def job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def report(self, job_id: str) -> Optional[dict]:
+        """The job's AnalysisReport — with empty results until it is complete."""
+        job = self.job(job_id)
+        if job is None:
+            return None
+        if job["report"] is not None:
+            return json.loads(job["report"])
+        return build_report(
+            job["id"], job["user_id"], job["platform"], job["username"], job["time_control"],
+            {}, 0, "", "", job["status"], job["created_at"], job["updated_at"],
+        )
+
+    def counts(self) -> dict:
+        """Number of jobs in each status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            return dict(rows.fetchall())
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+def _log(job: dict, message: str) -> None:
+    print(f"[{job['id']} {job['username']} @ {job['platform']}] {message}", flush=True)
+
+
+def run_job(job: dict, store: Optional[GameStore]) -> dict:
+    """Fetch, analyse and plan one claimed job. Returns its complete AnalysisReport."""
+    time_control = job["time_control"]
+    batch_job    = Job(job["username"], job["platform"],
+                       time_control.capitalize() if time_control else None)
+
+    ratings, n_games, game_data = fetch_inputs(batch_job, job["max_games"], store)
+    if not n_games:
+        raise ValueError("no games found")
+    _log(job, f"analysing {n_games} games...")
+    analysis = analyst.analyse(job["username"], game_data, echo=False)
+    _log(job, "writing training plan...")
+    plan = coach.produce_plan(
+        job["username"], batch_job.type or "all time controls", analysis, echo=False
+    )
+    return build_report(
+        job["id"], job["user_id"], job["platform"], job["username"], time_control,
+        ratings, n_games, analysis, plan, "complete", job["created_at"],
+    )
+
+
+def _describe(error: Exception, platform: str) -> str:
+    """One-line reason a job failed, as stored in the queue."""
+    import requests
+
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code
+        return f"user not found on {platform}" if status == 404 else f"{platform} returned HTTP {status}"
+    return llm.api_error_message(error) or f"{type(error).__name__}: {error}"
+
+
+# ── Service ───────────────────────────────────────────────────────────────────
+
+class Worker:
+    """Claims and runs queued jobs on `concurrency` threads until drained."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        store: Optional[GameStore] = None,
+        output_dir: Optional[Path] = None,
+        poll_interval: float = POLL_INTERVAL,
+        exit_when_idle: bool = False,
+    ):
+        self.queue          = queue
+        self.concurrency    = concurrency
+        self.store          = store
+        self.output_dir     = output_dir
+        self.poll_interval  = poll_interval
+        self.exit_when_idle = exit_when_idle
+        self.draining       = threading.Event()
+        self.processed      = {"complete": 0, "failed": 0}
+        self._counts_lock   = threading.Lock()
+
+    def warm_up(self) -> None:
+        """Create the shared clients now, so the first job does not pay for them."""
+        http_client.session()
+        try:
+            llm.client()
+        except Exception as e:   # e.g. no API key yet — the job that needs it will report it
+            print(f"Warning: Anthropic client not ready ({e}).", file=sys.stderr)
+
+    def drain(self) -> None:
+        """Stop claiming jobs; those in flight run to completion."""
+        self.draining.set()
+
+    def _loop(self) -> None:
+        while not self.draining.is_set():
+            job = self.queue.claim()
+            if job is None:
+                if self.exit_when_idle:
+                    return
+                self.draining.wait(self.poll_interval)
+                continue
+            self._process(job)
+
+    def _process(self, job: dict) -> None:
+        if job["attempts"] > MAX_ATTEMPTS:
+            self.queue.fail(job["id"], f"gave up after {MAX_ATTEMPTS} attempts")
+            _log(job, "failed — abandoned by earlier workers too often")
+            return
+        _log(job, "fetching ratings and games...")
+        started = time.perf_counter()
+        try:
+            report = run_job(job, self.store)
+        except Exception as e:   # isolate per-job failures
+            error = _describe(e, job["platform"])
+            self.queue.fail(job["id"], error)
+            status = "failed"
+            _log(job, f"failed — {error}")
+        else:
+            self.queue.complete(job["id"], report)
+            status = "complete"
+            _log(job, f"complete in {time.perf_counter() - started:.1f}s")
+        with self._counts_lock:
+            self.processed[status] += 1
+        if self.output_dir is not None:
+            path = Path(self.output_dir) / f"{job['id']}.json"
+            path.write_text(json.dumps(self.queue.report(job["id"]), indent=2), encoding="utf-8")
+
+    def run(self) -> None:
+        """Run the worker threads until drained (or idle, with `exit_when_idle`)."""
+        threads = [
+            threading.Thread(target=self._loop, name=f"worker-{i + 1}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)   # wake regularly so signals are handled
+
+
+def _install_signal_handlers(worker: Worker) -> None:
+    """First SIGINT/SIGTERM drains the worker; a second one exits at once."""
+    def handle(signum, frame):
+        if worker.draining.is_set():
+            print("\nStopping now.", file=sys.stderr)
+            sys.exit(1)
+        print(
+            "\nDraining: finishing jobs in flight (signal again to stop now)...",
+            file=sys.stderr, flush=True,
+        )
+        worker.drain()
+
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Long-running worker for queued analysis jobs, and a CLI to queue them.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Examples:\n"
+            "  python worker.py serve --concurrency 4\n"
+            "  python worker.py serve --drain --output-dir reports/\n"
+            "  python worker.py submit magnus --platform chess.com --type rapid\n"
+            "  python worker.py status report-6f1c0e8a-..."
+        ),
+    )
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        default=DEFAULT_QUEUE_PATH,
+        metavar="PATH",
+        help=f"SQLite queue database (default: {DEFAULT_QUEUE_PATH})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Process queued jobs until stopped")
+    serve.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        metavar="N",
+        help=f"Jobs to run at once (default: {DEFAULT_CONCURRENCY})",
+    )
+    serve.add_argument(
+        "--poll-interval",
+        type=float,
+        default=POLL_INTERVAL,
+        metavar="SECONDS",
+        help=f"Seconds between queue checks when idle (default: {POLL_INTERVAL:g})",
+    )
+    serve.add_argument(
+        "--drain",
+        action="store_true",
+        help="Exit once the queue is empty instead of waiting for new jobs",
+    )
+    serve.add_argument(
+        "--output-dir",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Also write each finished report to DIR/<id>.json",
+    )
+    serve.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Re-download every game instead of syncing the local game store",
+    )
+
+    submit = commands.add_parser("submit", help="Queue an analysis job and print its id")
+    submit.add_argument("username", help="Lichess or Chess.com username")
+    submit.add_argument("--platform", choices=sorted(TIME_CONTROLS), default="lichess")
+    submit.add_argument("--type", default=None, metavar="TYPE",
+                        help="Time control (bullet, blitz, rapid, classical/daily)")
+    submit.add_argument("--games", type=int, default=20, metavar="N",
+                        help="Number of recent games to analyse (default: 20)")
+    submit.add_argument("--user-id", default="", metavar="ID", help="Web app user id")
+
+    status = commands.add_parser("status", help="Print a job's AnalysisReport as JSON")
+    status.add_argument("id", help="Report id printed by submit")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+
+    if args.command == "submit":
+        try:
+            job_id = queue.submit(args.username, args.platform, args.type, args.games, args.user_id)
+        except ValueError as e:
+            parser.error(str(e))
+        print(job_id)
+        return
+
+    if args.command == "status":
+        report = queue.report(args.id)
+        if report is None:
+            print(f"Error: no job '{args.id}'.", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(report, indent=2))
+        job = queue.job(args.id)
+        if job["error"]:
+            print(f"Error: {job['error']}", file=sys.stderr)
+        return
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    load_dotenv()
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    worker = Worker(
+        queue,
+        concurrency=args.concurrency,
+        store=None if args.no_store else GameStore(),
+        output_dir=args.output_dir,
+        poll_interval=args.poll_interval,
+        exit_when_idle=args.drain,
+    )
+    _install_signal_handlers(worker)
+    worker.warm_up()
+    pending = queue.counts().get("pending", 0)
+    print(
+        f"Worker ready: {args.concurrency} slot{'s' if args.concurrency != 1 else ''}, "
+        f"{pending} job{'s' if pending != 1 else ''} pending.",
+        flush=True,
+    )
+    worker.run()
+    print(
+        f"Worker stopped: {worker.processed['complete']} complete, "
+        f"{worker.processed['failed']} failed.",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()